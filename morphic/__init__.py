@@ -1,7 +1,8 @@
 from morphic.mesher import Mesh
 from morphic.data import Data
 from morphic.fitter import Fit
-from morphic.fasteval import FEMatrix
+from morphic.fasteval import FEMatrix, EmbeddedPoints
+from morphic.sequence import MeshSequence
 from importlib import reload
 
 reload_modules = True
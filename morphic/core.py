@@ -1,10 +1,13 @@
 """
 This module manages the low level parameters describing the mesh.
 """
+from morphic import discretizer
 from morphic import interpolator
+import gc
 import string
 import random
 import numpy
+import scipy.sparse
 
 
 def dimensions(basis):
@@ -50,6 +53,85 @@ def element_face_nodes(basis, node_ids):
     return faces
 
 
+def element_node_shape(basis):
+    """
+    Returns the number of nodes in each xi direction of a Lagrange or
+    cubic-Hermite element, e.g., ``[3, 2]`` for ``['L2', 'H3']``.
+    """
+    shape = []
+    for base in basis:
+        if base[0] == 'L':
+            shape.append(int(base[1:]) + 1)
+        elif base[0] == 'H':
+            shape.append(2)
+        else:
+            raise ValueError('Basis is not supported')
+    return shape
+
+
+def face_xi(face_index, xi):
+    """
+    Maps xi locations on a face of a 3D element to the element xi. The
+    face index follows the ordering in ``element_face_nodes``, i.e.,
+    faces 0 and 1 are at xi3 = 0 and 1, faces 2 and 3 are at xi2 = 0
+    and 1, and faces 4 and 5 are at xi1 = 0 and 1.
+    """
+    xi = numpy.asarray(xi, dtype=float)
+    axis = 2 - face_index // 2
+    free_axes = [i for i in range(3) if i != axis]
+    Xi = numpy.zeros((xi.shape[0], 3))
+    Xi[:, free_axes] = xi
+    Xi[:, axis] = face_index % 2
+    return Xi
+
+
+EDGE_XI = ((None, 0, 0), (None, 1, 0), (0, None, 0), (1, None, 0),
+           (None, 0, 1), (None, 1, 1), (0, None, 1), (1, None, 1),
+           (0, 0, None), (1, 0, None), (0, 1, None), (1, 1, None))
+
+
+def element_edges(dims):
+    """
+    Returns the xi location of the edges of an element, where ``None``
+    marks the xi direction along the edge. For example, the first edge
+    of a 3D element is ``(None, 0, 0)``, i.e., along xi1 at xi2 = 0
+    and xi3 = 0.
+    """
+    if dims == 1:
+        return [(None,)]
+    elif dims == 2:
+        return [edge[:2] for edge in EDGE_XI[:4]]
+    elif dims == 3:
+        return list(EDGE_XI)
+    raise ValueError('Dimensions >3 is not supported')
+
+
+def element_edge_nodes(basis, node_ids):
+    """
+    Returns the nodes along each edge of an element, in order of
+    increasing xi. The edges are ordered as in ``element_edges``.
+    """
+    shape = element_node_shape(basis)
+    shape.reverse()
+    nids = numpy.array(node_ids).reshape(shape)
+    edges = []
+    for edge in element_edges(len(shape)):
+        index = tuple([slice(None) if x is None else -x for x in reversed(edge)])
+        edges.append(nids[index].tolist())
+    return edges
+
+
+def edge_xi(edge_index, xi, dims):
+    """
+    Maps xi locations along an edge of an element to the element xi.
+    """
+    xi = numpy.asarray(xi, dtype=float).ravel()
+    Xi = numpy.zeros((xi.size, dims))
+    for axis, x in enumerate(element_edges(dims)[edge_index]):
+        Xi[:, axis] = xi if x is None else x
+    return Xi
+
+
 def element_line_nodes(basis, node_ids):
     dims = dimensions(basis)
     for base in basis:
@@ -89,12 +171,298 @@ def element_line_nodes(basis, node_ids):
     return lines
 
 
+class ElementEntities(object):
+    """
+    The faces or edges of a set of elements matched by their canonical
+    keys, the sorted indices of their nodes, so entities shared by
+    elements are matched regardless of the node ordering in each
+    element. The keys are matched with a single sort, which is
+    O(n log n) in the number of element entities.
+
+    The element entities are stored as arrays of entries:
+        - ``entry_element``: index of the element in the topology
+        - ``entry_local``: face or edge index on the element
+        - ``entry_id``: index of the unique face or edge
+    and ``count`` is the number of elements sharing each entity.
+    Entities are numbered in the order they first appear in the
+    elements.
+    """
+
+    def __init__(self, keys, entry_element, entry_local):
+        if len(keys) == 0:
+            self.entry_element = numpy.zeros(0, dtype=int)
+            self.entry_local = numpy.zeros(0, dtype=int)
+            self.entry_id = numpy.zeros(0, dtype=int)
+            self.count = numpy.zeros(0, dtype=int)
+            self.keys = numpy.zeros((0, 0), dtype=int)
+            return
+
+        # Pad keys on the left so entities with different node counts
+        # can be matched in a single sort.
+        width = max([key.shape[1] for key in keys])
+        keys = numpy.concatenate([
+            numpy.pad(key, ((0, 0), (width - key.shape[1], 0)),
+                      constant_values=-1) for key in keys])
+        entry_element = numpy.concatenate(entry_element)
+        entry_local = numpy.concatenate(entry_local)
+        order = numpy.lexsort((entry_local, entry_element))
+        self.entry_element = entry_element[order]
+        self.entry_local = entry_local[order]
+        keys = keys[order]
+
+        unique_keys, first_entry, entry_id, count = numpy.unique(
+            keys, axis=0, return_index=True, return_inverse=True,
+            return_counts=True)
+        # Renumber in order of first appearance
+        renumber = numpy.zeros(first_entry.size, dtype=int)
+        renumber[numpy.argsort(first_entry)] = numpy.arange(first_entry.size)
+        self.entry_id = renumber[entry_id.ravel()]
+        self.count = numpy.zeros(first_entry.size, dtype=int)
+        self.count[renumber] = count
+        self.keys = numpy.zeros_like(unique_keys)
+        self.keys[renumber] = unique_keys
+
+    @property
+    def size(self):
+        return self.count.size
+
+    def entries(self):
+        """
+        Returns the entries grouped by entity as ``(indptr, entries)``,
+        where the entries of entity ``i`` are
+        ``entries[indptr[i]:indptr[i + 1]]``.
+        """
+        entries = numpy.argsort(self.entry_id, kind='stable')
+        indptr = numpy.zeros(self.size + 1, dtype=int)
+        indptr[1:] = numpy.cumsum(self.count)
+        return indptr, entries
+
+    def first_entries(self):
+        """
+        Returns the first entry of each entity, which is used to
+        represent, e.g., evaluate, the entity.
+        """
+        indptr, entries = self.entries()
+        return entries[indptr[:-1]]
+
+
+class Topology(object):
+    """
+    The face and edge adjacency of a set of elements, built from the
+    element connectivity in bulk, see ``ElementEntities``.
+
+    >>> topology = mesh.topology()
+    >>> exterior = topology.exterior_faces()
+    >>> element_ids = [topology.element_ids[i]
+    ...     for i in topology.faces.entry_element[exterior]]
+    """
+
+    def __init__(self, elements):
+        self.element_ids = []
+        self.element_index = {}
+        self.node_ids = []
+        node_index = {}
+        groups = {}
+        for eidx, elem in enumerate(elements):
+            self.element_ids.append(elem.id)
+            self.element_index[elem.id] = eidx
+            key = tuple(elem.basis)
+            if key not in groups:
+                groups[key] = ([], [])
+            groups[key][0].append(eidx)
+            nodes = []
+            for nid in elem.node_ids:
+                if nid not in node_index:
+                    node_index[nid] = len(self.node_ids)
+                    self.node_ids.append(nid)
+                nodes.append(node_index[nid])
+            groups[key][1].append(nodes)
+        self.node_index = node_index
+
+        face_keys, face_elements, face_locals = [], [], []
+        edge_keys, edge_elements, edge_locals = [], [], []
+        for basis, (eidx, connectivity) in groups.items():
+            basis = list(basis)
+            local_nodes = list(range(len(connectivity[0])))
+            eidx = numpy.array(eidx, dtype=int)
+            connectivity = numpy.array(connectivity, dtype=int)
+
+            if dimensions(basis) == 2:
+                local_faces = [local_nodes]
+            elif dimensions(basis) == 3:
+                local_faces = element_face_nodes(basis, local_nodes)
+            else:
+                local_faces = []
+            for face_index, nodes in enumerate(local_faces):
+                face_keys.append(numpy.sort(connectivity[:, nodes], axis=1))
+                face_elements.append(eidx)
+                face_locals.append(face_index * numpy.ones(eidx.size, dtype=int))
+
+            # element_edges only describes edges along the xi
+            # directions, so triangle edges are not included.
+            if 'T' in [base[0] for base in basis]:
+                local_edges = []
+            else:
+                local_edges = element_edge_nodes(basis, local_nodes)
+            for edge_index, nodes in enumerate(local_edges):
+                edge_keys.append(numpy.sort(connectivity[:, nodes], axis=1))
+                edge_elements.append(eidx)
+                edge_locals.append(edge_index * numpy.ones(eidx.size, dtype=int))
+
+        self.faces = ElementEntities(face_keys, face_elements, face_locals)
+        self.edges = ElementEntities(edge_keys, edge_elements, edge_locals)
+
+    def element_entries(self, entities, elements):
+        """
+        Returns the indices of the entries of ``entities`` (faces or
+        edges) on the given element ids.
+        """
+        in_elements = numpy.zeros(len(self.element_ids), dtype=bool)
+        in_elements[[self.element_index[eid] for eid in elements
+                     if eid in self.element_index]] = True
+        return numpy.nonzero(in_elements[entities.entry_element])[0]
+
+    def face_elements(self, face_id):
+        """
+        Returns the (element id, face index) pairs sharing a face.
+        """
+        entries = numpy.nonzero(self.faces.entry_id == face_id)[0]
+        return [[self.element_ids[self.faces.entry_element[i]],
+                 self.faces.entry_local[i]] for i in entries]
+
+    def exterior_faces(self, elements=None):
+        """
+        Returns the face entries of the faces which belong to only one
+        element. If element ids are given, only faces on those
+        elements are returned.
+        """
+        if elements is None:
+            entries = numpy.arange(self.faces.entry_element.size)
+        else:
+            entries = self.element_entries(self.faces, elements)
+        return entries[self.faces.count[self.faces.entry_id[entries]] == 1]
+
+    def element_neighbours(self):
+        """
+        Returns the pairs of element indices which share a face as an
+        ``(num_pairs, 2)`` array.
+        """
+        indptr, entries = self.faces.entries()
+        shared = numpy.nonzero(self.faces.count == 2)[0]
+        return numpy.array([
+            self.faces.entry_element[entries[indptr[shared]]],
+            self.faces.entry_element[entries[indptr[shared] + 1]]]).T
+
+
+class NodeAdjacency(object):
+    """
+    The inverse connectivity of a set of elements, i.e., the
+    (element, local node index) pairs using each node. The index is
+    built in bulk from the elements and elements can be added
+    incrementally. The pairs are exposed as compressed sparse row
+    arrays where the pairs of node ``node_ids[i]`` are
+    ``indptr[i]:indptr[i + 1]`` in ``element_index`` and
+    ``local_index``. ``element_index`` indexes ``element_ids``.
+
+    >>> adjacency = mesh.adjacency()
+    >>> for element_id, local_index in adjacency.node_elements(5):
+    ...     print(element_id, local_index)
+    """
+
+    def __init__(self, elements=None):
+        self.element_ids = []
+        self._entries = [[], [], []]
+        self._arrays = None
+        if is_array_backed(elements):
+            conn = elements.data['node_ids']
+            self.element_ids = elements.ids
+            self._entries = [
+                conn.ravel().tolist(),
+                numpy.repeat(numpy.arange(conn.shape[0]),
+                             conn.shape[1]).tolist(),
+                numpy.tile(numpy.arange(conn.shape[1]),
+                           conn.shape[0]).tolist()]
+        elif elements is not None:
+            for elem in elements:
+                if elem.node_ids is not None:
+                    self.add_element(elem.id, elem.node_ids)
+
+    def add_element(self, element_id, node_ids):
+        eidx = len(self.element_ids)
+        self.element_ids.append(element_id)
+        self._entries[0].extend(node_ids)
+        self._entries[1].extend([eidx] * len(node_ids))
+        self._entries[2].extend(range(len(node_ids)))
+        self._arrays = None
+
+    def _build(self):
+        node_ids = list(dict.fromkeys(self._entries[0]))
+        node_index = dict(zip(node_ids, range(len(node_ids))))
+        entry_node = numpy.array(
+            [node_index[nid] for nid in self._entries[0]], dtype=int)
+        order = numpy.argsort(entry_node, kind='stable')
+        indptr = numpy.zeros(len(node_ids) + 1, dtype=int)
+        indptr[1:] = numpy.cumsum(numpy.bincount(
+            entry_node, minlength=len(node_ids)))
+        self._arrays = (
+            node_ids, node_index, indptr,
+            numpy.array(self._entries[1], dtype=int)[order],
+            numpy.array(self._entries[2], dtype=int)[order])
+
+    @property
+    def node_ids(self):
+        if self._arrays is None:
+            self._build()
+        return self._arrays[0]
+
+    @property
+    def node_index(self):
+        if self._arrays is None:
+            self._build()
+        return self._arrays[1]
+
+    @property
+    def indptr(self):
+        if self._arrays is None:
+            self._build()
+        return self._arrays[2]
+
+    @property
+    def element_index(self):
+        if self._arrays is None:
+            self._build()
+        return self._arrays[3]
+
+    @property
+    def local_index(self):
+        if self._arrays is None:
+            self._build()
+        return self._arrays[4]
+
+    def node_elements(self, node_id):
+        """
+        Returns the (element id, local node index) pairs of the
+        elements using a node.
+        """
+        if node_id not in self.node_index:
+            return []
+        i = self.node_index[node_id]
+        rows = slice(self.indptr[i], self.indptr[i + 1])
+        return [(self.element_ids[eidx], lidx) for eidx, lidx in zip(
+            self.element_index[rows], self.local_index[rows])]
+
+
 class ObjectList:
     """
     This object is used by a few morphic modules to store collections
     of objects. For example, nodes, elements, fixed points.
+
+    ``group_version`` is incremented whenever the group membership
+    changes so indices cached for a group can be invalidated.
     """
     
+    group_version = 0
+
     def __init__(self):
         self._objects = []
         self._object_ids = {}
@@ -135,6 +503,7 @@ class ObjectList:
         return oid
 
     def remove(self, obj):
+        self.group_version += 1
         for key in self.groups.keys():
             if obj in self.groups[key]:
                 self.groups[key].remove(obj)
@@ -143,6 +512,21 @@ class ObjectList:
         if obj in self._objects:
             self._objects.remove(obj)
 
+    def remove_ids(self, uids):
+        """
+        Removes the objects with ids ``uids`` from the collection and
+        its groups in one pass.
+        """
+        removed = set([id(self._object_ids[uid]) for uid in uids])
+        self.group_version += 1
+        for uid in uids:
+            self._object_ids.pop(uid, None)
+        self._objects = [
+            obj for obj in self._objects if id(obj) not in removed]
+        for key in self.groups.keys():
+            self.groups[key] = [
+                obj for obj in self.groups[key] if id(obj) not in removed]
+
     def set_counter(self, value):
         """
         Sets the counter value for finding unique ids.
@@ -184,19 +568,24 @@ class ObjectList:
             group_list = [group]
         else:
             group_list = group
-        for uid in uids:
-            for group in group_list:
-                if group not in self.groups.keys():
-                    self.groups[group] = []
-                obj = self._object_ids[uid]
-                if obj not in self.groups[group]:
-                    self.groups[group].append(obj)
+        self.group_version += 1
+        for group in group_list:
+            if group not in self.groups.keys():
+                self.groups[group] = []
+            objs = self.groups[group]
+            members = set([id(obj) for obj in objs])
+            for uid in uids:
+                obj = self[uid]
+                if id(obj) not in members:
+                    objs.append(obj)
+                    members.add(id(obj))
     
     def reset_object_list(self):
         self._objects = []
         self._object_ids = {}
         self._id_counter = 0
         self.groups = {}
+        self.group_version += 1
     
     def _get_group(self, group):
         if group in self.groups.keys():
@@ -224,6 +613,53 @@ class ObjectList:
             obj_ids.append(obj.id)
         return obj_ids
 
+    def _clone(self, clone_object, finalise=None):
+        """
+        Returns a copy of the list where each object is replaced by
+        ``clone_object(obj)`` and the groups reference the cloned
+        objects. The objects are cloned when the list is first used,
+        after which ``finalise(objlist)`` is called, so cloning a list
+        which is not used is cheap.
+        """
+        objlist = ObjectList.__new__(ObjectList)
+        objlist.group_version = self.group_version
+        objlist._clone_source = (
+            list(self._objects), dict(self._object_ids), self._id_counter,
+            dict([(key, list(objs)) for key, objs in self.groups.items()]),
+            clone_object, finalise)
+        return objlist
+
+    def _materialise(self):
+        objects, object_ids, id_counter, groups, clone_object, finalise = \
+            self.__dict__.pop('_clone_source')
+        # The cyclic garbage collector is paused while the many small
+        # objects are created, which otherwise dominates the copy time.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._objects = [clone_object(obj) for obj in objects]
+            clones = dict(zip(map(id, objects), self._objects))
+            self._object_ids = dict([
+                (key, clones[id(obj)]) for key, obj in object_ids.items()])
+            self.groups = dict([
+                (key, [clones[id(obj)] for obj in objs])
+                for key, objs in groups.items()])
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self._id_counter = id_counter
+        if finalise is not None:
+            finalise(self)
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, i.e., the objects of a
+        # clone which have not been copied yet, see _clone.
+        if name in ['_objects', '_object_ids', '_id_counter', 'groups'] \
+                and '_clone_source' in self.__dict__:
+            self._materialise()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
     def _save_dict(self):
         objlist_dict = {}
         objlist_dict['groups'] = {}
@@ -236,6 +672,7 @@ class ObjectList:
     
     def _load_dict(self, objlist_dict):
         self.groups = {}
+        self.group_version += 1
         for group in objlist_dict['groups'].keys():
             self.add_to_group(objlist_dict['groups'][group], group)
     
@@ -255,6 +692,169 @@ class ObjectList:
         return self._objects.__iter__()
         
         
+class ArrayObjectList(ObjectList):
+    """
+    An ``ObjectList`` whose objects are described by arrays, e.g.,
+    the element connectivity, and are only created when they are
+    accessed, by calling ``create(objlist, index)``. Created objects
+    are kept so changes to them persist. The arrays describing the
+    objects are stored in ``data``.
+
+    Groups only create the objects in them. Adding or removing objects
+    creates all the objects and the list then behaves as a normal
+    ``ObjectList``.
+    """
+
+    def __init__(self, ids, create, data=None):
+        self._ids = numpy.asarray(ids)
+        self._order = numpy.argsort(self._ids, kind='stable')
+        self._sorted_ids = self._ids[self._order]
+        self._create = create
+        self._created = {}
+        self.data = {} if data is None else data
+        self.groups = {}
+
+    @property
+    def materialised(self):
+        return '_objects' in self.__dict__
+
+    def index(self, key):
+        """
+        Returns the position of an object id in the arrays.
+        """
+        try:
+            i = numpy.searchsorted(self._sorted_ids, key)
+            if i < self._sorted_ids.size and self._sorted_ids[i] == key:
+                return int(self._order[i])
+        except (TypeError, ValueError):
+            pass
+        raise KeyError(key)
+
+    def indices(self, keys):
+        """
+        Returns the positions of an array of object ids.
+        """
+        keys = numpy.asarray(keys)
+        i = numpy.searchsorted(self._sorted_ids, keys).clip(
+            0, max(self._sorted_ids.size - 1, 0))
+        if self._sorted_ids.size == 0 or \
+                not (self._sorted_ids[i] == keys).all():
+            raise KeyError('Ids not found')
+        return self._order[i]
+
+    def _get_index(self, i):
+        obj = self._created.get(i)
+        if obj is None:
+            obj = self._create(self, i)
+            self._created[i] = obj
+        return obj
+
+    def _clone(self, clone_object, finalise=None):
+        """
+        Returns a copy of the list with its own copy of the arrays,
+        where the created objects are replaced by ``clone_object(obj)``
+        and the other objects are created as clones when they are
+        accessed, so no objects are created in this list. A list whose
+        objects have all been created is cloned as an ``ObjectList``.
+        """
+        if self.materialised:
+            return ObjectList._clone(self, clone_object, finalise)
+        objlist = ArrayObjectList.__new__(ArrayObjectList)
+        objlist._ids = self._ids.copy()
+        objlist._order = self._order.copy()
+        objlist._sorted_ids = self._sorted_ids.copy()
+        create = self._create
+        objlist._create = lambda objlist, i: clone_object(create(objlist, i))
+        objlist._created = dict([
+            (i, clone_object(obj)) for i, obj in self._created.items()])
+        clones = dict([(id(obj), objlist._created[i])
+                       for i, obj in self._created.items()])
+        objlist.data = dict([
+            (key, value.copy() if isinstance(value, numpy.ndarray) else value)
+            for key, value in self.data.items()])
+        objlist.groups = dict([
+            (key, [clones[id(obj)] for obj in objs])
+            for key, objs in self.groups.items()])
+        objlist.group_version = self.group_version
+        return objlist
+
+    def _materialise(self):
+        self._objects = [self._get_index(i) for i in range(self._ids.size)]
+        self._object_ids = dict(zip(self._ids.tolist(), self._objects))
+        self._id_counter = 0
+
+    def __getattr__(self, name):
+        if name in ['_objects', '_object_ids', '_id_counter'] \
+                and '_ids' in self.__dict__:
+            self._materialise()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def size(self):
+        if self.materialised:
+            return ObjectList.size(self)
+        return self._ids.size
+
+    @property
+    def ids(self):
+        return self.keys()
+
+    def keys(self):
+        if self.materialised:
+            return ObjectList.keys(self)
+        return self._ids.tolist()
+
+    def __contains__(self, item):
+        if self.materialised:
+            return ObjectList.__contains__(self, item)
+        try:
+            self.index(item)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, keys):
+        if self.materialised:
+            return ObjectList.__getitem__(self, keys)
+        if isinstance(keys, list):
+            return [self._get_index(self.index(key)) for key in keys]
+        return self._get_index(self.index(keys))
+
+    def __iter__(self):
+        if self.materialised:
+            return ObjectList.__iter__(self)
+        return (self._get_index(i) for i in range(self._ids.size))
+
+
+class DeferredObjectList(ObjectList):
+    """
+    An ``ObjectList`` which is filled by ``populate(objlist)`` when it
+    is first used, e.g., the faces of a loaded mesh are only created if
+    they are needed.
+    """
+
+    def __init__(self, populate):
+        self._populate = populate
+
+    def __getattr__(self, name):
+        if name in ['_objects', '_object_ids', '_id_counter', 'groups'] \
+                and '_populate' in self.__dict__:
+            populate = self.__dict__.pop('_populate')
+            ObjectList.__init__(self)
+            populate(self)
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+
+def is_array_backed(objlist):
+    """
+    Returns True if the objects of the list are only described by
+    arrays, i.e., an ``ArrayObjectList`` whose objects have not all
+    been created.
+    """
+    return isinstance(objlist, ArrayObjectList) and not objlist.materialised
+
+
 class Core(object):
     
     def __init__(self):
@@ -269,6 +869,8 @@ class Core(object):
         self.fixed = numpy.array([])
         self.idx_unfixed = []
         self.variable_ids = []
+        self._face_weights = {}
+        self._edge_weights = {}
         
         self.gauss_points = {}
         self.gauss_points[2] = [
@@ -284,6 +886,24 @@ class Core(object):
         self.gauss_points[6] = [numpy.array([[0.8306046932331322, 0.1693953067668678, 0.3806904069584016, 0.6193095930415985, 0.0337652428984240, 0.9662347571015760]]).T,
                 numpy.array([0.1803807865240693, 0.1803807865240693, 0.2339569672863455, 0.2339569672863455, 0.0856622461895852, 0.0856622461895852])]
 
+    def _clone(self):
+        '''
+        Returns a copy of the core with its own parameters, ``P``, and
+        fixed flags. The element and dependent node maps are shared
+        since they are replaced, not modified, when a mesh is
+        regenerated, while the PCA map is copied since PCA nodes are
+        appended to it.
+        '''
+        clone = Core.__new__(Core)
+        clone.__dict__.update(self.__dict__)
+        clone.P = self.P.copy()
+        clone.fixed = self.fixed.copy()
+        clone.PCAMap = [list(pcamap) for pcamap in self.PCAMap]
+        clone.ParamMap = [list(pmap) for pmap in self.ParamMap]
+        clone.idx_unfixed = list(self.idx_unfixed)
+        clone.variable_ids = list(self.variable_ids)
+        return clone
+
     def add_params(self, params):
         i0 = self.P.size
         self.P = numpy.append(self.P, params)
@@ -300,6 +920,48 @@ class Core(object):
         self.P[cids] = params
         return True
         
+    def compact(self, keep):
+        '''
+        Removes the parameters not in ``keep``, a boolean mask or the
+        indices of the parameters to keep, and renumbers the remaining
+        parameters in order. The fixed flags, variables and parameter
+        maps are renumbered, and maps using a removed parameter are
+        dropped. The element, dependent node and PCA maps are cleared
+        and have to be regenerated from the mesh.
+
+        Returns the new index of each old parameter, -1 for the
+        removed parameters.
+        '''
+        keep = numpy.asarray(keep)
+        if keep.dtype == bool:
+            mask = keep.copy()
+        else:
+            mask = numpy.zeros(self.P.size, dtype=bool)
+            mask[keep.astype(int)] = True
+        cid_map = -numpy.ones(self.P.size, dtype=int)
+        cid_map[mask] = numpy.arange(mask.sum())
+
+        self.P = self.P[mask]
+        self.fixed = self.fixed[mask]
+        self.variable_ids = [
+            int(cid_map[cid]) for cid in self.variable_ids if mask[cid]]
+        if len(self.idx_unfixed) > 0:
+            self.generate_fixed_index()
+
+        src = numpy.array(self.ParamMap[0], dtype=int)
+        dst = numpy.array(self.ParamMap[1], dtype=int)
+        used = mask[src] & mask[dst]
+        self.ParamMap = [
+            cid_map[src[used]].tolist(), cid_map[dst[used]].tolist(),
+            [scale for scale, u in zip(self.ParamMap[2], used) if u]]
+        self.has_maps = len(self.ParamMap[0]) > 0
+
+        self.EFn = []
+        self.EMap = []
+        self.DNMap = []
+        self.PCAMap = []
+        return cid_map
+
     def fix_parameters(self, cids, fixed):
         self.fixed[cids] = fixed
     
@@ -359,18 +1021,45 @@ class Core(object):
         raise Exception('Invalid number of gauss points')
 
     def generate_element_map(self, mesh):
+        if is_array_backed(mesh.elements) and is_array_backed(mesh.nodes):
+            return self.generate_array_element_map(mesh)
         self.EFn = []
         self.EMap = []
         cid = 0
         for elem in mesh.elements:
             self.debug('Generating Element Map for %s' % (str(elem.id)))
             self.EFn.append(elem.basis)
-            self.EMap.append(elem._get_param_indicies())
+            self.EMap.append(elem._param_index_array())
             elem.set_core_id(cid)
             cid += 1
     
+    def generate_array_element_map(self, mesh):
+        '''
+        Generates the element maps directly from the element
+        connectivity and node parameter arrays of array-backed meshes,
+        see ``ArrayObjectList``, without creating the element and node
+        objects. The core id of an element is its position in the
+        arrays and ``EMap`` is a single integer array.
+        '''
+        elements, nodes = mesh.elements, mesh.nodes
+        conn = nodes.indices(elements.data['node_ids'])
+        p0 = nodes.data['p0'][conn]
+        shape = nodes.data['shape']
+        num_fields = shape[0]
+        num_components = 1 if len(shape) == 1 else shape[1]
+        PI = (p0[:, None, :, None] +
+              num_components * numpy.arange(num_fields)[None, :, None, None] +
+              numpy.arange(num_components)[None, None, None, :])
+        self.EMap = PI.reshape((conn.shape[0], num_fields, -1))
+        self.EFn = [elements.data['basis']] * conn.shape[0]
+        for cid, elem in elements._created.items():
+            elem.set_core_id(cid)
+
     def generate_dependent_node_map(self, mesh):
         self.DNMap = []
+        if is_array_backed(mesh.nodes):
+            # array-backed nodes are standard nodes
+            return
         for node in mesh.nodes:
             if node._type == 'dependent':
                 elem = node.mesh.elements[node.element]
@@ -393,7 +1082,7 @@ class Core(object):
             if len(shape) == 1:
                 Phi = interpolator.weights(self.EFn[cid], xi)
                 for i in range(num_fields):
-                    self.P[dn_cids[i]] = numpy.dot(Phi, self.P[self.EMap[cid][i]])
+                    self.P[dn_cids[i]] = numpy.dot(Phi, self.P[self.EMap[cid][i]]).item()
             elif len(shape) == 2:
                 components = shape[1]
                 Phi = [interpolator.weights(self.EFn[cid], xi)]
@@ -408,7 +1097,7 @@ class Core(object):
                     scale = numpy.ones((shape[1]))
                 for i in range(num_fields):
                     for j, phi in enumerate(Phi):
-                        self.P[dn_cids[comp_idx]] = scale[j] * numpy.dot(phi, self.P[self.EMap[cid][i]])
+                        self.P[dn_cids[comp_idx]] = scale[j] * numpy.dot(phi, self.P[self.EMap[cid][i]]).item()
                         comp_idx += 1
 
     def add_pca_node(self, pca_node):
@@ -472,6 +1161,188 @@ class Core(object):
             X[:, i] = numpy.dot(Phi, self.P[self.EMap[cid][field[0]]])
         return X
 
+    def element_param_indices(self, cids):
+        '''
+        Returns the parameter indices of the elements as an array of
+        size ``(num_elements, num_fields, num_element_params)``. The
+        elements must have the same basis.
+        '''
+        if isinstance(self.EMap, numpy.ndarray):
+            return self.EMap[numpy.asarray(cids, dtype=int)]
+        return numpy.array([self.EMap[cid] for cid in cids], dtype=int)
+
+    def group_by_basis(self, cids):
+        '''
+        Groups the elements by basis. Returns a list of ``(basis,
+        index)`` where ``index`` are the positions in ``cids`` of the
+        elements using that basis.
+        '''
+        groups = {}
+        for idx, cid in enumerate(cids):
+            key = tuple(self.EFn[cid])
+            if key not in groups:
+                groups[key] = []
+            groups[key].append(idx)
+        return [(list(basis), numpy.array(idx, dtype=int))
+                for basis, idx in groups.items()]
+
+    def _weights_coo(self, points, PI, Phi):
+        '''
+        Returns the (rows, cols, values) of the sparse weights for a
+        group of elements. ``points`` is the ``(num_elements, num_xi)``
+        point index of each evaluation, ``PI`` the element parameter
+        indices and ``Phi`` the ``(num_elements or 1, num_xi,
+        num_element_params)`` basis weights.
+        '''
+        num_fields = PI.shape[1]
+        shape = (points.shape[0], points.shape[1], num_fields, PI.shape[2])
+        rows = points[:, :, None] * num_fields + numpy.arange(num_fields)
+        rows = numpy.broadcast_to(rows[:, :, :, None], shape)
+        cols = numpy.broadcast_to(PI[:, None, :, :], shape)
+        vals = numpy.broadcast_to(Phi[:, :, None, :], shape)
+        return rows.ravel(), cols.ravel(), vals.ravel()
+
+    def _weights_csr(self, coo, num_rows):
+        rows = numpy.concatenate([c[0] for c in coo])
+        cols = numpy.concatenate([c[1] for c in coo])
+        vals = numpy.concatenate([c[2] for c in coo])
+        return scipy.sparse.csr_matrix(
+            (vals, (rows, cols)), shape=(num_rows, self.P.size))
+
+    def weights_matrix(self, cids, xi, deriv=None):
+        '''
+        Generates a sparse matrix, ``A``, which evaluates the fields
+        at a set of element points directly from the parameters, i.e.,
+
+            X = A.dot(core.P).reshape((num_points, num_fields))
+
+        where point ``i`` is at ``xi[i]`` on the element with core id
+        ``cids[i]``. Points can be spread over elements with different
+        basis but the elements must have the same number of fields.
+        '''
+        cids = numpy.asarray(cids, dtype=int)
+        xi = numpy.asarray(xi, dtype=float)
+        if xi.ndim == 1:
+            xi = xi.reshape((xi.size, 1))
+        num_fields = len(self.EMap[cids[0]])
+        coo = []
+        for basis, idx in self.group_by_basis(cids):
+            Phi = interpolator.weights(basis, xi[idx], deriv=deriv)
+            coo.append(self._weights_coo(
+                idx[:, None], self.element_param_indices(cids[idx]),
+                Phi[:, None, :]))
+        return self._weights_csr(coo, cids.size * num_fields)
+
+    def grid_weights_matrix(self, cids, xi, deriv=None, offsets=None,
+                            num_points=None):
+        '''
+        Generates a sparse matrix which evaluates every element in
+        ``cids`` at all the ``xi`` points. The basis weights are
+        computed once for each basis. By default the points of element
+        ``j`` are stored from row ``j * num_xi``, which can be
+        overridden by giving the first point index of each element in
+        ``offsets``.
+        '''
+        cids = numpy.asarray(cids, dtype=int)
+        xi = numpy.asarray(xi, dtype=float)
+        if xi.ndim == 1:
+            xi = xi.reshape((xi.size, 1))
+        num_xi = xi.shape[0]
+        if offsets is None:
+            offsets = num_xi * numpy.arange(cids.size)
+        offsets = numpy.asarray(offsets, dtype=int)
+        if num_points is None:
+            num_points = cids.size * num_xi
+        num_fields = len(self.EMap[cids[0]])
+        coo = []
+        for basis, idx in self.group_by_basis(cids):
+            Phi = interpolator.weights(basis, xi, deriv=deriv)
+            points = offsets[idx][:, None] + numpy.arange(num_xi)
+            coo.append(self._weights_coo(
+                points, self.element_param_indices(cids[idx]),
+                Phi[None, :, :]))
+        return self._weights_csr(coo, num_points * num_fields)
+
+    def face_weights(self, basis, face_index, res):
+        '''
+        Returns the basis weights on a regular xi grid over a face of an
+        element. For 2D elements the face is the element and the
+        triangle or quad grid is used. For 3D elements the quad grid is
+        mapped onto the face ``face_index``. The weights are cached for
+        each (basis, face_index, res).
+        '''
+        dims = dimensions(basis)
+        if dims == 2:
+            face_index = None
+        key = (tuple(basis), face_index, res)
+        if key not in self._face_weights:
+            if dims == 2:
+                shape = 'tri' if basis[0][0] == 'T' else 'quad'
+                xi = discretizer.xi_grid(shape=shape, res=res)[0]
+            elif dims == 3:
+                xi = face_xi(face_index,
+                             discretizer.xi_grid(shape='quad', res=res)[0])
+            else:
+                raise ValueError('Faces are only defined for 2D and 3D elements')
+            self._face_weights[key] = interpolator.weights(basis, xi)
+        return self._face_weights[key]
+
+    def face_weights_matrix(self, cids, face_indices, res, offsets, num_points):
+        '''
+        Generates a sparse matrix which evaluates the faces of elements
+        on a regular xi grid, see ``face_weights``. The points of face
+        ``j`` are stored from point index ``offsets[j]``. The faces are
+        grouped by basis and face index so the weights are assembled in
+        a few batches.
+        '''
+        return self._grouped_weights_matrix(
+            cids, face_indices, offsets, num_points,
+            lambda basis, face_index: self.face_weights(basis, face_index, res))
+
+    def edge_weights(self, basis, edge_index, res):
+        '''
+        Returns the basis weights at ``res`` evenly spaced points along
+        an edge of an element, see ``element_edges``. The weights are
+        cached for each (basis, edge_index, res).
+        '''
+        key = (tuple(basis), edge_index, res)
+        if key not in self._edge_weights:
+            xi = edge_xi(edge_index, numpy.linspace(0, 1, res),
+                         dimensions(basis))
+            self._edge_weights[key] = interpolator.weights(basis, xi)
+        return self._edge_weights[key]
+
+    def edge_weights_matrix(self, cids, edge_indices, res, offsets, num_points):
+        '''
+        Generates a sparse matrix which evaluates edges of elements at
+        ``res`` points along each edge, see ``edge_weights``. The points
+        of edge ``j`` are stored from point index ``offsets[j]``.
+        '''
+        return self._grouped_weights_matrix(
+            cids, edge_indices, offsets, num_points,
+            lambda basis, edge_index: self.edge_weights(basis, edge_index, res))
+
+    def _grouped_weights_matrix(self, cids, local_indices, offsets,
+                                num_points, weights):
+        cids = numpy.asarray(cids, dtype=int)
+        offsets = numpy.asarray(offsets, dtype=int)
+        groups = {}
+        for idx, (cid, local_index) in enumerate(zip(cids, local_indices)):
+            key = (tuple(self.EFn[cid]), local_index)
+            if key not in groups:
+                groups[key] = []
+            groups[key].append(idx)
+        num_fields = len(self.EMap[cids[0]])
+        coo = []
+        for (basis, local_index), idx in groups.items():
+            idx = numpy.array(idx, dtype=int)
+            Phi = weights(list(basis), local_index)
+            points = offsets[idx][:, None] + numpy.arange(Phi.shape[0])
+            coo.append(self._weights_coo(
+                points, self.element_param_indices(cids[idx]),
+                Phi[None, :, :]))
+        return self._weights_csr(coo, num_points * num_fields)
+
     def debug(self, msg):
         if self.debug_on:
             print(msg)
@@ -1,8 +1,30 @@
 import os
+import re
 import numpy
 from morphic import metadata
 
 
+_PLY_TYPES = {
+    'char': 'i1', 'uchar': 'u1', 'short': 'i2', 'ushort': 'u2',
+    'int': 'i4', 'uint': 'u4', 'float': 'f4', 'double': 'f8',
+    'int8': 'i1', 'uint8': 'u1', 'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4', 'float32': 'f4', 'float64': 'f8'}
+
+_VTK_TYPES = {
+    'char': 'i1', 'unsigned_char': 'u1', 'short': 'i2',
+    'unsigned_short': 'u2', 'int': 'i4', 'unsigned_int': 'u4',
+    'long': 'i8', 'unsigned_long': 'u8', 'float': 'f4', 'double': 'f8'}
+
+
+def _read_text(fp, count, dtype=float):
+    # Reads count whitespace separated values from the current position
+    # of a file in one call.
+    values = numpy.fromfile(fp, dtype=dtype, count=count, sep=' ')
+    if values.size != count:
+        raise ValueError('Expected %d values, read %d' % (count, values.size))
+    return values
+
+
 class Data:
     
     def __init__(self, filepath=None):
@@ -19,8 +41,15 @@ class Data:
 
     def load(self, filepath):
         if os.path.exists(filepath):
-            if os.path.splitext(filepath)[1] == '.vtk':
+            ext = os.path.splitext(filepath)[1].lower()
+            if ext == '.vtk':
                 self.load_vtk(filepath)
+            elif ext == '.ply':
+                self.load_ply(filepath)
+            elif ext == '.stl':
+                self.load_stl(filepath)
+            elif ext in ['.xyz', '.pts', '.txt']:
+                self.load_xyz(filepath)
             else:
                 self.load_hdf5(filepath)
         else:
@@ -30,11 +59,128 @@ class Data:
         self.save_hdf5(filepath)
 
     def load_vtk(self, filepath):
-        fp = open(filepath, 'r')
-        for i in range(5):
-            fp.readline()  # skipping header lines
-        self.values = numpy.array([[float(x) for x in line.split()] for line in fp])
+        '''
+        Loads the points of an ASCII or binary legacy VTK file, e.g.,
+        polydata.
+        '''
+        fp = open(filepath, 'rb')
+        fp.readline()  # version
+        fp.readline()  # title
+        binary = fp.readline().strip().upper() == b'BINARY'
+        line = fp.readline()
+        while line and not line.upper().startswith(b'POINTS'):
+            line = fp.readline()
+        if not line:
+            fp.close()
+            raise ValueError('No POINTS in %s' % filepath)
+        words = line.split()
+        count = 3 * int(words[1])
+        if binary:
+            # Binary VTK data is big-endian.
+            dtype = '>' + _VTK_TYPES[words[2].decode().lower()]
+            values = numpy.fromfile(fp, dtype=dtype, count=count)
+        else:
+            values = _read_text(fp, count)
+        fp.close()
+        self.values = values.reshape((-1, 3)).astype(float)
+
+    def load_ply(self, filepath):
+        '''
+        Loads the x, y and z vertex properties of an ASCII or binary PLY
+        file.
+        '''
+        fp = open(filepath, 'rb')
+        if fp.readline().strip() != b'ply':
+            fp.close()
+            raise ValueError('%s is not a PLY file' % filepath)
+        elements = []
+        line = fp.readline()
+        while line and line.strip() != b'end_header':
+            words = line.decode().split()
+            if words[0] == 'format':
+                fmt = words[1]
+            elif words[0] == 'element':
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == 'property':
+                elements[-1][2].append((words[-1], words[1:-1]))
+            line = fp.readline()
+        if len(elements) == 0 or elements[0][0] != 'vertex':
+            fp.close()
+            raise ValueError('The first element of %s is not vertex' %
+                             filepath)
+        name, count, properties = elements[0]
+        if any(ptype[0] == 'list' for pname, ptype in properties):
+            fp.close()
+            raise ValueError('Vertex list properties are not supported')
+        names = [pname for pname, ptype in properties]
+        if fmt == 'ascii':
+            values = _read_text(fp, count * len(names)).reshape(
+                (count, len(names)))
+            values = values[:, [names.index(key) for key in 'xyz']]
+        else:
+            endian = '<' if fmt == 'binary_little_endian' else '>'
+            dtype = numpy.dtype([(pname, endian + _PLY_TYPES[ptype[0]])
+                                 for pname, ptype in properties])
+            vertices = numpy.fromfile(fp, dtype=dtype, count=count)
+            values = numpy.array([vertices[key] for key in 'xyz']).T
+        fp.close()
+        self.values = values.astype(float)
+
+    def load_stl(self, filepath):
+        '''
+        Loads the unique vertices of an ASCII or binary STL file in the
+        order they first appear. A file is read as ASCII if it starts
+        with ``solid`` and has a ``facet`` and is not exactly the size
+        of a binary STL file, otherwise it is read as binary.
+        '''
+        size = os.path.getsize(filepath)
+        with open(filepath, 'rb') as fp:
+            head = fp.read(512)
+            count = 0
+            if len(head) >= 84:
+                count = int(numpy.frombuffer(head[80:84], dtype='<u4')[0])
+            binary = size == 84 + 50 * count or not (
+                head.lstrip().startswith(b'solid') and b'facet' in head)
+            if binary:
+                if len(head) < 84 or size < 84 + 50 * count:
+                    raise ValueError('Cannot read the STL file %s' % filepath)
+                dtype = numpy.dtype([('normal', '<f4', 3),
+                                     ('vertices', '<f4', 9),
+                                     ('attribute', '<u2')])
+                fp.seek(84)
+                vertices = numpy.fromfile(fp, dtype=dtype, count=count)
+                points = vertices['vertices'].reshape((-1, 3))
+            else:
+                fp.seek(0)
+                text = fp.read().decode('ascii', errors='replace')
+                points = numpy.array(re.findall(
+                    r'vertex\s+(\S+)\s+(\S+)\s+(\S+)', text), dtype=float)
+                points = points.reshape((-1, 3))
+        # The first vertex of each run of equal vertices in a stable
+        # sort is its first occurrence.
+        order = numpy.lexsort(points.T[::-1])
+        first = numpy.ones(order.size, dtype=bool)
+        first[1:] = (numpy.diff(points[order], axis=0) != 0).any(1)
+        self.values = points[numpy.sort(order[first])].astype(float)
+
+    def load_xyz(self, filepath):
+        '''
+        Loads the first three columns of a whitespace separated point
+        file, skipping the leading lines which start with a #.
+        '''
+        fp = open(filepath, 'rb')
+        offset = 0
+        line = fp.readline()
+        while line.startswith(b'#'):
+            offset = fp.tell()
+            line = fp.readline()
+        num_columns = len(line.split())
+        fp.seek(offset)
+        values = numpy.fromfile(fp, dtype=float, sep=' ')
         fp.close()
+        if num_columns == 0 or values.size % num_columns != 0:
+            raise ValueError('Cannot read the points in %s' % filepath)
+        self.values = values.reshape((-1, num_columns))[:, :3]
 
     def load_hdf5(self, filepath):
         import tables
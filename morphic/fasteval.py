@@ -47,3 +47,86 @@ class FEMatrix(object):
             self.A[self.row_id, cid] += scalar * weight
         if self._auto_increment_row_id:
             self.next_row()
+
+
+class EmbeddedPoints(object):
+    """
+    Points embedded in the elements of a host mesh. The element and
+    xi location of each point are fixed when the points are embedded
+    and a sparse weights matrix over the mesh parameters is
+    precomputed, so deforming the points for a new set of parameters
+    is a single sparse matrix-vector product.
+
+    >>> embedding = EmbeddedPoints(mesh, element_ids, xi)
+    >>> X = embedding.evaluate()
+    >>> F = embedding.deformation_gradient(params)
+
+    The deformation gradients are relative to the parameters of the
+    mesh when the points were embedded.
+    """
+
+    def __init__(self, mesh, element_ids, xi):
+        mesh.generate()
+        self.mesh = mesh
+        self.xi = np.asarray(xi, dtype=float)
+        if self.xi.ndim == 1:
+            self.xi = self.xi.reshape((self.xi.size, 1))
+        self.num_points = self.xi.shape[0]
+        if isinstance(element_ids, (int, str, np.integer)):
+            element_ids = [element_ids] * self.num_points
+        self.element_ids = list(element_ids)
+        self.cids = np.array(
+            [mesh.elements[eid].cid for eid in self.element_ids], dtype=int)
+        self.A = mesh.core.weights_matrix(self.cids, self.xi)
+        self.num_fields = self.A.shape[0] // self.num_points
+        self.num_dims = self.xi.shape[1]
+        self.params0 = mesh.params.copy()
+        self._dA = None
+        self._invJ0 = None
+
+    def _get_params(self, params):
+        if params is None:
+            return self.mesh.params
+        return params
+
+    def evaluate(self, params=None):
+        """
+        Returns the location of the embedded points for the parameters
+        given or the current mesh parameters if ``params`` is None.
+        """
+        params = self._get_params(params)
+        return self.A.dot(params).reshape((self.num_points, self.num_fields))
+
+    def jacobian(self, params=None):
+        """
+        Returns the derivatives of the fields with respect to xi at the
+        embedded points as an array of size
+        ``(num_points, num_fields, num_dims)``.
+        """
+        if self._dA is None:
+            self._dA = []
+            for axis in range(self.num_dims):
+                deriv = [0] * self.num_dims
+                deriv[axis] = 1
+                self._dA.append(self.mesh.core.weights_matrix(
+                    self.cids, self.xi, deriv=deriv))
+        params = self._get_params(params)
+        J = np.zeros((self.num_points, self.num_fields, self.num_dims))
+        for axis, dA in enumerate(self._dA):
+            J[:, :, axis] = dA.dot(params).reshape(
+                (self.num_points, self.num_fields))
+        return J
+
+    def deformation_gradient(self, params=None):
+        """
+        Returns the deformation gradient tensors, ``F = dx/dX``, at the
+        embedded points as an array of size
+        ``(num_points, num_fields, num_fields)``, where ``X`` are the
+        locations of the points when they were embedded.
+        """
+        if self.num_fields != self.num_dims:
+            raise ValueError('Deformation gradients require the number '
+                             'of fields to equal the element dimensions')
+        if self._invJ0 is None:
+            self._invJ0 = np.linalg.inv(self.jacobian(self.params0))
+        return np.matmul(self.jacobian(params), self._invJ0)
@@ -25,6 +25,7 @@ interpolation.
 
 
 '''
+import copy
 import datetime
 import os
 import sys
@@ -38,6 +39,27 @@ from morphic import metadata
 from morphic import utils
 
 
+_SLOT_NAMES = {}
+
+
+def _shallow_copy(obj):
+    # Faster than copy.copy for the many node and element objects,
+    # which use __slots__.
+    cls = type(obj)
+    if cls not in _SLOT_NAMES:
+        names = []
+        for klass in cls.__mro__:
+            names.extend(klass.__dict__.get('__slots__', ()))
+        _SLOT_NAMES[cls] = names
+    clone = object.__new__(cls)
+    for name in _SLOT_NAMES[cls]:
+        try:
+            setattr(clone, name, getattr(obj, name))
+        except AttributeError:
+            pass
+    return clone
+
+
 class Values(numpy.ndarray):
     '''
     This is a temporary object passed to the user when setting node
@@ -78,6 +100,10 @@ class Node(object):
     This is the super-class for StdNode and DepNode.
     '''
 
+    __slots__ = ('_type', 'mesh', 'id', 'fixed', 'cids', 'num_values',
+                 'num_fields', 'num_components', 'num_modes', 'shape',
+                 '_added', '_uptodate')
+
     values = NodeValues()
 
     def __init__(self, mesh, uid):
@@ -96,6 +122,11 @@ class Node(object):
         self.mesh._regenerate = True
         self.mesh._reupdate = True
 
+    def _clone(self, mesh):
+        node = _shallow_copy(self)
+        node.mesh = mesh
+        return node
+
     def is_stdnode(self):
         return isinstance(self, StdNode)
 
@@ -147,6 +178,7 @@ class Node(object):
             groups = [groups]
         for group in groups:
             self.mesh.nodes.add_to_group(self.id, group)
+        self.mesh._index_cache = {}
 
     def set_values(self, values):
         '''
@@ -273,6 +305,8 @@ class StdNode(Node):
     .. autoclass:: morphic.mesher.Node
     '''
 
+    __slots__ = ()
+
     def __init__(self, mesh, uid, values=None, cids=None, shape=None):
         Node.__init__(self, mesh, uid)
         self._type = 'standard'
@@ -303,21 +337,24 @@ class StdNode(Node):
             7: {'axis_neighbour': [6, 5, 3], 'scale': [-1, -1, -1]},
             }
         axis_deriv_index = [1, 2, 4]
+        node_elements = self.mesh.adjacency().node_elements(self.id)
         for ax in axis:
             dx = 0
             count = 0
-            for elem in self.mesh.elements:
-                if self.id in elem.node_ids:
-                    index = elem.node_ids.index(self.id)
-                    deriv = derivs[index]
-                    dx += (deriv['scale'][ax] * (elem.nodes[deriv['axis_neighbour'][ax]].values[:, 0] - self.values[:, 0]))
-                    count += 1
+            for element_id, index in node_elements:
+                elem = self.mesh.elements[element_id]
+                deriv = derivs[index]
+                dx += (deriv['scale'][ax] * (elem.nodes[deriv['axis_neighbour'][ax]].values[:, 0] - self.values[:, 0]))
+                count += 1
             if count > 0:
                 dx /= count
                 self.values[:, axis_deriv_index[ax]] = dx
 
 
 class DepNode(Node):
+
+    __slots__ = ('element', 'node', 'scale')
+
     def __init__(self, mesh, uid, element, node, shape=None, scale=None):
         Node.__init__(self, mesh, uid)
         self._type = 'dependent'
@@ -353,6 +390,10 @@ class DepNode(Node):
 
 
 class PCANode(Node):
+
+    __slots__ = ('node_id', 'weights_id', 'variance_id', 'node', 'weights',
+                 'variance', '_pca_id')
+
     def __init__(self, mesh, uid, node_id, weights_id, variance_id):
         Node.__init__(self, mesh, uid)
         self._type = 'pca'
@@ -390,6 +431,13 @@ class PCANode(Node):
             self._pca_id = self.mesh._core.add_pca_node(self)
             self._added = self._pca_id > -1
 
+    def _bind_nodes(self):
+        for attr, nid in [('node', self.node_id),
+                          ('weights', self.weights_id),
+                          ('variance', self.variance_id)]:
+            if nid in self.mesh.nodes:
+                setattr(self, attr, self.mesh.nodes[nid])
+
     def _save_dict(self):
         node_dict = Node._save_dict(self)
         node_dict['type'] = self._type
@@ -407,6 +455,10 @@ class PCANode(Node):
 
 
 class Element(object):
+
+    __slots__ = ('_type', 'mesh', 'core', '_interp', 'basis', 'dimensions',
+                 'id', 'node_ids', 'cid', 'shape', 'num_fields')
+
     def __init__(self, mesh, uid, basis, node_ids):
         self._type = 'element'
         self.mesh = mesh
@@ -423,6 +475,12 @@ class Element(object):
         self.mesh._regenerate = True
         self.mesh._reupdate = True
 
+    def _clone(self, mesh):
+        elem = _shallow_copy(self)
+        elem.mesh = mesh
+        elem.core = mesh._core
+        return elem
+
     @property
     def interp(self):
         import traceback
@@ -489,16 +547,18 @@ class Element(object):
             # self.add_lines()
 
     def _get_param_indicies(self):
-        PI = None
-        for node in self:
-            if PI == None:
-                self.num_fields = node.num_fields
-                PI = []
-                for i in range(node.num_fields):
-                    PI.append([])
-            npi = node._get_param_indicies()
-            for i, pi in enumerate(npi):
-                PI[i].extend(pi)
+        return self._param_index_array().tolist()
+
+    def _param_index_array(self):
+        '''
+        Returns the parameter indices of the element as an integer
+        array of size ``(num_fields, num_element_params)``.
+        '''
+        nodes = self.nodes
+        self.num_fields = nodes[0].num_fields
+        PI = numpy.concatenate([
+            numpy.asarray(node.cids, dtype=int).reshape((node.shape[0], -1))
+            for node in nodes], axis=1)
         PI = self._filter_face_param_indices(PI)
         return PI
 
@@ -723,12 +783,21 @@ class Element(object):
 
 
 class Face(object):
+
+    __slots__ = ('id', 'mesh', 'element_faces', 'shape', 'node_ids')
+
     def __init__(self, mesh, uid):
         self.id = uid
         self.mesh = mesh
         self.element_faces = []
         self.shape = 'quad'
 
+    def _clone(self, mesh):
+        face = _shallow_copy(self)
+        face.mesh = mesh
+        face.element_faces = list(self.element_faces)
+        return face
+
     def add_element(self, element_id, face_index=0):
         element_face = [element_id, face_index]
         if element_face not in self.element_faces:
@@ -744,12 +813,21 @@ class Face(object):
 
 
 class Line(object):
+
+    __slots__ = ('id', 'mesh', 'element_lines', 'shape', 'node_ids')
+
     def __init__(self, mesh, uid):
         self.id = uid
         self.mesh = mesh
         self.element_lines = []
         self.shape = 'line'
 
+    def _clone(self, mesh):
+        line = _shallow_copy(self)
+        line.mesh = mesh
+        line.element_lines = list(self.element_lines)
+        return line
+
     def add_element(self, element_id, face_index=0):
         element_face = [element_id, face_index]
         if element_face not in self.element_faces:
@@ -764,6 +842,432 @@ class Line(object):
         self.node_ids = [node.id for node in nodes]
 
 
+class Tessellation(object):
+    '''
+    A triangulation of a set of 2D elements or 3D element faces at a
+    fixed resolution.
+
+    The xi grids, triangle connectivity and the sparse weights matrix
+    over the mesh parameters are computed once, so refreshing the
+    points after the mesh parameters have changed is a single sparse
+    matrix-vector product. Tessellations are cached by the mesh, see
+    ``Mesh.tessellate``.
+
+    >>> tessellation = mesh.tessellate(res=8)
+    >>> X = tessellation.evaluate()
+    >>> mesh.nodes[1].values = [0.1, 0.2, 0.3]
+    >>> X = tessellation.evaluate(X) # updates X in-place
+
+    ``face_indices`` gives the face of each element to tessellate for
+    3D elements, see ``core.element_face_nodes`` for the ordering.
+    Alternatively, ``edge_indices`` gives an edge of each element, see
+    ``core.element_edges``, which are discretised into ``res`` points
+    joined by line segments, i.e., ``T`` has two columns.
+    '''
+
+    def __init__(self, mesh, elements, res=8, face_indices=None,
+                 edge_indices=None):
+        self.mesh = mesh
+        self.res = res
+        self.edge_indices = edge_indices
+        if face_indices is None:
+            face_indices = [None] * len(elements)
+
+        patches = []
+        if edge_indices is not None:
+            for elem, edge_index in zip(elements, edge_indices):
+                patches.append((elem, edge_index, 'line'))
+        else:
+            for elem, face_index in zip(elements, face_indices):
+                if elem.shape in ['tri', 'quad']:
+                    patches.append((elem, None, elem.shape))
+                elif elem.shape == 'hexagonal' and face_index is not None:
+                    patches.append((elem, face_index, 'quad'))
+        self.element_ids = [patch[0].id for patch in patches]
+        self.face_indices = [patch[1] for patch in patches]
+
+        if edge_indices is not None:
+            xi = numpy.linspace(0, 1, res)
+            segments = numpy.array([numpy.arange(res - 1), numpy.arange(1, res)]).T
+            grids = {'line': (xi.reshape((res, 1)), segments)}
+        else:
+            grids = {
+                'tri': discretizer.xi_grid(shape='tri', res=res),
+                'quad': discretizer.xi_grid(shape='quad', res=res)}
+        xi_dims = list(grids.values())[0][0].shape[1]
+        tri_dims = list(grids.values())[0][1].shape[1]
+        shapes = numpy.array([patch[2] for patch in patches])
+        cids = numpy.array([patch[0].cid for patch in patches], dtype=int)
+        num_points = numpy.zeros(len(patches), dtype=int)
+        num_tris = numpy.zeros(len(patches), dtype=int)
+        for shape, (Xi, T) in grids.items():
+            num_points[shapes == shape] = Xi.shape[0]
+            num_tris[shapes == shape] = T.shape[0]
+        point_offsets = numpy.cumsum(num_points) - num_points
+        tri_offsets = numpy.cumsum(num_tris) - num_tris
+        self.num_points = int(num_points.sum())
+
+        self.Xi = numpy.zeros((self.num_points, xi_dims))
+        self.T = numpy.zeros((int(num_tris.sum()), tri_dims), dtype='uint32')
+        for shape, (Xi, T) in grids.items():
+            select = shapes == shape
+            if not select.any():
+                continue
+            points = point_offsets[select][:, None] + numpy.arange(Xi.shape[0])
+            self.Xi[points.ravel(), :] = numpy.tile(Xi, (select.sum(), 1))
+            tris = tri_offsets[select][:, None] + numpy.arange(T.shape[0])
+            self.T[tris.ravel(), :] = (
+                T[None, :, :] + point_offsets[select][:, None, None]).reshape(
+                (-1, tri_dims))
+
+        self.A = None
+        self.num_fields = 0
+        if self.num_points > 0 and edge_indices is not None:
+            self.A = mesh.core.edge_weights_matrix(
+                cids, edge_indices, res, point_offsets, self.num_points)
+        elif self.num_points > 0:
+            self.A = mesh.core.face_weights_matrix(
+                cids, self.face_indices, res, point_offsets, self.num_points)
+        if self.A is not None:
+            self.num_fields = self.A.shape[0] // self.num_points
+
+    def _clone(self, mesh):
+        tessellation = copy.copy(self)
+        tessellation.mesh = mesh
+        return tessellation
+
+    def evaluate(self, X=None):
+        '''
+        Evaluates the tessellation points from the current mesh
+        parameters. If ``X`` is given, the points are written into
+        it in-place, which allows viewers to update existing arrays.
+        '''
+        if self.A is None:
+            values = numpy.zeros((0, self.num_fields))
+        else:
+            # Parameters added after the tessellation was created are
+            # appended to P and are not used by these elements.
+            P = self.mesh.core.P[:self.A.shape[1]]
+            values = self.A.dot(P).reshape((self.num_points, self.num_fields))
+        if X is None:
+            return values
+        X[...] = values
+        return X
+
+
+def _bind_pca_nodes(nodes):
+    for node in nodes:
+        if node._type == 'pca':
+            node._bind_nodes()
+
+
+class FieldView(object):
+    '''
+    A bulk accessor for a component of the fields of a set of nodes,
+    e.g., the x, y, z coordinates of all nodes. The view holds the
+    ``(num_nodes, num_fields)`` array of parameter indices into
+    ``core.P`` so reading or writing the values of all nodes is a
+    single fancy-index operation. Since ``core.P`` is indexed, reads
+    return copies; write through the view to change the mesh.
+
+    >>> X = mesh.field_view()
+    >>> coordinates = X[:]
+    >>> X[:] = coordinates + [0, 0, 10]
+    >>> X[0] = [0, 0, 0] # sets the first node
+
+    ``component`` selects the node value (0) or a derivative
+    component, e.g., 1 for dx/dxi1 of cubic-Hermite nodes.
+    '''
+
+    def __init__(self, mesh, node_ids, index, component=0):
+        self.mesh = mesh
+        self.node_ids = node_ids
+        self.index = index
+        self.component = component
+
+    @property
+    def shape(self):
+        return self.index.shape
+
+    def __len__(self):
+        return self.index.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.mesh._core.P[self.index]
+        if dtype is not None:
+            values = values.astype(dtype)
+        return values
+
+    def __getitem__(self, key):
+        return self.mesh._core.P[self.index[key]]
+
+    def __setitem__(self, key, values):
+        self.mesh._core.P[self.index[key]] = values
+        self.mesh._reupdate = True
+
+
+def _remap_cids(cids, cid_map):
+    # Renumbers node parameter indices, keeping ranges as ranges.
+    if isinstance(cids, range) and len(cids) > 0:
+        start = int(cid_map[cids[0]])
+        return range(start, start + len(cids))
+    return cid_map[numpy.asarray(cids, dtype=int)].tolist()
+
+
+def _extract_id_maps(node_ids, element_ids, renumber):
+    # The maps from the ids of a mesh to the ids of an extracted mesh.
+    if renumber:
+        return (dict(zip(node_ids, range(1, len(node_ids) + 1))),
+                dict(zip(element_ids, range(1, len(element_ids) + 1))))
+    return dict(zip(node_ids, node_ids)), dict(zip(element_ids, element_ids))
+
+
+def _parse_table_ids(table):
+    # Decodes the id column of a pytables table to an array of ids.
+    ids = numpy.char.decode(table['id'], 'utf-8')
+    is_int = table['idIsInt']
+    if ids.size == 0 or is_int.all():
+        return ids.astype(int)
+    if not is_int.any():
+        return ids
+    return numpy.array([int(uid) if flag else uid for uid, flag in
+                        zip(ids.tolist(), is_int.tolist())], dtype=object)
+
+
+def _parse_table_shape(shape):
+    # Strips the trailing zeros of a node shape in a pytables table.
+    shape = shape.tolist()
+    while len(shape) > 0 and shape[-1] == 0:
+        shape.pop()
+    return shape
+
+
+def _map_params(filepath, path):
+    # Memory-maps the parameters dataset of a hdf5 file copy-on-write so
+    # only the pages that are used are read and changes are not written
+    # to the file. Returns None if the dataset is chunked or compressed.
+    import h5py
+    with h5py.File(filepath, 'r') as h5:
+        dataset = h5[path]
+        offset = dataset.id.get_offset()
+        if dataset.chunks is not None or offset is None:
+            return None
+        return numpy.memmap(filepath, dtype=dataset.dtype, mode='c',
+                            offset=offset, shape=dataset.shape)
+
+
+_NUMPY_MAGIC = b'\x93MORPHIC'
+_NUMPY_ALIGN = 64
+
+
+def _numpy_data_offset(header_size):
+    # The arrays of the numpy format start at the first aligned offset
+    # after the magic number, the header size and the header.
+    size = len(_NUMPY_MAGIC) + 8 + header_size
+    return -(-size // _NUMPY_ALIGN) * _NUMPY_ALIGN
+
+
+def _is_numpy_file(filepath):
+    with open(filepath, 'rb') as f:
+        return f.read(len(_NUMPY_MAGIC)) == _NUMPY_MAGIC
+
+
+def _write_numpy_file(filepath, attrs, arrays):
+    # Writes the numpy format: the magic number, the size of a JSON
+    # header with the attributes and the dtype, shape and offset of the
+    # arrays, and the raw arrays aligned to 64 bytes so they can be
+    # memory-mapped.
+    import json
+    arrays = [(key, numpy.ascontiguousarray(value))
+              for key, value in arrays.items()]
+    entries = {}
+    offset = 0
+    for key, value in arrays:
+        entries[key] = [value.dtype.str, list(value.shape), offset]
+        offset += -(-value.nbytes // _NUMPY_ALIGN) * _NUMPY_ALIGN
+    header = json.dumps({'attrs': attrs, 'arrays': entries}).encode('utf-8')
+    with open(filepath, 'wb') as f:
+        f.write(_NUMPY_MAGIC)
+        f.write(numpy.array(len(header), dtype='<u8').tobytes())
+        f.write(header)
+        data_offset = _numpy_data_offset(len(header))
+        for key, value in arrays:
+            f.seek(data_offset + entries[key][2])
+            f.write(value.tobytes())
+        f.truncate(data_offset + offset)
+
+
+def _read_numpy_file(filepath, mmap=False):
+    # Reads the attributes and arrays of the numpy format. The arrays
+    # are memory-mapped copy-on-write if mmap is True.
+    import json
+    arrays = {}
+    with open(filepath, 'rb') as f:
+        f.seek(len(_NUMPY_MAGIC))
+        header_size = int(numpy.frombuffer(f.read(8), dtype='<u8')[0])
+        header = json.loads(f.read(header_size).decode('utf-8'))
+        data_offset = _numpy_data_offset(header_size)
+        for key, (dtype, shape, offset) in header['arrays'].items():
+            count = int(numpy.prod(shape))
+            if count == 0:
+                arrays[key] = numpy.zeros(shape, dtype=dtype)
+            elif mmap:
+                arrays[key] = numpy.memmap(
+                    filepath, dtype=dtype, mode='c', shape=tuple(shape),
+                    offset=data_offset + offset)
+            else:
+                f.seek(data_offset + offset)
+                arrays[key] = numpy.fromfile(
+                    f, dtype=dtype, count=count).reshape(shape)
+    return header['attrs'], arrays
+
+
+def _read_rows(dataset, rows, max_gap=4096):
+    # Reads the sorted rows of a pytables or h5py dataset, or an array,
+    # with a slice per run of rows that are less than max_gap apart.
+    rows = numpy.asarray(rows, dtype=int)
+    if rows.size == 0:
+        return dataset[0:0]
+    parts = []
+    breaks = numpy.nonzero(numpy.diff(rows) > max_gap)[0] + 1
+    for run in numpy.split(rows, breaks):
+        parts.append(dataset[run[0]:run[-1] + 1][run - run[0]])
+    return numpy.concatenate(parts)
+
+
+def _range_indices(ranges):
+    # Returns the concatenated indices of [start, end] index ranges and
+    # the ranges of these indices in the result.
+    ranges = numpy.asarray(ranges, dtype=int).reshape((-1, 2))
+    sizes = ranges[:, 1] - ranges[:, 0]
+    offsets = numpy.concatenate([[0], numpy.cumsum(sizes)])
+    indices = numpy.arange(offsets[-1]) + \
+        numpy.repeat(ranges[:, 0] - offsets[:-1], sizes)
+    return indices, numpy.array([offsets[:-1], offsets[1:]]).T
+
+
+def _read_table(columns, names, ranges, rows=None):
+    # Reads the column datasets or arrays of the h5py and numpy formats,
+    # or their rows, as a structured array where the offsets are
+    # converted to the [start, end] index ranges of the pytables tables.
+    if rows is None:
+        table = dict([(key, columns[key][...]) for key in names])
+        for key, offsets in ranges.items():
+            offsets = columns[offsets][...]
+            table[key] = numpy.array([offsets[:-1], offsets[1:]]).T
+    else:
+        table = dict([(key, _read_rows(columns[key], rows))
+                      for key in names])
+        for key, offsets in ranges.items():
+            table[key] = numpy.array([
+                _read_rows(columns[offsets], rows),
+                _read_rows(columns[offsets], rows + 1)]).T
+    dtype = [(key, value.dtype, value.shape[1:])
+             for key, value in table.items()]
+    array = numpy.zeros(table['id'].shape[0], dtype=dtype)
+    for key, value in table.items():
+        array[key] = value
+    return array
+
+
+def _select_groups(table, members, rows):
+    # Returns the group table and members restricted to the sorted rows,
+    # which are renumbered by their position in rows.
+    indices, ranges = _range_indices(table['index_range'])
+    members = members[indices].astype(int)
+    pos = numpy.searchsorted(rows, members)
+    found = numpy.zeros(members.size, dtype=bool)
+    inside = pos < rows.size
+    found[inside] = rows[pos[inside]] == members[inside]
+    groups = numpy.repeat(numpy.arange(len(table)), ranges[:, 1] - ranges[:, 0])
+    counts = numpy.bincount(groups[found], minlength=len(table))
+    table = table[counts > 0].copy()
+    offsets = numpy.concatenate([[0], numpy.cumsum(counts[counts > 0])])
+    table['index_range'] = numpy.array([offsets[:-1], offsets[1:]]).T
+    return table, pos[found]
+
+
+def _select_element_groups(element_groups, params, read_nodes, read_elems,
+                           node_pids, elem_node, groups):
+    # Reads the elements in the element groups, the nodes they require
+    # and their parameters from the datasets of the pytables or h5py
+    # formats, which are read by row, and returns them renumbered as the
+    # arrays of a whole mesh for Mesh._load_arrays.
+    if not isinstance(element_groups, list):
+        element_groups = [element_groups]
+    (node_groups, node_group_ids), (elem_groups, elem_group_ids) = groups
+    indices = [numpy.arange(i0, i1) for gid, (i0, i1) in zip(
+        _parse_table_ids(elem_groups).tolist(),
+        elem_groups['index_range'].tolist()) if gid in element_groups]
+    elem_rows = numpy.unique(elem_group_ids[
+        numpy.concatenate([numpy.zeros(0, dtype=int)] + indices)])
+
+    elems = read_elems(elem_rows)
+    indices, elem_ranges = _range_indices(elems['node_ids'])
+    elem_node = _read_rows(elem_node, indices).astype(int)
+
+    # Dependent nodes require their node if their element is selected.
+    rows = numpy.unique(elem_node)
+    nodes = read_nodes(rows)
+    new = rows
+    while new.size > 0:
+        selected = nodes[numpy.isin(rows, new)]
+        if (selected['type'] == b'pca').any():
+            raise ValueError(
+                'Partial loading of meshes with PCA nodes is not supported')
+        dependent = (selected['type'] == b'dependent') & \
+            numpy.isin(selected['element_id'], elem_rows)
+        new = numpy.setdiff1d(selected['node_id'][dependent], rows)
+        if new.size > 0:
+            rows = numpy.concatenate([rows, new])
+            nodes = numpy.concatenate([nodes, read_nodes(new)])
+            order = numpy.argsort(rows)
+            rows, nodes = rows[order], nodes[order]
+
+    dependent = nodes['type'] == b'dependent'
+    hosted = dependent & numpy.isin(nodes['element_id'], elem_rows)
+    nodes['type'][dependent & ~hosted] = b'standard'
+    nodes['element_id'][hosted] = numpy.searchsorted(
+        elem_rows, nodes['element_id'][hosted])
+    nodes['node_id'][hosted] = numpy.searchsorted(
+        rows, nodes['node_id'][hosted])
+    nodes['element_id'][~hosted] = 0
+    nodes['node_id'][~hosted] = 0
+
+    indices, nodes['pids'] = _range_indices(nodes['pids'])
+    cids = _read_rows(node_pids, indices).astype(int)
+    keep = numpy.unique(cids)
+    elems['node_ids'] = elem_ranges
+
+    return (_read_rows(params, keep), nodes, numpy.searchsorted(keep, cids),
+            elems, numpy.searchsorted(rows, elem_node),
+            [_select_groups(node_groups, node_group_ids, rows),
+             _select_groups(elem_groups, elem_group_ids, elem_rows)])
+
+
+def _copy_groups(objlist, new_objlist, id_map):
+    # Copies the groups of the objects in id_map to the mapped ids.
+    for group, objs in objlist.groups.items():
+        uids = [id_map[obj.id] for obj in objs if obj.id in id_map]
+        if len(uids) > 0:
+            new_objlist.add_to_group(uids, group)
+
+
+def _create_object(mesh, cls, *args, **kwargs):
+    # Creates a node or element of an array-backed list on demand
+    # without flagging the mesh for regeneration.
+    regenerate, reupdate = mesh._regenerate, mesh._reupdate
+    obj = cls(*args, **kwargs)
+    if isinstance(obj, Node):
+        obj.num_values = int(numpy.prod(obj.shape))
+        obj.num_fields = obj.shape[0]
+        obj.num_components = 1 if len(obj.shape) == 1 else obj.shape[1]
+        obj.num_modes = obj.shape[2] if len(obj.shape) > 2 else 0
+        obj._added = True
+    mesh._regenerate, mesh._reupdate = regenerate, reupdate
+    return obj
+
+
 class Mesh(object):
     '''
     This is the top level object for a mesh which allows:
@@ -866,7 +1370,8 @@ class Mesh(object):
     
     '''
 
-    def __init__(self, filepath=None, label='/', units='m'):
+    def __init__(self, filepath=None, label='/', units='m', mmap=False,
+                 element_groups=None):
         self.debug_on = False
         self.version = 1
         self.saved_at = ""
@@ -882,6 +1387,10 @@ class Mesh(object):
         self.core = self._core
         self._regenerate = True
         self._reupdate = True
+        self._tessellations = {}
+        self._topology = None
+        self._adjacency = None
+        self._index_cache = {}
 
         self.auto_add_faces = True
         self.auto_add_lines = True
@@ -891,7 +1400,7 @@ class Mesh(object):
 
         self.filepath = filepath
         if filepath != None:
-            self.load(filepath)
+            self.load(filepath, mmap=mmap, element_groups=element_groups)
 
     @property
     def params(self):
@@ -949,6 +1458,91 @@ class Mesh(object):
         self.nodes.add(node, group=group)
         return node
 
+    def add_stdnodes(self, uids, values):
+        '''
+        Adds standard nodes in bulk. ``values`` is an array of size
+        ``(num_nodes, num_fields)`` or ``(num_nodes, num_fields,
+        num_components)`` and the parameters of all the nodes are added
+        to core at once.
+
+        If the mesh has no nodes, the nodes are stored as arrays and
+        the node objects are only created when they are accessed, see
+        ``core.ArrayObjectList``.
+
+        >>> mesh.add_stdnodes(numpy.arange(1, 101), X)
+        '''
+        values = numpy.asarray(values, dtype=float)
+        uids = numpy.asarray(uids)
+        shape = values.shape[1:]
+        num_values = int(numpy.prod(shape))
+        cids = self._core.add_params(values.ravel())
+        p0 = cids[0] + num_values * numpy.arange(values.shape[0])
+        self._regenerate = True
+        self._reupdate = True
+
+        nodes = self._array_nodes(uids, p0, shape)
+        if self.nodes.size() == 0:
+            self.nodes = nodes
+        else:
+            for node in nodes:
+                self.nodes.add(node)
+
+    def _array_nodes(self, uids, p0, shape):
+        # Standard nodes stored as arrays where the parameters of node i
+        # are p0[i]:p0[i] + prod(shape), see core.ArrayObjectList.
+        num_values = int(numpy.prod(shape))
+
+        def create(nodes, i):
+            p0 = int(nodes.data['p0'][i])
+            return _create_object(self, StdNode, self, nodes._ids[i].item(),
+                                  cids=range(p0, p0 + num_values),
+                                  shape=nodes.data['shape'])
+
+        return core.ArrayObjectList(
+            uids, create, data={'p0': p0, 'shape': shape})
+
+    def _array_elements(self, uids, basis, node_ids):
+        # Elements stored as arrays, see core.ArrayObjectList.
+        def create(elements, i):
+            elem = _create_object(self, Element, self, elements._ids[i].item(),
+                                  elements.data['basis'],
+                                  elements.data['node_ids'][i].tolist())
+            elem.cid = i
+            return elem
+
+        return core.ArrayObjectList(
+            uids, create, data={'basis': basis, 'node_ids': node_ids})
+
+    def add_elements(self, uids, basis, node_ids):
+        '''
+        Adds elements with the same basis in bulk. ``node_ids`` is an
+        array of size ``(num_elements, num_element_nodes)``.
+
+        If the mesh has no elements, the elements are stored as arrays
+        and the element objects are only created when they are
+        accessed, see ``core.ArrayObjectList``. If the nodes are also
+        array-backed, the mesh can be generated and evaluated without
+        creating any node or element objects. Faces are not added for
+        array-backed elements, use ``topology`` or ``get_faces``
+        instead.
+
+        >>> mesh.add_elements(numpy.arange(1, 51), ['L1', 'L1'], connectivity)
+        '''
+        uids = numpy.asarray(uids)
+        node_ids = numpy.asarray(node_ids)
+        if isinstance(basis, str):
+            basis = [basis]
+        self._regenerate = True
+        self._reupdate = True
+        self._topology = None
+        self._adjacency = None
+
+        if self.elements.size() == 0:
+            self.elements = self._array_elements(uids, basis, node_ids)
+        else:
+            for uid, nids in zip(uids.tolist(), node_ids.tolist()):
+                self.add_element(uid, basis, nids)
+
     def add_depnode(self, uid, element, node_id, shape=None, scale=None, group=None):
         """
         Adds a dependent node to a mesh. A dependent node is typically
@@ -1043,6 +1637,9 @@ class Mesh(object):
             basis = [basis]
         elem = Element(self, uid, basis, node_ids)
         self.elements.add(elem, group=group)
+        self._topology = None
+        if self._adjacency is not None and node_ids is not None:
+            self._adjacency.add_element(uid, node_ids)
         if self.auto_add_faces:
             elem.add_faces()
         # if self.auto_add_lines:
@@ -1068,7 +1665,11 @@ class Mesh(object):
                 sorted_nodes.append(n.decode('utf-8'))
             else:
                 sorted_nodes.append(n)
-        #sorted_nodes.sort()
+        try:
+            sorted_nodes.sort()
+        except TypeError:
+            # mixed integer and string node ids
+            sorted_nodes.sort(key=str)
         face_id = '_' + '_'.join([str(i) for i in sorted_nodes])
         if face_id not in self.faces:
             face = Face(self, face_id)
@@ -1078,6 +1679,137 @@ class Mesh(object):
         face.add_element(element, face_index)
         return face
 
+    def remove_nodes(self, uids):
+        '''
+        Removes nodes from the mesh. Nodes used by an element, a
+        dependent node or a PCA node cannot be removed. The parameters
+        of the removed nodes stay in core until the mesh is compacted,
+        see ``compact``.
+
+        >>> mesh.remove_nodes([5, 6])
+        >>> cid_map = mesh.compact()
+        '''
+        if not isinstance(uids, list):
+            uids = [uids]
+        removed = set(uids)
+        adjacency = self.adjacency()
+        used = [uid for uid in uids if uid in adjacency.node_index]
+        if not core.is_array_backed(self.nodes):
+            for node in self.nodes:
+                if node._type == 'dependent' and node.node in removed:
+                    used.append(node.node)
+                elif node._type == 'pca':
+                    used.extend([nid for nid in [
+                        node.node_id, node.weights_id, node.variance_id]
+                        if nid in removed])
+        if len(used) > 0:
+            raise ValueError('Cannot remove nodes in use: %s' %
+                             str(sorted(set(used), key=str)))
+        self.nodes.remove_ids(uids)
+        self._regenerate = True
+        self._index_cache = {}
+
+    def remove_elements(self, uids, remove_nodes=False):
+        '''
+        Removes elements, and their faces, from the mesh. Elements used
+        by a dependent node cannot be removed. If ``remove_nodes`` is
+        True, the nodes of the removed elements which are no longer
+        used are also removed.
+        '''
+        if not isinstance(uids, list):
+            uids = [uids]
+        removed = set(uids)
+        if not core.is_array_backed(self.nodes):
+            used = [node.element for node in self.nodes
+                    if node._type == 'dependent' and node.element in removed]
+            if len(used) > 0:
+                raise ValueError('Cannot remove elements in use: %s' %
+                                 str(sorted(set(used), key=str)))
+        node_ids = []
+        if remove_nodes:
+            for elem in self.elements[uids]:
+                node_ids.extend(elem.node_ids)
+        self.elements.remove_ids(uids)
+
+        for objlist, attr in [(self.faces, 'element_faces'),
+                              (self.lines, 'element_lines')]:
+            unused = []
+            for obj in objlist:
+                entries = [entry for entry in getattr(obj, attr)
+                           if entry[0] not in removed]
+                setattr(obj, attr, entries)
+                if len(entries) == 0:
+                    unused.append(obj.id)
+            objlist.remove_ids(unused)
+
+        self._regenerate = True
+        self._topology = None
+        self._adjacency = None
+        self._index_cache = {}
+        if remove_nodes:
+            adjacency = self.adjacency()
+            self.remove_nodes([
+                nid for nid in dict.fromkeys(node_ids)
+                if nid not in adjacency.node_index])
+
+    def compact(self):
+        '''
+        Removes the parameters in core which are no longer used by a
+        node, e.g., after removing nodes, and renumbers the parameters
+        of the nodes. The element, dependent node, PCA and parameter
+        maps are rebuilt in bulk.
+
+        Returns the new parameter index of each old parameter index,
+        -1 for removed parameters, see ``core.Core.compact``.
+        '''
+        keep = numpy.zeros(self._core.P.size, dtype=bool)
+        array_backed = core.is_array_backed(self.nodes)
+        if array_backed:
+            p0 = self.nodes.data['p0']
+            num_values = int(numpy.prod(self.nodes.data['shape']))
+            keep[(p0[:, None] + numpy.arange(num_values)).ravel()] = True
+            nodes = self.nodes._created.values()
+        else:
+            nodes = self.nodes
+            for node in nodes:
+                if node.cids is not None:
+                    keep[list(node.cids)] = True
+
+        cid_map = self._core.compact(keep)
+        if array_backed:
+            self.nodes.data['p0'] = cid_map[p0]
+        for node in nodes:
+            if node.cids is not None:
+                node.cids = _remap_cids(node.cids, cid_map)
+        if not array_backed:
+            for node in nodes:
+                if node._type == 'pca' and node._added:
+                    node._pca_id = self._core.add_pca_node(node)
+
+        self._tessellations = {}
+        self.generate(force=True)
+        return cid_map
+
+    def topology(self):
+        '''
+        Returns the face and edge topology of the mesh elements, see
+        ``core.Topology``. The topology is built from the element
+        connectivity in bulk and cached until the mesh is regenerated.
+        '''
+        if self._topology is None:
+            self._topology = core.Topology(self.elements)
+        return self._topology
+
+    def adjacency(self):
+        '''
+        Returns the node to (element, local node index) index of the
+        mesh, see ``core.NodeAdjacency``. The index is built in bulk
+        when the mesh is generated and updated as elements are added.
+        '''
+        if self._adjacency is None:
+            self._adjacency = core.NodeAdjacency(self.elements)
+        return self._adjacency
+
     def groups(self, group_type=None):
         if group_type == None:
             return {
@@ -1111,13 +1843,20 @@ class Mesh(object):
         mesh_dict['values'] = self._core.P
         return mesh_dict
 
-    def save(self, filepath=None, format='pytables'):
+    def save(self, filepath=None, format='pytables', compress_params=True):
         '''
         Saves a mesh.
         
         >>> mesh = Mesh()
         >>> mesh.save('data/cube.mesh')
         
+        The parameters of the pytables and h5py formats are compressed
+        unless ``compress_params=False``, which stores them contiguously
+        so they can be memory-mapped when loaded, see ``load``.
+
+        The numpy format is a header followed by the uncompressed
+        arrays of the h5py format. It only requires numpy, is the
+        fastest to save and load, and is always memory-mappable.
         '''
         if filepath is None:
             filepath = self.filepath
@@ -1126,15 +1865,18 @@ class Mesh(object):
             import pickle
 
             mesh_dict = self._save_dict()
-            pickle.dump(mesh_dict, open(filepath, "w"))
+            with open(filepath, 'wb') as f:
+                pickle.dump(mesh_dict, f)
         elif format == 'pytables':
-            self._save_pytables(filepath)
+            self._save_pytables(filepath, compress_params)
         elif format == 'h5py':
-            self._save_h5py(filepath)
+            self._save_h5py(filepath, compress_params)
+        elif format == 'numpy':
+            self._save_numpy(filepath)
         else:
             raise Exception('Unknown save format ' % format)
 
-    def load(self, filepath):
+    def load(self, filepath, mmap=False, element_groups=None):
         '''
         Loads a mesh.
         
@@ -1145,20 +1887,48 @@ class Mesh(object):
         >>> mesh = Mesh()
         >>> mesh.load('../test/data/cube.mesh')
         
+        The format is detected from the file, where the numpy format is
+        loaded without importing pytables or h5py.
+
+        With ``mmap=True`` the parameters of a pytables or h5py mesh
+        saved with ``compress_params=False`` are memory-mapped
+        copy-on-write, so only the parameters used are read from the
+        file and changing them does not change the file. Compressed
+        parameters are read as usual. The parameters of the numpy
+        format are always memory-mapped. Only the parameters are
+        memory-mapped, the node, element and group tables are read
+        into memory.
+
+        ``element_groups`` loads only the elements in the element
+        groups, the nodes they require and the parameters of these
+        nodes from a pytables, h5py or numpy mesh. Only these rows of the node
+        and element tables are read. Dependent nodes whose element is
+        not loaded become standard nodes with their saved values.
+
+        >>> mesh = Mesh('../test/data/cube.mesh', element_groups=['lv'])
         '''
+        if _is_numpy_file(filepath):
+            self._load_numpy(filepath, mmap, element_groups)
+            self.generate(True)
+            return
+
         import pickle
         import tables
 
         if tables.is_hdf5_file(filepath):
             if tables.is_pytables_file(filepath):
-                self._load_pytables(filepath)
+                self._load_pytables(filepath, mmap, element_groups)
             else:
-                self._load_h5py(filepath)
+                self._load_h5py(filepath, mmap, element_groups)
+        elif element_groups is not None:
+            raise ValueError('Partial loading is not supported by the '
+                             'pickle format')
         else:
-            self._load_dict(pickle.load(open(filepath, "r")))
+            with open(filepath, 'rb') as f:
+                self._load_dict(pickle.load(f))
         self.generate(True)
 
-    def _save_pytables(self, filepath):
+    def _save_pytables(self, filepath, compress_params=True):
         import tables
 
         nodemap = {}
@@ -1203,8 +1973,11 @@ class Mesh(object):
         metadata_node = h5f.create_group(h5f.root, 'metadata')
         self.metadata.save_pytables(metadata_node)
 
-        params = h5f.create_carray(h5f.root, 'params', tables.Float64Atom(), self.params.shape, filters=filters)
-        params[:] = self.params
+        if compress_params:
+            params = h5f.create_carray(h5f.root, 'params', tables.Float64Atom(), self.params.shape, filters=filters)
+            params[:] = self.params
+        else:
+            h5f.create_array(h5f.root, 'params', self.params)
 
         table = h5f.create_table(h5f.root, 'nodes', NodeAtom, 'Mesh nodes', filters=filters)
         row = table.row
@@ -1297,7 +2070,7 @@ class Mesh(object):
 
         h5f.close()
 
-    def _load_pytables(self, filepath):
+    def _load_pytables(self, filepath, mmap=False, element_groups=None):
         import tables
 
         def get_attribute(h5node, key, default=None):
@@ -1340,62 +2113,130 @@ class Mesh(object):
         if 'metadata' in h5f.root:
             self.metadata.load_pytables(h5f.root.metadata)
 
-        nodemap = {}
-        for nn, h5node in enumerate(h5f.root.nodes.iterrows()):
-            nodemap[nn] = parse_id(h5node)
+        # The tables are read as whole structured arrays, or by row for
+        # the elements in element_groups.
+        params = None
+        if mmap:
+            params = _map_params(filepath, '/params')
+        if params is None:
+            params = h5f.root.params
+        groups = [
+            (h5f.root.node_groups.read(), h5f.root.node_group_ids.read()),
+            (h5f.root.element_groups.read(),
+             h5f.root.element_group_ids.read())]
+        if element_groups is None:
+            self._load_arrays(
+                params[:], h5f.root.nodes.read(), h5f.root.node_pids.read(),
+                h5f.root.elements.read(), h5f.root.element_nodes.read(),
+                groups)
+        else:
+            self._load_arrays(*_select_element_groups(
+                element_groups, params,
+                lambda rows: _read_rows(h5f.root.nodes, rows),
+                lambda rows: _read_rows(h5f.root.elements, rows),
+                h5f.root.node_pids, h5f.root.element_nodes, groups))
 
-        elemmap = {}
-        for ne, h5elem in enumerate(h5f.root.elements.iterrows()):
-            elemmap[ne] = parse_id(h5elem)
-
-        node_pids = h5f.root.node_pids.read()
-        # print h5f.root.params.read()
-        for nn, h5node in enumerate(h5f.root.nodes.iterrows()):
-            node_id = parse_id(h5node)
-
-            if h5node['type'].decode() == 'standard':
-                values = numpy.zeros(parse_shape(h5node))
-                node = StdNode(self, node_id, values)
-                node.cids = node_pids[h5node['pids'][0]:h5node['pids'][1]]
-                self.nodes.add(node)
+        h5f.close()
 
-            elif h5node['type'].decode() == 'dependent':
-                node = DepNode(self, node_id,
-                               elemmap[h5node['element_id']], nodemap[h5node['node_id']])
-                node.shape = parse_shape(h5node)
-                node.cids = node_pids[h5node['pids'][0]:h5node['pids'][1]]
+    def _load_arrays(self, params, h5nodes, node_pids, h5elems, elem_node,
+                     groups):
+        # Builds the mesh from the node, element and group tables of the
+        # pytables format read as structured arrays. Meshes of standard
+        # nodes with the same shape and elements with the same basis are
+        # stored as arrays, see core.ArrayObjectList. The element faces
+        # are only created when the faces are used.
+        node_ids = _parse_table_ids(h5nodes)
+        elem_ids = _parse_table_ids(h5elems)
+        node_types = numpy.char.decode(h5nodes['type'], 'utf-8')
+        shapes = h5nodes['shape']
+        pids = h5nodes['pids']
+        bases = numpy.char.decode(h5elems['basis'], 'utf-8')
+        enids = h5elems['node_ids']
+
+        num_values = pids[:, 1] - pids[:, 0]
+        std_nodes = node_ids.size > 0 and node_ids.dtype != object and \
+            (node_types == 'standard').all() and (shapes == shapes[0]).all()
+        if std_nodes:
+            cids = node_pids[pids[:, :1] + numpy.arange(num_values[0])]
+            std_nodes = (cids == cids[:, :1] +
+                         numpy.arange(num_values[0])).all()
+        std_elems = elem_ids.size > 0 and elem_ids.dtype != object and \
+            (bases == bases[0]).all() and \
+            (enids[:, 1] - enids[:, 0] == enids[0, 1] - enids[0, 0]).all()
+
+        self._core.P = params
+        self._core.fixed = numpy.zeros(params.size, dtype=bool)
+        if std_nodes:
+            self.nodes = self._array_nodes(
+                node_ids, cids[:, 0], tuple(_parse_table_shape(shapes[0])))
+        else:
+            self._load_node_objects(
+                node_ids.tolist(), elem_ids.tolist(), h5nodes, node_types,
+                node_pids)
+
+        if std_elems:
+            num_nodes = enids[0, 1] - enids[0, 0]
+            conn = node_ids[
+                elem_node[enids[:, :1] + numpy.arange(num_nodes)]]
+            self.elements = self._array_elements(
+                elem_ids, bases[0].split(' '), conn)
+        else:
+            for uid, basis, (i0, i1) in zip(
+                    elem_ids.tolist(), bases.tolist(), enids.tolist()):
+                self.elements.add(Element(
+                    self, uid, basis.split(' '),
+                    node_ids[elem_node[i0:i1]].tolist()))
+        self._topology = None
+        self._adjacency = None
+        self.faces = core.DeferredObjectList(self._add_element_faces)
+
+        for objlist, ids, (h5groups, group_ids) in zip(
+                [self.nodes, self.elements], [node_ids, elem_ids], groups):
+            for gid, (i0, i1) in zip(_parse_table_ids(h5groups).tolist(),
+                                     h5groups['index_range'].tolist()):
+                objlist.add_to_group(ids[group_ids[i0:i1]].tolist(), gid)
+
+    def _load_node_objects(self, node_ids, elem_ids, h5nodes, node_types,
+                           node_pids):
+        # The parameters of PCA nodes are not stored in the node table,
+        # they follow the parameters of the nodes before them.
+        offset = 0
+        for nn, node_type in enumerate(node_types.tolist()):
+            h5node = h5nodes[nn]
+            i0, i1 = h5node['pids']
+            if node_type == 'standard':
+                node = _create_object(
+                    self, StdNode, self, node_ids[nn],
+                    cids=node_pids[i0:i1],
+                    shape=tuple(_parse_table_shape(h5node['shape'])))
+                offset += node.num_values
+            elif node_type == 'dependent':
+                node = DepNode(self, node_ids[nn],
+                               elem_ids[h5node['element_id']],
+                               node_ids[h5node['node_id']])
+                node.shape = _parse_table_shape(h5node['shape'])
+                node.cids = node_pids[i0:i1]
                 node._added = True
-                self.nodes.add(node)
-
-            elif h5node['type'].decode() == 'pca':
-                node = PCANode(self, node_id, nodemap[h5node['node_id']],
-                               nodemap[h5node['weights_id']], nodemap[h5node['variance_id']])
-                self.nodes.add(node)
-
-        self._core.P = h5f.root.params.read()
-        elem_node = h5f.root.element_nodes.read()
-
-        for ne, h5elem in enumerate(h5f.root.elements.iterrows()):
-            elem_id = parse_id(h5elem)
-            self.add_element(elem_id, h5elem['basis'].decode().split(' '),
-                             [nodemap[nidx] for nidx in
-                              elem_node[h5elem['node_ids'][0]:h5elem['node_ids'][1]]])
-
-        group_ids = h5f.root.node_group_ids.read()
-        for h5group in h5f.root.node_groups.iterrows():
-            idx = h5group['index_range']
-            ids = [nodemap[nd] for nd in group_ids[idx[0]:idx[1]]]
-            self.nodes.add_to_group(ids, group=parse_id(h5group))
-
-        group_ids = h5f.root.element_group_ids.read()
-        for h5group in h5f.root.element_groups.iterrows():
-            idx = h5group['index_range']
-            ids = [elemmap[el] for el in group_ids[idx[0]:idx[1]]]
-            self.elements.add_to_group(ids, group=parse_id(h5group))
-
-        h5f.close()
+            elif node_type == 'pca':
+                num_params = self._core.P.size
+                node = PCANode(self, node_ids[nn], node_ids[h5node['node_id']],
+                               node_ids[h5node['weights_id']],
+                               node_ids[h5node['variance_id']])
+                if node._added:
+                    node.cids = range(offset, offset + node.num_values)
+                    self._core.PCAMap[node._pca_id][0] = node.cids
+                    self._core.P = self._core.P[:num_params]
+                    self._core.fixed = self._core.fixed[:num_params]
+                    offset += node.num_values
+            self.nodes.add(node)
+
+    def _add_element_faces(self, faces):
+        # Populates the deferred faces of a loaded mesh.
+        if self.auto_add_faces:
+            for elem in self.elements:
+                elem.add_faces()
 
-    def _save_h5py(self, filepath):
+    def _save_h5py(self, filepath, compress_params=True):
         import h5py
 
         def get_attribute(source, default=""):
@@ -1403,90 +2244,281 @@ class Mesh(object):
                 return default
             return source
 
-        compression = None  # 'gzip'
-        compression_opts = None  # 5
-        shuffle = False  # True
-
+        # The nodes, elements and groups are stored as a few column
+        # datasets where the variable length pids, element nodes and
+        # group members are concatenated with an offsets array. The
+        # chunks are about 1MB since the small chunks h5py picks by
+        # default compress poorly.
         compression = 'gzip'
-        compression_opts = 9
+        compression_opts = 4
         shuffle = True
+        chunk_bytes = 2 ** 20
+
+        def create_datasets(h5group, columns):
+            for key, data in columns.items():
+                data = numpy.asarray(data)
+                if data.size == 0:
+                    h5group.create_dataset(key, data=data)
+                else:
+                    row_bytes = data[:1].nbytes
+                    chunks = ((min(data.shape[0],
+                                   max(1, chunk_bytes // row_bytes)),) +
+                              data.shape[1:])
+                    h5group.create_dataset(
+                        key, data=data, chunks=chunks, compression=compression,
+                        compression_opts=compression_opts, shuffle=shuffle)
+
+        node_columns, elem_columns, group_columns = self._table_columns()
 
         h5 = h5py.File(filepath, 'w')
         h5mesh = h5.create_group('mesh')
+        h5mesh.attrs['layout'] = 2
         h5mesh.attrs['version'] = get_attribute(self.version)
         h5mesh.attrs['created_at'] = get_attribute(self.created_at)
         h5mesh.attrs['saved_at'] = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
         h5mesh.attrs['label'] = get_attribute(self.label)
         h5mesh.attrs['units'] = get_attribute(self.units)
-        # Save metadata
 
-        # Save nodes
-        h5nodes = h5mesh.create_group('nodes')
-        h5nodes.attrs['size'] = self.nodes.size()
-        nodemap = {}
-        for nid, node in enumerate(self.nodes):
-            nodemap[node.id] = nid
-            h5node = h5nodes.create_group(str(nid))
-            h5node.attrs['id'] = node.id
-            h5node.attrs['type'] = node._type
-
-            if node._type == 'standard':
-                h5node.attrs['shape'] = node.shape
-                h5node.create_dataset('pids', data=node.cids,
-                                      compression=compression, compression_opts=compression_opts, shuffle=shuffle)
-
-            elif node._type == 'dependent':
-                h5node.attrs['shape'] = node.shape
-                h5node.attrs['element_id'] = node.element
-                h5node.attrs['node_id'] = node.node
-                h5node.create_dataset('pids', data=node.cids,
-                                      compression=compression, compression_opts=compression_opts, shuffle=shuffle)
+        if compress_params:
+            create_datasets(h5mesh, {'params': self.params})
+        else:
+            h5mesh.create_dataset('params', data=self.params)
+        create_datasets(h5mesh.create_group('nodes'), node_columns)
+        create_datasets(h5mesh.create_group('elements'), elem_columns)
+        for key, columns in zip(['node_groups', 'element_groups'],
+                                group_columns):
+            create_datasets(h5mesh.create_group(key), columns)
+        self.metadata.save_h5py(h5.create_group('metadata'))
 
-            elif node._type == 'pca':
-                h5node.attrs['node_id'] = node.node_id
-                h5node.attrs['weights_id'] = node.weights_id
-                h5node.attrs['variance_id'] = node.variance_id
+        h5.close()
 
-        h5mesh.create_dataset('params', data=self.params, compression=compression, compression_opts=compression_opts,
-                              shuffle=shuffle)
+    def _table_columns(self):
+        # Returns the node, element and group columns of the mesh, with
+        # the names of the pytables tables, where nodes and elements are
+        # referenced by their position. Array-backed nodes and elements
+        # are stored without creating their objects.
+        def id_columns(ids):
+            ids = list(ids)
+            return {
+                'id': numpy.array(
+                    [str(uid).encode('utf-8') for uid in ids], dtype=bytes),
+                'idIsInt': numpy.array(
+                    [isinstance(uid, (int, numpy.integer)) for uid in ids],
+                    dtype=bool)}
+
+        def offsets(sizes):
+            return numpy.concatenate([[0], numpy.cumsum(sizes)]).astype(int)
+
+        if core.is_array_backed(self.nodes):
+            data = self.nodes.data
+            node_ids = self.nodes._ids.tolist()
+            num_nodes = len(node_ids)
+            num_values = int(numpy.prod(data['shape']))
+            types = ['standard'] * num_nodes
+            shapes = numpy.zeros((num_nodes, 3), dtype=int)
+            shapes[:, :len(data['shape'])] = data['shape']
+            refs = numpy.zeros((num_nodes, 4), dtype=int)
+            pids = (data['p0'][:, None] + numpy.arange(num_values)).ravel()
+            pid_offsets = num_values * numpy.arange(num_nodes + 1)
+        else:
+            nodes = list(self.nodes)
+            node_ids = [node.id for node in nodes]
+            num_nodes = len(node_ids)
+            nodemap = dict(zip(node_ids, range(num_nodes)))
+            elemmap = dict(zip(self.elements.ids, range(self.elements.size())))
+            types = [node._type for node in nodes]
+            shapes = numpy.zeros((num_nodes, 3), dtype=int)
+            refs = numpy.zeros((num_nodes, 4), dtype=int)
+            node_pids = []
+            for nn, node in enumerate(nodes):
+                cids = []
+                if node._type in ['standard', 'dependent']:
+                    shape = list(node.shape)
+                    shapes[nn, :len(shape)] = shape
+                    cids = list(node.cids)
+                if node._type == 'dependent':
+                    refs[nn, :2] = [elemmap[node.element], nodemap[node.node]]
+                elif node._type == 'pca':
+                    refs[nn, 1:] = [nodemap[node.node_id],
+                                    nodemap[node.weights_id],
+                                    nodemap[node.variance_id]]
+                node_pids.append(cids)
+            pids = numpy.array(
+                [cid for cids in node_pids for cid in cids], dtype=int)
+            pid_offsets = offsets([len(cids) for cids in node_pids])
+
+        node_columns = id_columns(node_ids)
+        node_columns.update({
+            'type': numpy.array(
+                [t.encode('utf-8') for t in types], dtype=bytes),
+            'shape': shapes,
+            'element_id': refs[:, 0], 'node_id': refs[:, 1],
+            'weights_id': refs[:, 2], 'variance_id': refs[:, 3],
+            'pid_offsets': pid_offsets, 'pids': pids})
+
+        nodemap = dict(zip(node_ids, range(num_nodes)))
+        if core.is_array_backed(self.elements):
+            data = self.elements.data
+            elem_ids = self.elements._ids.tolist()
+            bases = [' '.join(data['basis'])] * len(elem_ids)
+            conn = data['node_ids']
+            if core.is_array_backed(self.nodes):
+                elem_nodes = self.nodes.indices(conn).ravel()
+            else:
+                elem_nodes = numpy.array(
+                    [nodemap[nid] for nid in conn.ravel().tolist()], dtype=int)
+            node_offsets = conn.shape[1] * numpy.arange(len(elem_ids) + 1)
+        else:
+            elements = list(self.elements)
+            elem_ids = [elem.id for elem in elements]
+            bases = [' '.join(elem.basis) for elem in elements]
+            elem_nodes = numpy.array([nodemap[nid] for elem in elements
+                                      for nid in elem.node_ids], dtype=int)
+            node_offsets = offsets([len(elem.node_ids) for elem in elements])
+        elem_columns = id_columns(elem_ids)
+        elem_columns.update({
+            'basis': numpy.array(
+                [b.encode('utf-8') for b in bases], dtype=bytes),
+            'node_offsets': node_offsets, 'node_ids': elem_nodes})
+
+        elemmap = dict(zip(elem_ids, range(len(elem_ids))))
+        group_columns = []
+        for objlist, objmap in [(self.nodes, nodemap),
+                                (self.elements, elemmap)]:
+            keys = list(objlist.groups.keys())
+            members = [[objmap[obj.id] for obj in objlist.groups[key]]
+                       for key in keys]
+            columns = id_columns(keys)
+            columns.update({
+                'offsets': offsets([len(ids) for ids in members]),
+                'members': numpy.array(
+                    [idx for ids in members for idx in ids], dtype=int)})
+            group_columns.append(columns)
+
+        return node_columns, elem_columns, group_columns
+
+    def _load_h5py(self, filepath, mmap=False, element_groups=None):
+        import h5py
 
-        # Save elements
-        h5elems = h5mesh.create_group('elements')
-        h5elems.attrs['size'] = self.elements.size()
-        elemmap = {}
-        for eid, elem in enumerate(self.elements):
-            elemmap[elem.id] = eid
-            h5elem = h5elems.create_group(str(eid))
-            h5elem.attrs['id'] = elem.id
-            h5elem.attrs['type'] = elem._type
-            h5elem.attrs['basis'] = elem.basis
-            h5elem.create_dataset('node_ids',
-                                  data=[nodemap[i] for i in elem.node_ids],
-                                  compression=compression, compression_opts=compression_opts, shuffle=shuffle)
+        def get_attribute(h5node, key, default=None):
+            if key in h5node.attrs.keys():
+                return utils.bytes_to_str(h5node.attrs[key])
+            return default
 
-        # Save node groups
-        h5groups = h5mesh.create_group('node_groups')
-        h5groups.attrs['size'] = len(self.nodes.groups.keys())
-        for gid, key in enumerate(self.nodes.groups.keys()):
-            h5group = h5groups.create_group(str(gid))
-            h5group.attrs['id'] = key
-            h5group.create_dataset('node_ids',
-                                   data=[nodemap[nd.id] for nd in self.nodes.groups[key]],
-                                   compression=compression, compression_opts=compression_opts, shuffle=shuffle)
+        h5 = h5py.File(filepath, 'r')
+        h5mesh = h5['mesh']
+        if get_attribute(h5mesh, 'layout', 1) == 1:
+            h5.close()
+            if element_groups is not None:
+                raise ValueError('Partial loading is not supported by the '
+                                 'first h5py layout')
+            return self._load_h5py_groups(filepath)
 
-        # Save element groups
-        h5groups = h5mesh.create_group('element_groups')
-        h5groups.attrs['size'] = len(self.elements.groups.keys())
-        for gid, key in enumerate(self.elements.groups.keys()):
-            h5group = h5groups.create_group(str(gid))
-            h5group.attrs['id'] = key
-            h5group.create_dataset('element_ids',
-                                   data=[elemmap[el.id] for el in self.elements.groups[key]],
-                                   compression=compression, compression_opts=compression_opts, shuffle=shuffle)
+        self.version = get_attribute(h5mesh, 'version')
+        self.created_at = get_attribute(h5mesh, 'created_at')
+        self.saved_at = get_attribute(h5mesh, 'saved_at')
+        self.label = get_attribute(h5mesh, 'label')
+        self.units = get_attribute(h5mesh, 'units')
+
+        params = None
+        if mmap:
+            params = _map_params(filepath, '/mesh/params')
+        if params is None:
+            params = h5mesh['params']
+        self._load_columns(h5mesh, params, element_groups)
+        if 'metadata' in h5:
+            self.metadata.load_h5py(h5['metadata'])
 
         h5.close()
 
-    def _load_h5py(self, filepath):
+    def _save_numpy(self, filepath):
+        import json
+        import pickle
+
+        attrs = {
+            'version': self.version, 'created_at': self.created_at,
+            'saved_at': datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
+            'label': self.label, 'units': self.units}
+        for key, value in attrs.items():
+            if isinstance(value, numpy.generic):
+                attrs[key] = value.item()
+        node_columns, elem_columns, group_columns = self._table_columns()
+        arrays = {'params': self.params}
+        for prefix, columns in zip(
+                ['nodes', 'elements', 'node_groups', 'element_groups'],
+                [node_columns, elem_columns] + group_columns):
+            for key, value in columns.items():
+                arrays[prefix + '/' + key] = value
+        # The metadata is stored in the JSON header, only the values
+        # which do not survive a JSON round trip, e.g., tuples or
+        # arrays, are pickled.
+        attrs['metadata'] = {}
+        pickled = {}
+        for key, value in self.metadata.items():
+            try:
+                if json.loads(json.dumps(value)) == value:
+                    attrs['metadata'][key] = value
+                    continue
+            except (TypeError, ValueError):
+                pass
+            pickled[key] = value
+        if pickled:
+            arrays['metadata'] = numpy.frombuffer(
+                pickle.dumps(pickled), dtype=numpy.uint8)
+        _write_numpy_file(filepath, attrs, arrays)
+
+    def _load_numpy(self, filepath, mmap=False, element_groups=None):
+        attrs, arrays = _read_numpy_file(filepath, mmap)
+        self.version = attrs.get('version')
+        self.created_at = attrs.get('created_at')
+        self.saved_at = attrs.get('saved_at')
+        self.label = attrs.get('label')
+        self.units = attrs.get('units')
+
+        columns = {}
+        for key, value in arrays.items():
+            if '/' in key:
+                prefix, key = key.split('/')
+                columns.setdefault(prefix, {})[key] = value
+        self._load_columns(columns, arrays['params'], element_groups)
+        self.metadata.set_dict(attrs.get('metadata', {}))
+        if 'metadata' in arrays:
+            import pickle
+            self.metadata.set_dict(pickle.loads(arrays['metadata'].tobytes()))
+
+    def _load_columns(self, columns, params, element_groups=None):
+        # Loads the column datasets of the h5py format, or the arrays of
+        # the numpy format, which are grouped as columns['nodes'][key].
+        def read_nodes(rows=None):
+            return _read_table(
+                columns['nodes'], ['id', 'idIsInt', 'type', 'shape', 'node_id',
+                                   'element_id', 'weights_id', 'variance_id'],
+                {'pids': 'pid_offsets'}, rows)
+
+        def read_elems(rows=None):
+            return _read_table(
+                columns['elements'], ['id', 'idIsInt', 'basis'],
+                {'node_ids': 'node_offsets'}, rows)
+
+        groups = []
+        for key in ['node_groups', 'element_groups']:
+            groups.append((
+                _read_table(columns[key], ['id', 'idIsInt'],
+                            {'index_range': 'offsets'}),
+                columns[key]['members'][...]))
+        if element_groups is None:
+            self._load_arrays(
+                params[...], read_nodes(), columns['nodes']['pids'][...],
+                read_elems(), columns['elements']['node_ids'][...], groups)
+        else:
+            self._load_arrays(*_select_element_groups(
+                element_groups, params, read_nodes, read_elems,
+                columns['nodes']['pids'], columns['elements']['node_ids'],
+                groups))
+
+    def _load_h5py_groups(self, filepath):
+        # Loads the first h5py layout which stores a group per node and
+        # element.
         import h5py
 
         def get_attribute(h5node, key, default=None):
@@ -1494,7 +2526,7 @@ class Mesh(object):
                 return h5node.attrs[key]
             return default
 
-        h5 = h5py.File(filepath)
+        h5 = h5py.File(filepath, 'r')
         h5mesh = h5['mesh']
         self.version = get_attribute(h5mesh, 'version')
         self.created_at = get_attribute(h5mesh, 'created_at')
@@ -1536,7 +2568,7 @@ class Mesh(object):
         for ne in range(total_elements):
             h5elem = h5elems[str(ne)]
             elemmap[ne] = h5elem.attrs['id']
-            self.add_element(h5elem.attrs['id'], h5elem.attrs['basis'],
+            self.add_element(h5elem.attrs['id'], list(h5elem.attrs['basis']),
                              [nodemap[i] for i in h5elem['node_ids'][...]])
 
         # Load node groups
@@ -1568,7 +2600,7 @@ class Mesh(object):
         self.created_at = get_attribute(mesh_dict, 'created_at')
         self.saved_at = get_attribute(mesh_dict, 'saved_at')
         self.units = get_attribute(mesh_dict, 'units')
-        if mesh_dict.has_key('metadata'):
+        if 'metadata' in mesh_dict:
             self.metadata.set_dict(mesh_dict['metadata'])
         for node_dict in mesh_dict['nodes']:
             if node_dict['type'] == 'standard':
@@ -1599,6 +2631,14 @@ class Mesh(object):
             self._update_dependent_nodes()
             self._core.generate_element_map(self)
             self._core.generate_dependent_node_map(self)
+            self._tessellations = {}
+            self._topology = None
+            if core.is_array_backed(self.elements):
+                # built on demand, see adjacency
+                self._adjacency = None
+            else:
+                self._adjacency = core.NodeAdjacency(self.elements)
+            self._index_cache = {}
             self._regenerate = False
             self._reupdate = True
 
@@ -1622,6 +2662,8 @@ class Mesh(object):
             self._reupdate = False
 
     def _update_dependent_nodes(self):
+        if core.is_array_backed(self.nodes):
+            return
         for node in self.nodes:
             if node._type == 'dependent' and node._added == False:
                 self.debug('Updating dependent node %s' % (str(node.id)))
@@ -1716,6 +2758,196 @@ class Mesh(object):
         if update:
             self._core.update_dependent_nodes()
 
+    def smooth_derivatives(self, axis=[0, 1], nodes=None, groups=None):
+        '''
+        Smooths the derivatives of the standard nodes of the mesh, see
+        ``StdNode.smooth_derivatives``. The elements of each node are
+        found with the node adjacency index, see ``adjacency``.
+        '''
+        self.generate()
+        if nodes is not None:
+            nodes = self.nodes[nodes]
+        elif groups is not None:
+            nodes = self.nodes.get_groups(groups)
+        else:
+            nodes = self.nodes
+        for node in nodes:
+            if node._type == 'standard' and node.id in self.adjacency().node_index:
+                node.smooth_derivatives(axis=axis)
+        self._reupdate = True
+
+    def estimate_derivatives(self, elements=None, groups=None,
+                             cross_derivatives=True):
+        '''
+        Estimates the derivatives of the nodes of cubic-Hermite
+        elements from the node values. The derivatives of a node are
+        the finite differences of the node values along the edges of
+        each element using the node, averaged over the elements, as in
+        ``StdNode.smooth_derivatives``. Cross derivatives, e.g.,
+        d2x/dxi1dxi2, are estimated from the mixed differences over
+        the element faces (and volume in 3D) unless
+        ``cross_derivatives`` is False.
+
+        The differences of all elements are computed in one pass per
+        element dimension and accumulated with ``numpy.add.at``, which
+        is useful for initialising the derivatives of a Hermite mesh
+        converted from a Lagrange mesh.
+
+        >>> mesh.estimate_derivatives()
+        '''
+        self.generate()
+        if elements is not None:
+            elements = self.elements[elements]
+        elif groups is not None:
+            elements = self.elements.get_groups(groups)
+        else:
+            elements = self.elements
+
+        batches = {}
+        for elem in elements:
+            dims = len(elem.basis)
+            if elem.basis == ['H3'] * dims and len(elem.node_ids) == 2 ** dims:
+                if dims not in batches:
+                    batches[dims] = []
+                batches[dims].append(elem.node_ids)
+        if len(batches) == 0:
+            return
+
+        node_ids = []
+        for connectivity in batches.values():
+            for nids in connectivity:
+                node_ids.extend(nids)
+        node_ids = list(dict.fromkeys(node_ids))
+        node_index = dict(zip(node_ids, range(len(node_ids))))
+        nodes = self.nodes[node_ids]
+        num_components = numpy.array([
+            node.num_values // node.num_fields for node in nodes])
+        num_fields = nodes[0].num_fields
+        value_cids = numpy.array([node.cids[::nc] for node, nc in zip(
+            nodes, num_components)], dtype=int)
+        X = self._core.P[value_cids]
+
+        dX = numpy.zeros((len(nodes), num_fields, num_components.max()))
+        count = numpy.zeros(len(nodes))
+        for dims, connectivity in batches.items():
+            num_local = 2 ** dims
+            conn = numpy.array([[node_index[nid] for nid in nids]
+                                for nids in connectivity], dtype=int)
+            Xe = X[conn]
+            local = numpy.arange(num_local)
+            D = numpy.zeros(Xe.shape + (num_local,))
+            for component in range(1, num_local):
+                if not cross_derivatives and component not in [1, 2, 4]:
+                    continue
+                # mixed finite difference over the axes in component
+                axes = [a for a in range(dims) if component & (1 << a)]
+                sign = numpy.ones(num_local)
+                for a in axes:
+                    sign[local & (1 << a) > 0] *= -1
+                for subset in range(num_local):
+                    if subset & component != subset:
+                        continue
+                    scale = (-1) ** (len(axes) - bin(subset).count('1'))
+                    D[:, :, :, component] += scale * Xe[:, local ^ subset, :]
+                D[:, :, :, component] *= sign[None, :, None]
+            select = num_components[conn.ravel()] == num_local
+            numpy.add.at(dX[:, :, :num_local], conn.ravel()[select],
+                         D.reshape((-1, num_fields, num_local))[select])
+            numpy.add.at(count, conn.ravel()[select], 1)
+
+        P = self._core.P
+        for nc in numpy.unique(num_components[count > 0]):
+            rows = numpy.nonzero((count > 0) & (num_components == nc))[0]
+            cids = numpy.array([nodes[i].cids for i in rows], dtype=int).reshape(
+                (rows.size, num_fields, nc))
+            values = dX[rows, :, :nc] / count[rows, None, None]
+            if cross_derivatives:
+                P[cids[:, :, 1:]] = values[:, :, 1:]
+            else:
+                components = [c for c in [1, 2, 4] if c < nc]
+                P[cids[:, :, components]] = values[:, :, components]
+        self._reupdate = True
+
+    def _transform_nodes(self, groups=None):
+        if groups is None:
+            node_ids = []
+            for elem in self.elements:
+                node_ids.extend(elem.node_ids)
+            nodes = self.nodes[list(dict.fromkeys(node_ids))]
+        else:
+            nodes = self.nodes.get_groups(groups)
+        transform_nodes = []
+        for node in nodes:
+            if node._type == 'pca':
+                transform_nodes.append(node.node)
+            elif node._type == 'standard':
+                transform_nodes.append(node)
+        return list(dict.fromkeys(transform_nodes))
+
+    def _field_index(self, nodes):
+        '''
+        Returns the parameter indices of the nodes grouped by node
+        shape as a list of ``(num_nodes, num_fields, num_components)``
+        arrays, where the first component is the value and the other
+        components are derivatives or, for PCA nodes, modes.
+        '''
+        batches = {}
+        for node in nodes:
+            shape = (node.num_fields, node.num_values // node.num_fields)
+            if shape not in batches:
+                batches[shape] = []
+            batches[shape].append(node.cids)
+        return [numpy.array(cids, dtype=int).reshape((-1,) + shape)
+                for shape, cids in batches.items()]
+
+    def transform(self, matrix, offset=None, groups=None, update=True):
+        '''
+        Applies an affine transform, ``x' = matrix . x + offset``, to
+        the node values. Derivative components, e.g., of cubic-Hermite
+        nodes, and the modes of PCA nodes are transformed by the linear
+        part, ``matrix``, only.
+
+        By default, the nodes of the elements are transformed. If
+        groups are given, the nodes in these node groups are
+        transformed instead. PCA nodes transform their mean and modes
+        and dependent nodes are updated after the transform.
+
+        The parameter indices of the nodes are cached so the transform
+        is applied to ``core.P`` in one vectorised operation per node
+        shape.
+
+        >>> theta = numpy.pi / 6
+        >>> R = [[numpy.cos(theta), -numpy.sin(theta), 0],
+        ...      [numpy.sin(theta), numpy.cos(theta), 0], [0, 0, 1]]
+        >>> mesh.transform(R, offset=[10, 0, 0])
+        '''
+        self.generate()
+        matrix = numpy.asarray(matrix, dtype=float)
+        if offset is None:
+            offset = numpy.zeros(matrix.shape[0])
+        offset = numpy.asarray(offset, dtype=float)
+
+        key = ('transform', None if groups is None else tuple(groups)
+               if isinstance(groups, list) else (groups,),
+               self.nodes.group_version)
+        if key not in self._index_cache:
+            self._index_cache[key] = self._field_index(
+                self._transform_nodes(groups))
+
+        indices = self._index_cache[key]
+        if any([index.shape[1] != matrix.shape[1] for index in indices]):
+            raise ValueError('Transform matrix does not match the '
+                             'number of node fields')
+        P = self._core.P
+        for index in indices:
+            values = numpy.einsum('ij,njk->nik', matrix, P[index])
+            values[:, :, 0] += offset
+            P[index] = values
+
+        self._reupdate = True
+        if update:
+            self.update()
+
     def normal(self, element_ids, xi, normalise=False):
         self.generate()
         if isinstance(xi, list):
@@ -1761,6 +2993,225 @@ class Mesh(object):
         invF = linalg.inv(F)
         return F, invF
 
+    def _element_points(self, elements=None, groups=None, xi=None, ng=3):
+        if elements == None:
+            if groups == None:
+                elements = self.elements
+            else:
+                elements = self.elements.get_groups(groups)
+        else:
+            elements = self.elements[elements]
+        elements = list(elements)
+        if xi is None:
+            dims = core.dimensions(elements[0].basis)
+            if isinstance(ng, int):
+                ng = [ng] * dims
+            xi = self._core.get_gauss_points(ng if dims > 1 else ng[0])[0]
+            if elements[0].shape == 'tri':
+                # collapses the quad Gauss points onto the triangle
+                xi = numpy.array(xi)
+                xi[:, 1] *= 1 - xi[:, 0]
+        xi = numpy.asarray(xi, dtype=float)
+        if xi.ndim == 1:
+            xi = xi.reshape((xi.size, 1))
+        return elements, xi
+
+    def jacobians(self, xi=None, elements=None, groups=None, ng=3):
+        '''
+        Returns the derivatives of the fields with respect to xi,
+        ``dx/dxi``, at the ``xi`` points of every element as an array of
+        size ``(num_elements, num_xi, num_fields, num_dims)``. If ``xi``
+        is not given, the derivatives are evaluated at ``ng`` Gauss
+        points in each direction, which are collapsed onto the triangle
+        for triangular elements. The elements must have the same
+        number of dimensions.
+
+        The derivatives of all elements are evaluated with one sparse
+        matrix-vector product per xi direction.
+        '''
+        self.generate()
+        elements, xi = self._element_points(elements, groups, xi, ng)
+        cids = [elem.cid for elem in elements]
+        num_dims = xi.shape[1]
+        J = None
+        for axis in range(num_dims):
+            deriv = [0] * num_dims
+            deriv[axis] = 1
+            A = self._core.grid_weights_matrix(cids, xi, deriv=deriv)
+            dX = A.dot(self._core.P[:A.shape[1]]).reshape(
+                (len(cids), xi.shape[0], -1))
+            if J is None:
+                J = numpy.zeros(dX.shape + (num_dims,))
+            J[:, :, :, axis] = dX
+        return J
+
+    def deformation_gradients(self, deformed_mesh, xi=None, elements=None,
+                              groups=None, ng=3):
+        '''
+        Returns the deformation gradient tensors, ``F = dx/dX``, from
+        this (reference) mesh to ``deformed_mesh`` at the ``xi`` points,
+        or ``ng`` Gauss points, of every element as an array of size
+        ``(num_elements, num_xi, num_fields, num_fields)``. The meshes
+        must have the same element ids and the elements must have as
+        many dimensions as fields, e.g., 3D elements with x, y, z.
+        '''
+        elements, xi = self._element_points(elements, groups, xi, ng)
+        element_ids = [elem.id for elem in elements]
+        J0 = self.jacobians(xi, elements=element_ids)
+        J1 = deformed_mesh.jacobians(xi, elements=element_ids)
+        if J0.shape[2] != J0.shape[3] or J0.shape != J1.shape:
+            raise ValueError('Deformation gradients require matching meshes '
+                             'with the number of fields equal to the element '
+                             'dimensions')
+        return numpy.matmul(J1, numpy.linalg.inv(J0))
+
+    def strains(self, deformed_mesh, xi=None, elements=None, groups=None,
+                ng=3):
+        '''
+        Computes the strains from this (reference) mesh to
+        ``deformed_mesh`` at the ``xi`` points, or ``ng`` Gauss points,
+        of every element. Returns a dictionary with:
+            - ``element_ids``: the element ids
+            - ``xi``: the xi points evaluated on each element
+            - ``F``: deformation gradient tensors, see
+              ``deformation_gradients``
+            - ``C``: right Cauchy-Green tensors, ``C = F^T F``
+            - ``E``: Green-Lagrange strain tensors, ``E = (C - I) / 2``
+            - ``stretches``: principal stretches in ascending order
+
+        The tensors have size ``(num_elements, num_xi, n, n)`` and are
+        computed with stacked matrix operations over all the points.
+
+        >>> strains = reference.strains(deformed, ng=3)
+        >>> max_stretch = strains['stretches'][:, :, -1]
+        '''
+        elements, xi = self._element_points(elements, groups, xi, ng)
+        element_ids = [elem.id for elem in elements]
+        F = self.deformation_gradients(deformed_mesh, xi, elements=element_ids)
+        C = numpy.matmul(numpy.swapaxes(F, -1, -2), F)
+        E = 0.5 * (C - numpy.eye(C.shape[-1]))
+        stretches = numpy.sqrt(numpy.linalg.eigvalsh(C))
+        return {'element_ids': element_ids, 'xi': xi,
+                'F': F, 'C': C, 'E': E, 'stretches': stretches}
+
+    def quality(self, points='gauss', ng=3, elements=None, groups=None,
+                min_ratio=0.1, max_skewness=0.9):
+        '''
+        Scans the elements for inverted or near-degenerate elements.
+        The Jacobians are evaluated at the Gauss points (``points =
+        'gauss'``) or the element corners (``points = 'corners'``) of
+        all elements in one vectorised pass per element type, see
+        ``jacobians``. Triangular elements are always evaluated at
+        their corners. Returns a dictionary with:
+            - ``element_ids``: the element ids
+            - ``min_jacobian``: the minimum Jacobian determinant
+            - ``jacobian_ratio``: the ratio of the minimum to maximum
+              Jacobian determinant
+            - ``skewness``: the maximum absolute cosine of the angle
+              between the xi directions, 0 for orthogonal directions
+            - ``inverted``: ids of elements with a non-positive
+              Jacobian determinant
+            - ``degenerate``: ids of elements with a Jacobian ratio
+              below ``min_ratio`` or skewness above ``max_skewness``
+            - ``skipped``: ids of elements with bases without
+              derivatives, i.e., T11 and T22
+            - ``groups``: a summary for each element group.
+
+        The per element values are arrays ordered as ``element_ids``.
+        For elements with fewer dimensions than fields, e.g., surfaces
+        in 3D, the determinant is the area (or length) scale,
+        ``sqrt(det(J^T J))``, which cannot be negative.
+
+        >>> report = mesh.quality()
+        >>> bad_elements = report['inverted'] + report['degenerate']
+        '''
+        self.generate()
+        if elements == None:
+            if groups == None:
+                elements = self.elements
+            else:
+                elements = self.elements.get_groups(groups)
+        else:
+            elements = self.elements[elements]
+
+        batches = {}
+        skipped = []
+        for elem in elements:
+            if elem.basis[0] in ['T11', 'T22']:
+                # no derivatives are implemented for these bases
+                skipped.append(elem.id)
+                continue
+            key = (core.dimensions(elem.basis), elem.shape == 'tri')
+            if key not in batches:
+                batches[key] = []
+            batches[key].append(elem.id)
+
+        element_ids = []
+        min_jacobian, jacobian_ratio, skewness = [], [], []
+        for (dims, tri), ids in batches.items():
+            if tri:
+                xi = numpy.array([[0, 0], [1, 0], [0, 1]], dtype=float)
+            elif points == 'corners':
+                xi = numpy.array(numpy.meshgrid(
+                    *([[0., 1.]] * dims), indexing='ij')).reshape((dims, -1)).T
+            elif points == 'gauss':
+                xi = None
+            else:
+                raise ValueError('Unknown points %s' % points)
+            J = self.jacobians(xi, elements=ids, ng=ng)
+            if J.shape[2] == J.shape[3]:
+                detJ = numpy.linalg.det(J)
+            else:
+                detJ = numpy.sqrt(numpy.linalg.det(
+                    numpy.matmul(numpy.swapaxes(J, -1, -2), J)))
+            norms = numpy.sqrt((J * J).sum(2))
+            norms[norms == 0] = 1
+            cosines = numpy.matmul(numpy.swapaxes(J, -1, -2), J) / (
+                norms[:, :, :, None] * norms[:, :, None, :])
+            cosines = numpy.abs(cosines - numpy.eye(dims) * cosines)
+            detJmin = detJ.min(1)
+            detJmax = detJ.max(1)
+            ratio = numpy.zeros(detJmin.shape)
+            positive = detJmax > 0
+            ratio[positive] = detJmin[positive] / detJmax[positive]
+            element_ids.extend(ids)
+            min_jacobian.append(detJmin)
+            jacobian_ratio.append(ratio)
+            skewness.append(cosines.reshape((len(ids), -1)).max(1))
+
+        report = {'element_ids': element_ids}
+        if len(element_ids) > 0:
+            report['min_jacobian'] = numpy.concatenate(min_jacobian)
+            report['jacobian_ratio'] = numpy.concatenate(jacobian_ratio)
+            report['skewness'] = numpy.concatenate(skewness)
+        else:
+            report['min_jacobian'] = numpy.zeros(0)
+            report['jacobian_ratio'] = numpy.zeros(0)
+            report['skewness'] = numpy.zeros(0)
+        inverted = report['min_jacobian'] <= 0
+        degenerate = (~inverted) & (
+            (report['jacobian_ratio'] < min_ratio) |
+            (report['skewness'] > max_skewness))
+        report['inverted'] = [eid for eid, bad in zip(element_ids, inverted) if bad]
+        report['degenerate'] = [eid for eid, bad in zip(element_ids, degenerate) if bad]
+        report['skipped'] = skipped
+
+        index = dict([(eid, idx) for idx, eid in enumerate(element_ids)])
+        report['groups'] = {}
+        for group, objs in self.elements.groups.items():
+            idx = numpy.array([index[elem.id] for elem in objs
+                               if elem.id in index], dtype=int)
+            if idx.size == 0:
+                continue
+            report['groups'][group] = {
+                'num_elements': idx.size,
+                'min_jacobian': report['min_jacobian'][idx].min(),
+                'min_jacobian_ratio': report['jacobian_ratio'][idx].min(),
+                'max_skewness': report['skewness'][idx].max(),
+                'inverted': [element_ids[i] for i in idx if inverted[i]],
+                'degenerate': [element_ids[i] for i in idx if degenerate[i]]}
+        return report
+
     def grid(self, res=[8, 8], shape='quad', method='fit'):
         return discretizer.xi_grid(
             shape=shape, res=res, units='div', method=method)[0]
@@ -1774,7 +3225,51 @@ class Mesh(object):
             exist = True
         return exists
 
-    def get_nodes(self, nodes=None, group='_default'):
+    def _get_field_nodes(self, nodes, group):
+        if nodes != None:
+            if not isinstance(nodes, list):
+                try:
+                    nodes = [*nodes]
+                except:
+                    nodes = [nodes]
+            return self.nodes[nodes]
+        return self.nodes(group)
+
+    def _field_view_index(self, nodes, component):
+        index = []
+        for node in nodes:
+            shape = node.shape
+            if len(shape) == 1:
+                shape = (shape[0], 1)
+            cids = numpy.array(node.cids).reshape(shape)
+            if cids.ndim != 2:
+                return None
+            index.append(cids[:, component])
+        if len(index) == 0:
+            return numpy.zeros((0, 0), dtype=int)
+        if len(set([len(cids) for cids in index])) > 1:
+            return None
+        return numpy.array(index, dtype=int)
+
+    def field_view(self, nodes=None, group='_default', component=0):
+        '''
+        Returns a ``FieldView`` of a field component, by default the
+        values, of the nodes given or the nodes in ``group``. The
+        parameter indices of the nodes are cached until the mesh is
+        regenerated. The nodes must have the same number of fields.
+
+        >>> X = mesh.field_view(group='surface')
+        >>> X[:] = numpy.dot(X[:], R.T)
+        '''
+        view = self._field_view(nodes, group, component)
+        if view is None:
+            raise ValueError('Field views require nodes with the same '
+                             'number of fields and components')
+        return view
+
+    def _field_view(self, nodes, group, component=0):
+        # Returns the field view of the nodes or None if the nodes do
+        # not have the same number of fields and components.
         self.generate()
         if nodes != None:
             if not isinstance(nodes, list):
@@ -1782,9 +3277,25 @@ class Mesh(object):
                     nodes = [*nodes]
                 except:
                     nodes = [nodes]
-            nodes = self.nodes[nodes]
+            key = ('field_view', 'nodes', tuple(nodes), component)
         else:
-            nodes = self.nodes(group)
+            key = ('field_view', 'group', group, component,
+                   self.nodes.group_version)
+        if key not in self._index_cache:
+            field_nodes = self._get_field_nodes(nodes, group)
+            self._index_cache[key] = (
+                [node.id for node in field_nodes],
+                self._field_view_index(field_nodes, component))
+        node_ids, index = self._index_cache[key]
+        if index is None:
+            return None
+        return FieldView(self, node_ids, index, component)
+
+    def get_nodes(self, nodes=None, group='_default'):
+        view = self._field_view(nodes, group)
+        if view is not None:
+            return view[:]
+        nodes = self._get_field_nodes(nodes, group)
         Xn = []
         for node in nodes:
             if len(node.shape) == 1:
@@ -1794,14 +3305,13 @@ class Mesh(object):
         return numpy.array([xn for xn in Xn])
 
     def set_nodes(self, values, nodes=None, group='_default'):
-        self.generate()
-        if nodes != None:
-            if not isinstance(nodes, list):
-                nodes = [nodes]
-            nodes = self.nodes[nodes]
-        else:
-            nodes = self.nodes(group)
-        for idx, node in enumerate(nodes):
+        if nodes != None and not isinstance(nodes, list):
+            nodes = [nodes]
+        view = self._field_view(nodes, group)
+        if view is not None:
+            view[:] = values
+            return
+        for idx, node in enumerate(self._get_field_nodes(nodes, group)):
             if len(node.values.shape) == 1:
                 node.values[:] = values[idx, :]
             else:
@@ -1833,9 +3343,13 @@ class Mesh(object):
             Xl.append(self._core.evaluate(elem.cid, xi))
         return Xl
 
-    def get_surfaces(self, res=8, elements=None, groups=None, include_xi=False):
-        # self.generate() // Cannot use because it'll regenerate the pca nodes after they might've been translated.
-
+    def tessellate(self, res=8, elements=None, groups=None):
+        '''
+        Returns a tessellation of the 2D elements of the mesh. The
+        tessellation is cached for each set of elements and resolution
+        so the xi grids, triangles and weights are only computed once.
+        The cache is cleared when the mesh is regenerated.
+        '''
         if elements == None:
             if groups == None:
                 Elements = self.elements
@@ -1843,122 +3357,97 @@ class Mesh(object):
                 Elements = self.elements.get_groups(groups)
         else:
             Elements = self.elements[elements]
+        Elements = list(Elements)
 
-        XiT, TT = discretizer.xi_grid(shape='tri', res=res)
-        XiQ, TQ = discretizer.xi_grid(shape='quad', res=res)
-        NPT, NTT = XiT.shape[0], TT.shape[0]
-        NPQ, NTQ = XiQ.shape[0], TQ.shape[0]
-
-        NP, NT = 0, 0
-        for elem in Elements:
-            if elem.shape == 'tri':
-                NP += NPT
-                NT += NTT
-            elif elem.shape == 'quad':
-                NP += NPQ
-                NT += NTQ
-
-        X = numpy.zeros((NP, elem.nodes[0].num_fields))
-        T = numpy.zeros((NT, 3), dtype='uint32')
-        if include_xi:
-            Xi = numpy.zeros((NP, 2))
-        np, nt = 0, 0
-        for elem in Elements:
-            if elem.shape == 'tri':
-                X[np:np + NPT, :] = self._core.evaluate(elem.cid, XiT)
-                if include_xi:
-                    Xi[np:np + NPT, :] = XiT
-                T[nt:nt + NTT, :] = TT + np
-                np += NPT
-                nt += NTT
-            elif elem.shape == 'quad':
-                X[np:np + NPQ, :] = self._core.evaluate(elem.cid, XiQ)
-                T[nt:nt + NTQ, :] = TQ + np
-                if include_xi:
-                    Xi[np:np + NPQ, :] = XiQ
-                np += NPQ
-                nt += NTQ
+        key = ('surfaces', res, tuple([elem.id for elem in Elements]))
+        if key not in self._tessellations:
+            self._tessellations[key] = Tessellation(self, Elements, res=res)
+        return self._tessellations[key]
+
+    def get_surfaces(self, res=8, elements=None, groups=None, include_xi=False):
+        # self.generate() // Cannot use because it'll regenerate the pca nodes after they might've been translated.
+        tessellation = self.tessellate(res=res, elements=elements, groups=groups)
+        X = tessellation.evaluate()
+        T = tessellation.T.copy()
         if include_xi:
-            return X, T, Xi
+            return X, T, tessellation.Xi.copy()
         return X, T
 
     def get_faces(self, res=8, exterior_only=True, include_xi=False, elements=None):
         self.generate()
 
+        topology = self.topology()
+        faces = topology.faces
+        # faces are represented by their first element face
+        first_entries = faces.first_entries()
         if elements == None:
-            Faces = self.faces
+            face_ids = numpy.arange(faces.size)
         else:
-            Faces = []
-            for face in self.faces:
-                for element_face in face.element_faces:
-                    if element_face[0] in elements:
-                        Faces.append(face)
-                        break
+            face_ids = numpy.unique(faces.entry_id[
+                topology.element_entries(faces, elements)])
 
         if exterior_only:
-            Faces = [face for face in Faces if len(face.element_faces) == 1]
-
-        XiT, TT = discretizer.xi_grid(shape='tri', res=res)
-        XiQ, TQ = discretizer.xi_grid(shape='quad', res=res)
-        NPT, NTT = XiT.shape[0], TT.shape[0]
-        NPQ, NTQ = XiQ.shape[0], TQ.shape[0]
-
-        XiQ0 = numpy.zeros(NPQ)
-        XiQ1 = numpy.ones(NPQ)
-
-        NP, NT = 0, 0
-        for face in Faces:
-            if face.shape == 'tri':
-                NP += NPT
-                NT += NTT
-            elif face.shape == 'quad':
-                NP += NPQ
-                NT += NTQ
-
-        X = numpy.zeros((NP, 3))  #######TODO#####face.nodes[0].num_fields))
-        T = numpy.zeros((NT, 3), dtype='uint32')
-        if include_xi:
-            Xi = numpy.zeros((NP, 2))
-        np, nt = 0, 0
-        for face in Faces:
-            if face.shape == 'tri':
-                X[np:np + NPT, :] = self._core.evaluate(face.cid, XiT)
-                if include_xi:
-                    Xi[np:np + NPT, :] = XiT
-                T[nt:nt + NTT, :] = TT + np
-                np += NPT
-                nt += NTT
-            elif face.shape == 'quad':
-                elem = self.elements[face.element_faces[0][0]]
-                face_index = face.element_faces[0][1]
-                if face_index == 0:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ[:, 0], XiQ[:, 1], XiQ0]).T)
-                elif face_index == 1:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ[:, 0], XiQ[:, 1], XiQ1]).T)
-                elif face_index == 2:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ[:, 0], XiQ0, XiQ[:, 1]]).T)
-                elif face_index == 3:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ[:, 0], XiQ1, XiQ[:, 1]]).T)
-                elif face_index == 4:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ0, XiQ[:, 0], XiQ[:, 1]]).T)
-                elif face_index == 5:
-                    X[np:np + NPQ, :] = self._core.evaluate(elem.cid,
-                                                            numpy.array([XiQ1, XiQ[:, 0], XiQ[:, 1]]).T)
-
-                T[nt:nt + NTQ, :] = TQ + np
-                if include_xi:
-                    Xi[np:np + NPQ, :] = XiQ
-                np += NPQ
-                nt += NTQ
+            face_ids = face_ids[faces.count[face_ids] == 1]
+
+        entry_ids = first_entries[face_ids]
+        key = ('faces', res, tuple(entry_ids.tolist()))
+        if key not in self._tessellations:
+            self._tessellations[key] = Tessellation(
+                self, [self.elements[topology.element_ids[idx]]
+                       for idx in faces.entry_element[entry_ids]],
+                res=res, face_indices=faces.entry_local[entry_ids].tolist())
+        tessellation = self._tessellations[key]
+
+        X = tessellation.evaluate()
+        T = tessellation.T.copy()
         if include_xi:
-            return X, T, Xi
+            return X, T, tessellation.Xi.copy()
         return X, T
 
+    def get_edges(self, res=8, elements=None, groups=None, include_xi=False):
+        '''
+        Returns the points and line segments of the unique element
+        edges, i.e., edges shared by elements are only returned once.
+        Each edge is evaluated at ``res`` points. The points of all
+        edges are returned in a single array ``X`` and the segments
+        ``L`` index into ``X``, which is convenient for rendering.
+
+        The edge weights are cached so subsequent calls only evaluate
+        a sparse matrix-vector product, see ``Tessellation``.
+
+        Only the edges of line, quad and hexahedral elements are
+        returned, see ``core.element_edges``. Elements with a triangle
+        basis, e.g., ``['T22']``, have no edges and are skipped.
+
+        >>> X, L = mesh.get_edges(res=8)
+        '''
+        self.generate()
+
+        if elements == None:
+            if groups == None:
+                elements = self.elements.keys()
+            else:
+                elements = [elem.id for elem in self.elements.get_groups(groups)]
+
+        topology = self.topology()
+        edges = topology.edges
+        edge_ids = numpy.unique(edges.entry_id[
+            topology.element_entries(edges, elements)])
+        entry_ids = edges.first_entries()[edge_ids]
+        key = ('edges', res, tuple(entry_ids.tolist()))
+        if key not in self._tessellations:
+            self._tessellations[key] = Tessellation(
+                self, [self.elements[topology.element_ids[idx]]
+                       for idx in edges.entry_element[entry_ids]],
+                res=res, edge_indices=edges.entry_local[entry_ids].tolist())
+        tessellation = self._tessellations[key]
+
+        X = tessellation.evaluate()
+        L = tessellation.T.copy()
+        if include_xi:
+            return X, L, tessellation.Xi.copy()
+        return X, L
+
     def get_lines(self, res=8, elements='all', internal_lines=False):
         lines = []
         if elements == 'all':
@@ -2150,44 +3639,192 @@ class Mesh(object):
             elif isinstance(node, PCANode):
                 raise Exception('Not implemented')
 
+    def clone(self):
+        '''
+        Returns a copy of the mesh which shares the topology with this
+        mesh and has its own copy of the parameters, ``core.P``. The
+        node, element and face objects are shallow copies bound to the
+        new mesh and the core maps are shared, so cloning is much
+        faster than ``copy_mesh``, which rebuilds the mesh from a
+        dictionary. Changing the node values of the clone does not
+        change this mesh.
+
+        >>> trial = mesh.clone()
+        >>> trial.nodes[1].values = [0.1, 0.2, 0.3]
+        '''
+        mesh = Mesh.__new__(Mesh)
+        mesh.__dict__.update(self.__dict__)
+        mesh.filepath = None
+        mesh._core = self._core._clone()
+        mesh.core = mesh._core
+        mesh.nodes = self.nodes._clone(
+            lambda node: node._clone(mesh), finalise=_bind_pca_nodes)
+        mesh.elements = self.elements._clone(lambda elem: elem._clone(mesh))
+        mesh.faces = self.faces._clone(lambda face: face._clone(mesh))
+        mesh.lines = self.lines._clone(lambda line: line._clone(mesh))
+        mesh.sysdata = metadata.Metadata()
+        mesh.sysdata.__dict__.update(self.sysdata.__dict__)
+        mesh.metadata = metadata.Metadata()
+        mesh.metadata.__dict__.update(self.metadata.__dict__)
+        mesh._index_cache = dict(self._index_cache)
+        mesh._adjacency = None
+        mesh._tessellations = dict([
+            (key, tessellation._clone(mesh))
+            for key, tessellation in self._tessellations.items()])
+        return mesh
+
     def copy_mesh(self, elements=None):
         if elements is None:
             mesh_dict = self._save_dict()
             mesh = Mesh()
             mesh._load_dict(mesh_dict)
             return mesh
+        return self.extract(elements)[0]
 
-        nids = []
-        for eid in elements:
-            for node in self.elements[eid].nodes:
-                nids.append(node.id)
-                if isinstance(node, DepNode):
-                    if node.element not in elements:
-                        print("Warning: Dependent node element is not included in the list of elements to copy")
-                    nids.append(node.node)
-                elif isinstance(node, PCANode):
-                    if node.weights_id not in nids:
-                        nids.append(node.weights_id)
-                    if node.variance_id not in nids:
-                        nids.append(node.variance_id)
+    def extract(self, elements=None, groups=None, renumber=False):
+        '''
+        Returns a new mesh with the given elements, or the elements in
+        the groups, and the nodes they require, i.e., their nodes and
+        the nodes used by their dependent and PCA nodes. The parameters
+        of these nodes are copied from ``core.P`` in bulk into a new
+        compact core. Dependent nodes whose element is not extracted
+        become standard nodes with their current values. The node and
+        element groups are kept.
+
+        If ``renumber`` is True, the nodes and elements are numbered
+        from 1 in the order of this mesh.
+
+        Returns ``(mesh, node_map, element_map)`` where the maps are
+        dictionaries from the ids in this mesh to the ids in the new
+        mesh.
+
+        >>> submesh, node_map, element_map = mesh.extract(groups='lv')
+        '''
+        if elements is None:
+            if groups is None:
+                element_ids = self.elements.ids
+            else:
+                element_ids = self.elements.get_group_ids(groups)
+        else:
+            element_ids = list(elements)
+        self.generate()
+        if core.is_array_backed(self.elements) and \
+                core.is_array_backed(self.nodes):
+            return self._extract_arrays(element_ids, renumber)
+
+        element_set = set(element_ids)
+        elements = [elem for elem in self.elements if elem.id in element_set]
+        nodes = list(self.nodes)
+        position = dict([(node.id, i) for i, node in enumerate(nodes)])
+        required = numpy.zeros(len(nodes), dtype=bool)
+        node_ids = []
+        for elem in elements:
+            node_ids.extend(elem.node_ids)
+        new = numpy.unique([position[nid] for nid in node_ids])
+        while new.size > 0:
+            required[new] = True
+            node_ids = []
+            for i in new:
+                node = nodes[i]
+                if node._type == 'dependent' and node.element in element_set:
+                    node_ids.append(node.node)
+                elif node._type == 'pca':
+                    node_ids.extend([
+                        node.node_id, node.weights_id, node.variance_id])
+            new = numpy.array(
+                [position[nid] for nid in node_ids], dtype=int)
+            new = numpy.unique(new[~required[new]])
+        nodes = [nodes[i] for i in numpy.nonzero(required)[0]]
+
+        keep = numpy.zeros(self._core.P.size, dtype=bool)
+        for node in nodes:
+            if node.cids is not None:
+                keep[list(node.cids)] = True
+        mesh = Mesh(label=self.label, units=self.units)
+        mesh.auto_add_faces = self.auto_add_faces
+        mesh._core = self._core._clone()
+        mesh.core = mesh._core
+        cid_map = mesh._core.compact(keep)
+        node_map, element_map = _extract_id_maps(
+            [node.id for node in nodes], [elem.id for elem in elements],
+            renumber)
 
-        mesh = Mesh()
-        for node in self.nodes:
-            if node.id in nids:
-                if isinstance(node, StdNode):
-                    mesh.add_stdnode(node.id, node.values, group=node.groups())
-                elif isinstance(node, DepNode):
-                    mesh.add_depnode(node.id, node.element, node.node, group=node.groups())
-                elif isinstance(node, PCANode):
-                    mesh.add_pcanode(node.id, node.weights_id, node.variance_id, group=node.groups())
+        for node in nodes:
+            if node._type == 'dependent' and node.element not in element_set:
+                new_node = _create_object(
+                    mesh, StdNode, mesh, node.id,
+                    cids=_remap_cids(node.cids, cid_map), shape=node.shape)
+            else:
+                new_node = node._clone(mesh)
+                if node.cids is not None:
+                    new_node.cids = _remap_cids(node.cids, cid_map)
+            if renumber:
+                new_node.id = node_map[node.id]
+                if new_node._type == 'dependent':
+                    new_node.element = element_map[node.element]
+                    new_node.node = node_map[node.node]
+                elif new_node._type == 'pca':
+                    new_node.node_id = node_map[node.node_id]
+                    new_node.weights_id = node_map[node.weights_id]
+                    new_node.variance_id = node_map[node.variance_id]
+            mesh.nodes.add(new_node)
+        for node in mesh.nodes:
+            if node._type == 'pca':
+                node._bind_nodes()
+                if node._added:
+                    node._pca_id = mesh._core.add_pca_node(node)
 
-        for element in self.elements:
-            if element.id in elements:
-                mesh.add_element(element.id, element.basis, element.node_ids)
+        for elem in elements:
+            new_elem = elem._clone(mesh)
+            new_elem.id = element_map[elem.id]
+            new_elem.node_ids = [node_map[nid] for nid in elem.node_ids]
+            new_elem.cid = None
+            mesh.elements.add(new_elem)
+            if mesh.auto_add_faces:
+                new_elem.add_faces()
 
-        mesh.generate()
+        _copy_groups(self.nodes, mesh.nodes, node_map)
+        _copy_groups(self.elements, mesh.elements, element_map)
 
-        return mesh
+        mesh.generate()
+        return mesh, node_map, element_map
+
+    def _extract_arrays(self, element_ids, renumber):
+        # Extracts elements from a mesh with array-backed nodes and
+        # elements, see ``extract``, without creating node objects.
+        eidx = numpy.sort(self.elements.indices(element_ids))
+        conn = self.elements.data['node_ids'][eidx]
+        conn_idx = self.nodes.indices(conn)
+        nidx = numpy.unique(conn_idx)
+        shape = self.nodes.data['shape']
+        num_values = int(numpy.prod(shape))
+        cids = (self.nodes.data['p0'][nidx][:, None] +
+                numpy.arange(num_values)).ravel()
+        node_ids = self.nodes._ids[nidx]
+        elem_ids = self.elements._ids[eidx]
+        node_map, element_map = _extract_id_maps(
+            node_ids.tolist(), elem_ids.tolist(), renumber)
+        if renumber:
+            conn = numpy.searchsorted(nidx, conn_idx) + 1
+            node_ids = numpy.arange(1, nidx.size + 1)
+            elem_ids = numpy.arange(1, eidx.size + 1)
+
+        # The core is compacted as in ``extract`` so the fixed flags,
+        # variables and parameter maps of the nodes are kept.
+        keep = numpy.zeros(self._core.P.size, dtype=bool)
+        keep[cids] = True
+        mesh = Mesh(label=self.label, units=self.units)
+        mesh.auto_add_faces = self.auto_add_faces
+        mesh._core = self._core._clone()
+        mesh.core = mesh._core
+        cid_map = mesh._core.compact(keep)
+        mesh.nodes = mesh._array_nodes(
+            node_ids, cid_map[self.nodes.data['p0'][nidx]], shape)
+        mesh.add_elements(elem_ids, self.elements.data['basis'], conn)
+        _copy_groups(self.nodes, mesh.nodes, node_map)
+        _copy_groups(self.elements, mesh.elements, element_map)
+        mesh.generate()
+        return mesh, node_map, element_map
 
     def volume(self):
         V = 0
@@ -29,7 +29,7 @@ class Metadata(object):
         return self.__dict__
     
     def set_dict(self, data):
-        for key, value in data.iteritems():
+        for key, value in data.items():
             self.__dict__[key] = value
             
     def save_pytables(self, node):
@@ -40,6 +40,17 @@ class Metadata(object):
         a = node._AttributeSet(node)
         for key in a._v_attrnamesuser:
             self.set(key, a[key])
+
+    def save_h5py(self, group):
+        import numpy
+        import pickle
+        for key, value in self.items():
+            group.attrs[key] = numpy.void(pickle.dumps(value))
+
+    def load_h5py(self, group):
+        import pickle
+        for key, value in group.attrs.items():
+            self.set(key, pickle.loads(value.tobytes()))
     
     def __setattr__(self, name, value):
         self.__dict__[name] = value
@@ -0,0 +1,151 @@
+import numpy
+
+from morphic import mesher
+
+
+class MeshSequence(object):
+    '''
+    A sequence of frames of a mesh, e.g., a motion or breathing
+    sequence, where the topology is stored once and the parameters,
+    ``core.P``, of each frame are stored in a chunked and compressed
+    (frames x params) dataset.
+
+    The file is a mesh in the h5py format, which holds the topology and
+    the parameters of the mesh the sequence was created with, and a
+    ``sequence`` group with the frames and their times. Frames are
+    appended and flushed one at a time so a sequence can be written
+    while a simulation runs,
+
+    >>> sequence = MeshSequence('data/breathing.seq', mesh, mode='w')
+    >>> for time in times:
+    ...     simulate(mesh, time)
+    ...     sequence.append(time=time)
+    >>> sequence.close()
+
+    Frames are loaded into the parameters of ``sequence.mesh`` by index
+    or time, where the parameters between frames are interpolated
+    linearly,
+
+    >>> sequence = MeshSequence('data/breathing.seq')
+    >>> mesh = sequence.load_frame(10)
+    >>> mesh = sequence.load_time(0.35)
+    '''
+
+    def __init__(self, filepath, mesh=None, mode='r'):
+        import h5py
+
+        self.filepath = filepath
+        if mode == 'w':
+            if mesh is None:
+                raise ValueError('A mesh is required to create a sequence')
+            mesh.generate()
+            mesh.save(filepath, format='h5py')
+            self.mesh = mesh
+            self._h5 = h5py.File(filepath, 'a')
+            num_params = mesh.params.size
+            # Chunks of about 64KB are read for a frame.
+            frames_per_chunk = max(1, 2 ** 13 // max(1, num_params))
+            h5sequence = self._h5.create_group('sequence')
+            h5sequence.create_dataset(
+                'params', shape=(0, num_params), maxshape=(None, num_params),
+                dtype=float, chunks=(frames_per_chunk, max(1, num_params)),
+                compression='gzip', compression_opts=4, shuffle=True)
+            h5sequence.create_dataset(
+                'times', shape=(0,), maxshape=(None,), dtype=float,
+                chunks=(1024,))
+        elif mode in ['r', 'a']:
+            self.mesh = mesher.Mesh(filepath)
+            self._h5 = h5py.File(filepath, mode)
+        else:
+            raise ValueError('Unknown sequence mode %s' % mode)
+        self._params = self._h5['sequence']['params']
+        self._times = self._h5['sequence']['times']
+
+    def __len__(self):
+        return self._params.shape[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def times(self):
+        return self._times[...]
+
+    def close(self):
+        if self._h5 is not None:
+            self._h5.close()
+            self._h5 = None
+
+    def append(self, params=None, time=None):
+        '''
+        Appends the parameters of a frame, which default to those of
+        ``sequence.mesh``, at a time after the last frame. The time
+        defaults to the last time plus one.
+        '''
+        if params is None:
+            params = self.mesh.params
+        params = numpy.asarray(params, dtype=float)
+        if params.shape != (self._params.shape[1],):
+            raise ValueError('Expected %d parameters, got %s' % (
+                self._params.shape[1], str(params.shape)))
+        num_frames = len(self)
+        if time is None:
+            time = 0. if num_frames == 0 else self._times[-1] + 1.
+        elif num_frames > 0 and time <= self._times[-1]:
+            raise ValueError('Frame times must increase')
+        self._params.resize(num_frames + 1, axis=0)
+        self._times.resize(num_frames + 1, axis=0)
+        self._params[num_frames] = params
+        self._times[num_frames] = time
+        self._h5.flush()
+        return num_frames
+
+    def frame(self, index):
+        '''
+        Returns the parameters of a frame.
+        '''
+        num_frames = len(self)
+        if index < 0:
+            index += num_frames
+        if index < 0 or index >= num_frames:
+            raise IndexError('Frame %d is out of range' % index)
+        return self._params[index]
+
+    def interpolate(self, time):
+        '''
+        Returns the parameters at a time interpolated linearly between
+        the frames before and after the time.
+        '''
+        times = self._times[...]
+        if times.size == 0 or time < times[0] or time > times[-1]:
+            raise ValueError('Time %s is outside the sequence' % str(time))
+        index = min(numpy.searchsorted(times, time, side='right') - 1,
+                    times.size - 1)
+        if times[index] == time:
+            return self._params[index]
+        params = self._params[index:index + 2]
+        w = (time - times[index]) / (times[index + 1] - times[index])
+        return (1 - w) * params[0] + w * params[1]
+
+    def load_frame(self, index):
+        '''
+        Loads the parameters of a frame into ``sequence.mesh`` and
+        returns the mesh.
+        '''
+        return self._load_params(self.frame(index))
+
+    def load_time(self, time):
+        '''
+        Loads the parameters at a time into ``sequence.mesh``, see
+        ``interpolate``, and returns the mesh.
+        '''
+        return self._load_params(self.interpolate(time))
+
+    def _load_params(self, params):
+        # The parameters are set in-place so the topology and the
+        # tessellations of the mesh stay valid.
+        self.mesh._core.P[:] = params
+        return self.mesh
@@ -12,10 +12,10 @@ class PCAMesh(object):
         self.mesh = None
 
     def add_mesh(self, mesh, index=0):
-        if self.input_mesh == None:
-            self.input_mesh = mesh
         if isinstance(mesh, str):
             mesh = morphic.Mesh(mesh)
+        if self.input_mesh == None:
+            self.input_mesh = mesh
         x = []
         if self.groups is None:
             for node in mesh.nodes:
@@ -27,6 +27,29 @@ class PCAMesh(object):
                     x.extend(node.values.flatten().tolist())
         self.X.append(x)
 
+    def add_meshes(self, filepaths, workers=None, processes=True):
+        """
+        Adds mesh files with the same topology, which are loaded in
+        parallel, see ``load_params``. Returns the errors of the files
+        which were not added.
+        """
+        mesh, P, errors = load_params(
+            filepaths, workers=workers, processes=processes)
+        if mesh is None:
+            return errors
+        if self.input_mesh == None:
+            self.input_mesh = mesh
+        cids = []
+        for node in mesh.nodes:
+            if self.groups is None:
+                if not isinstance(node, morphic.mesher.DepNode):
+                    cids.extend(node.cids)
+            elif node.in_group(self.groups):
+                cids.extend(node.cids)
+        loaded = [fp not in errors for fp in filepaths]
+        self.X.extend(P[loaded][:, cids].tolist())
+        return errors
+
     def generate(self, num_modes=5):
         from sklearn import decomposition
         self.X = numpy.array(self.X)
@@ -96,6 +119,121 @@ class PCAMesh(object):
             print('Cannot reshape this node when genrating pca mesh')
 
 
+def _load_mesh_params(filepath, kwargs):
+    # Loads a mesh file in a worker and returns its topology key and
+    # parameters.
+    mesh = morphic.Mesh(filepath, **kwargs)
+    return _topology_key(mesh), numpy.array(mesh.params)
+
+
+def _topology_key(mesh):
+    # A digest of the node and element ids, the element bases and nodes,
+    # and the element parameter map, which are equal for meshes with
+    # the same topology and parameter layout.
+    import hashlib
+    digest = hashlib.sha1()
+    if morphic.core.is_array_backed(mesh.nodes):
+        digest.update(mesh.nodes._ids.tobytes())
+    else:
+        digest.update(repr(list(mesh.nodes.ids)).encode('utf-8'))
+    if morphic.core.is_array_backed(mesh.elements):
+        data = mesh.elements.data
+        digest.update(mesh.elements._ids.tobytes())
+        digest.update(repr(data['basis']).encode('utf-8'))
+        digest.update(numpy.asarray(data['node_ids']).tobytes())
+    else:
+        for elem in mesh.elements:
+            digest.update(repr((elem.id, elem.basis, elem.node_ids)).encode(
+                'utf-8'))
+    if isinstance(mesh.core.EMap, numpy.ndarray):
+        digest.update(mesh.core.EMap.tobytes())
+    else:
+        digest.update(repr(mesh.core.EMap).encode('utf-8'))
+    digest.update(str(mesh.params.size).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_meshes(filepaths, workers=None, **kwargs):
+    """
+    Loads mesh files with a pool of at most ``workers`` threads, where
+    ``kwargs`` are passed to ``Mesh.load``, e.g., ``mmap`` or
+    ``element_groups``.
+
+    Returns ``(meshes, errors)`` where the meshes are in the order of
+    the files, with None for the files which failed to load, and
+    ``errors`` is a dictionary from these files to their exception.
+
+    >>> meshes, errors = load_meshes(filepaths, workers=8)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    filepaths = list(filepaths)
+    meshes = [None] * len(filepaths)
+    errors = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(morphic.Mesh, fp, **kwargs)
+                   for fp in filepaths]
+        for i, (filepath, future) in enumerate(zip(filepaths, futures)):
+            try:
+                meshes[i] = future.result()
+            except Exception as e:
+                errors[filepath] = e
+    return meshes, errors
+
+
+def load_params(filepaths, workers=None, processes=True, **kwargs):
+    """
+    Loads mesh files with the same topology, e.g., a cohort of fitted
+    meshes, with a pool of at most ``workers`` processes, or threads if
+    ``processes`` is False, where ``kwargs`` are passed to
+    ``Mesh.load``. Only the parameters are returned by the workers.
+
+    Returns ``(mesh, P, errors)`` where ``mesh`` is the mesh of the
+    first file that loaded, which is the shared topology, ``P`` is the
+    (files x parameters) matrix of the parameters of each file and
+    ``errors`` is a dictionary from the files which failed to load, or
+    have a different topology, to their exception. The rows of these
+    files are NaN.
+
+    >>> mesh, P, errors = load_params(filepaths, workers=8)
+    >>> mesh.core.P[:] = P.mean(0)
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    filepaths = list(filepaths)
+    errors = {}
+    mesh, key = None, None
+    for first, filepath in enumerate(filepaths):
+        try:
+            mesh = morphic.Mesh(filepath, **kwargs)
+            key = _topology_key(mesh)
+            break
+        except Exception as e:
+            errors[filepath] = e
+    if mesh is None:
+        return None, numpy.zeros((len(filepaths), 0)), errors
+
+    P = numpy.empty((len(filepaths), mesh.params.size))
+    P[:] = numpy.nan
+    P[first] = mesh.params
+    Executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with Executor(max_workers=workers) as executor:
+        futures = dict([
+            (i, executor.submit(_load_mesh_params, filepaths[i], kwargs))
+            for i in range(first + 1, len(filepaths))])
+        for i, future in futures.items():
+            try:
+                mesh_key, params = future.result()
+            except Exception as e:
+                errors[filepaths[i]] = e
+                continue
+            if mesh_key != key:
+                errors[filepaths[i]] = ValueError(
+                    'The topology of %s differs from %s' % (
+                        filepaths[i], mesh.filepath))
+            else:
+                P[i] = params
+    return mesh, P, errors
+
+
 def grid(divs=10, dims=2):
     if isinstance(divs, int):
         divs = [divs for i in range(dims)]
@@ -124,101 +262,148 @@ def element_dimensions(basis):
             dimensions += 1
     return dimensions
 
+def _merge_points(X, tol, num_fixed=0):
+    """
+    Returns the index of the point each point in X is merged into,
+    i.e., the nearest earlier point within ``tol`` which is not itself
+    merged, or the point itself. The first ``num_fixed`` points are
+    never merged.
+    """
+    from scipy.spatial import cKDTree
+    index = numpy.arange(X.shape[0])
+    pairs = cKDTree(X).query_pairs(tol, output_type='ndarray')
+    if pairs.shape[0] == 0:
+        return index
+    dist = numpy.sqrt(((X[pairs[:, 0]] - X[pairs[:, 1]]) ** 2).sum(1))
+    for i, j in pairs[numpy.lexsort((dist, pairs[:, 1]))].tolist():
+        if j >= num_fixed and index[j] == j and index[i] == i:
+            index[j] = i
+    return index
+
+
 def convert_hermite_lagrange(cHmesh, tol=1e-9, interpolation="cubicLagrange"):
+    """
+    Converts a cubic-Hermite mesh to a cubic or quadratic Lagrange mesh.
+    All the elements are evaluated at the Lagrange node xi in bulk and
+    coincident points, closer than ``tol``, are merged in one KD-tree
+    pass. The cubic-Hermite nodes are added first and numbered from 1,
+    followed by the new nodes in the order they appear in the elements.
+    """
     if isinstance(cHmesh, str):
         cHmesh = morphic.Mesh(cHmesh)
 
     if interpolation == "cubicLagrange":
-        Xi3d = numpy.mgrid[0:4, 0:4, 0:4] * (1./3.)
-        Xi3d = numpy.array([Xi3d[2, :, :].flatten(),
-                Xi3d[1, :, :].flatten(), Xi3d[0, :, :].flatten()]).T
-        Xi2d = numpy.mgrid[0:4, 0:4] * (1./3.)
-        Xi2d = numpy.array([Xi2d[1, :].flatten(), Xi2d[0, :].flatten()]).T
-        Xi1d = numpy.mgrid[0:4] * (1./3.)
-        Xi1d = Xi1d.flatten().T
+        order = 3
+    elif interpolation == "quadraticLagrange":
+        order = 2
+    morphic_basis = 'L%d' % order
 
-        morphic_basis = 'L3'
+    cHmesh.generate()
+    Xn = numpy.array([node.values[:, 0] for node in cHmesh.nodes])
+    num_nodes = Xn.shape[0]
+
+    elements = list(cHmesh.elements)
+    dims = numpy.array([element_dimensions(elem.basis) for elem in elements])
+    if not numpy.all((dims >= 1) & (dims <= 3)):
+        raise ValueError(
+            'Element conversion: element dimension not supported')
+    # The points are stored in element order so the merged nodes are
+    # numbered in the order they first appear in the elements.
+    num_element_points = (order + 1) ** dims
+    offsets = num_nodes + numpy.cumsum(num_element_points) - num_element_points
+    X = numpy.zeros((num_nodes + num_element_points.sum(), Xn.shape[1]))
+    X[:num_nodes] = Xn
+    groups = []
+    for d in numpy.unique(dims):
+        idx = numpy.nonzero(dims == d)[0]
+        xi = grid(order, d)
+        if d == 1:
+            xi = xi.reshape((xi.size, 1))
+        cids = [elements[i].cid for i in idx]
+        A = cHmesh.core.grid_weights_matrix(cids, xi)
+        points = offsets[idx][:, None] + numpy.arange(xi.shape[0])
+        X[points.ravel()] = A.dot(cHmesh.core.P).reshape((-1, X.shape[1]))
+        groups.append((d, idx, points))
+
+    index = _merge_points(X, tol, num_fixed=num_nodes)
+    keep = index == numpy.arange(index.size)
+    node_ids = numpy.cumsum(keep)
+    node_ids = node_ids[index]
 
-    elif interpolation == "quadraticLagrange":
-        Xi3d = numpy.mgrid[0:3, 0:3, 0:3] * (1. / 2.)
-        Xi3d = numpy.array([Xi3d[2, :, :].flatten(),
-                            Xi3d[1, :, :].flatten(),
-                            Xi3d[0, :, :].flatten()]).T
-        Xi2d = numpy.mgrid[0:3, 0:3] * (1. / 2.)
-        Xi2d = numpy.array([Xi2d[1, :].flatten(), Xi2d[0, :].flatten()]).T
-        Xi1d = numpy.mgrid[0:3] * (1. / 2.)
-        Xi1d = Xi1d.flatten().T
-
-        morphic_basis = 'L2'
-
-    X = []
-    
     mesh = morphic.Mesh() # lagrange mesh
     mesh.auto_add_faces = cHmesh.auto_add_faces
-    
-    nid = 0
-    eid = 0
-    # add cubic-Hermite nodes first to preserve node ids
-    for node in cHmesh.nodes:
-        nid += 1
-        xn = node.values[:, 0]
-        mesh.add_node(nid, xn)
-        X.append(xn)
-    
-    for element in cHmesh.elements:
-        element_nodes = []
-        from scipy.spatial import cKDTree
-        tree = cKDTree(X)
-        dims = element_dimensions(element.basis)
-        if dims == 1:
-            print("1D element conversion unchecked")
-            Xg = element.evaluate(Xi1d)
-            for xg in Xg:
-                r, index = tree.query(xg.tolist())
-                if r > tol:
-                    nid += 1
-                    mesh.add_node(nid, xg)
-                    X.append(xg)
-                    element_nodes.append(nid)
-                else:
-                    element_nodes.append(index + 1)
-            eid += 1
-            mesh.add_element(eid, [morphic_basis], element_nodes)
-        elif dims == 2:
-            print("2D element conversion unchecked")
-            Xg = element.evaluate(Xi2d)
-            for xg in Xg:
-                r, index = tree.query(xg.tolist())
-                if r > tol:
-                    nid += 1
-                    mesh.add_node(nid, xg)
-                    X.append(xg)
-                    element_nodes.append(nid)
-                else:
-                    element_nodes.append(index + 1)
-            eid += 1
-            mesh.add_element(eid, [morphic_basis, morphic_basis], element_nodes)
-        elif dims == 3:
-            Xg = element.evaluate(Xi3d)
-            for xg in Xg:
-                r, index = tree.query(xg.tolist())
-                if r > tol:
-                    nid += 1
-                    mesh.add_node(nid, xg)
-                    X.append(xg)
-                    element_nodes.append(nid)
-                else:
-                    element_nodes.append(index + 1)
-            eid += 1
-            mesh.add_element(
-                eid, [morphic_basis, morphic_basis, morphic_basis],
-                element_nodes)
-        else:
-            raise ValueError(
-                'Element conversion: element dimension not supported')
-    
+    mesh.add_stdnodes(numpy.arange(1, keep.sum() + 1), X[keep])
+    mesh.nodes.add_to_group(mesh.nodes.ids, '_default')
+    for d, idx, points in groups:
+        mesh.add_elements(idx + 1, [morphic_basis] * d, node_ids[points])
+    if mesh.auto_add_faces:
+        for element in mesh.elements:
+            element.add_faces()
+
     mesh.generate()
-    
+
+    return mesh
+
+
+def convert_lagrange_hermite(lmesh, res=4):
+    """
+    Converts a Lagrange mesh to a cubic-Hermite mesh with the same
+    element and corner node ids. The cubic-Hermite node values and
+    derivatives are a sparse least-squares fit to the Lagrange mesh
+    evaluated on a grid of ``res`` divisions over each element. The
+    sparse normal equations are factorised once and solved for each
+    field.
+    """
+    import scipy.sparse.linalg
+    if isinstance(lmesh, str):
+        lmesh = morphic.Mesh(lmesh)
+    lmesh.generate()
+
+    elements = list(lmesh.elements)
+    corners = []
+    for elem in elements:
+        dims = len(elem.basis)
+        num = [int(basis[1]) + 1 for basis in elem.basis]
+        stride = numpy.cumprod([1] + num[:-1])
+        local = grid(1, dims).reshape((-1, dims))
+        local = (local * (numpy.array(num) - 1) * stride).sum(1)
+        corners.append([elem.node_ids[i] for i in local.astype(int)])
+    if len(set([len(nids) for nids in corners])) > 1:
+        raise ValueError('Elements must have the same dimensions')
+    node_ids = list(dict.fromkeys([nid for nids in corners for nid in nids]))
+    dims = len(elements[0].basis)
+    num_fields = elements[0].nodes[0].num_fields
+
+    mesh = morphic.Mesh()
+    mesh.auto_add_faces = lmesh.auto_add_faces
+    mesh.add_stdnodes(node_ids,
+                      numpy.zeros((len(node_ids), num_fields, 2 ** dims)))
+    mesh.add_elements([elem.id for elem in elements], ['H3'] * dims, corners)
+    if mesh.auto_add_faces:
+        for element in mesh.elements:
+            element.add_faces()
+    mesh.generate()
+
+    xi = grid(res, dims)
+    if dims == 1:
+        xi = xi.reshape((xi.size, 1))
+    X = lmesh.core.grid_weights_matrix(
+        [elem.cid for elem in elements], xi).dot(lmesh.core.P)
+    # The fields have the same weights so the normal equations of the
+    # first field are built once and solved for each field.
+    num_components = 2 ** dims
+    cids = (num_fields * num_components * numpy.arange(len(node_ids))[:, None] +
+            numpy.arange(num_components)).ravel()
+    A = mesh.core.grid_weights_matrix(
+        [elem.cid for elem in mesh.elements], xi)[::num_fields][:, cids]
+    M = A.T.dot(A).tocsc()
+    B = A.T.dot(X.reshape((-1, num_fields)))
+    solve = scipy.sparse.linalg.factorized(M)
+    for field in range(num_fields):
+        mesh.core.P[cids + field * num_components] = solve(B[:, field])
+    mesh._reupdate = True
+    mesh.update()
+
     return mesh
 
 def export_json(array):
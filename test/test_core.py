@@ -148,6 +148,51 @@ class TestCore(unittest.TestCase):
         c.generate_fixed_index()
         npt.assert_equal(c.idx_unfixed, [0, 2])
         
+    def test_weights_matrix(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0., 0.])
+        mesh.add_stdnode(2, [1., 0.2])
+        mesh.add_stdnode(3, [0.1, 1.])
+        mesh.add_stdnode(4, [1.3, 1.1])
+        mesh.add_stdnode(5, [2., 0.])
+        mesh.add_stdnode(6, [2.2, 1.])
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        mesh.add_element(2, ['L1', 'L1'], [2, 5, 4, 6])
+        mesh.generate()
+        c = mesh.core
+        xi = numpy.array([[0.1, 0.7], [0.5, 0.5], [0.9, 0.2]])
+        cids = [0, 1, 0]
+        A = c.weights_matrix(cids, xi)
+        X = A.dot(c.P).reshape((3, 2))
+        for i, cid in enumerate(cids):
+            npt.assert_almost_equal(X[i], c.evaluate(cid, xi[i:i + 1])[0])
+        A = c.weights_matrix(cids, xi, deriv=[1, 0])
+        X = A.dot(c.P).reshape((3, 2))
+        for i, cid in enumerate(cids):
+            npt.assert_almost_equal(
+                X[i], c.evaluate(cid, xi[i:i + 1], deriv=[1, 0])[0])
+
+    def test_grid_weights_matrix(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0., 0.])
+        mesh.add_stdnode(2, [1., 0.2])
+        mesh.add_stdnode(3, [2., 0.])
+        mesh.add_stdnode(4, [0.5, 0.5])
+        mesh.add_element(1, ['L1'], [1, 2])
+        mesh.add_element(2, ['L2'], [2, 4, 3])
+        mesh.generate()
+        c = mesh.core
+        xi = numpy.array([[0.], [0.25], [1.]])
+        A = c.grid_weights_matrix([1, 0], xi)
+        X = A.dot(c.P).reshape((6, 2))
+        npt.assert_almost_equal(X[:3], c.evaluate(1, xi))
+        npt.assert_almost_equal(X[3:], c.evaluate(0, xi))
+        A = c.grid_weights_matrix([1, 0], xi, offsets=[4, 0], num_points=7)
+        X = A.dot(c.P).reshape((7, 2))
+        npt.assert_almost_equal(X[4:], c.evaluate(1, xi))
+        npt.assert_almost_equal(X[:3], c.evaluate(0, xi))
+        npt.assert_almost_equal(X[3], [0, 0])
+
     #~ def test_get_variables(self):
         #~ c = core.Core()
         #~ cids = c.add_params(numpy.array([3, 6, 9, 5, 2]))
@@ -1,4 +1,5 @@
 import unittest
+import numpy
 import morphic
 import numpy.testing as npt
 
@@ -49,5 +50,88 @@ class TestData(unittest.TestCase):
         self.assertEqual(m.scans, ['foot', 'brain'])
 
 
+class TestPointReaders(unittest.TestCase):
+    """Unit tests for the point cloud readers."""
+
+    X = numpy.array([[0, 0, 0], [1, 0, 0.5], [0, 1, 0.25], [1, 1, 2]])
+
+    def test_vtk_trailing_cells(self):
+        with open('data/points.vtk', 'w') as f:
+            f.write('# vtk DataFile Version 3.0\npoints\nASCII\n'
+                    'DATASET POLYDATA\nPOINTS 4 double\n'
+                    '0 0 0 1 0 0.5\n0 1 0.25\n1 1 2\nVERTICES 1 2\n1 0\n')
+        npt.assert_equal(morphic.Data('data/points.vtk').values, self.X)
+
+    def test_binary_vtk(self):
+        with open('data/points.vtk', 'wb') as f:
+            f.write(b'# vtk DataFile Version 3.0\npoints\nBINARY\n'
+                    b'DATASET POLYDATA\nPOINTS 4 float\n')
+            f.write(self.X.astype('>f4').tobytes())
+        npt.assert_equal(morphic.Data('data/points.vtk').values, self.X)
+
+    def test_ply(self):
+        header = ('ply\nformat %s 1.0\nelement vertex 4\n'
+                  'property float x\nproperty float y\nproperty float z\n'
+                  'property uchar red\nelement face 1\n'
+                  'property list uchar int vertex_indices\nend_header\n')
+        with open('data/points.ply', 'w') as f:
+            f.write(header % 'ascii')
+            for x in self.X:
+                f.write('%g %g %g 255\n' % tuple(x))
+            f.write('3 0 1 2\n')
+        npt.assert_equal(morphic.Data('data/points.ply').values, self.X)
+
+        dtype = numpy.dtype([('x', '>f4'), ('y', '>f4'), ('z', '>f4'),
+                             ('red', 'u1')])
+        vertices = numpy.zeros(4, dtype=dtype)
+        vertices['x'], vertices['y'], vertices['z'] = self.X.T
+        with open('data/points.ply', 'wb') as f:
+            f.write((header % 'binary_big_endian').encode())
+            f.write(vertices.tobytes())
+        npt.assert_equal(morphic.Data('data/points.ply').values, self.X)
+
+    def test_stl(self):
+        triangles = [[0, 1, 2], [1, 3, 2]]
+        dtype = numpy.dtype([('normal', '<f4', 3), ('vertices', '<f4', 9),
+                             ('attribute', '<u2')])
+        facets = numpy.zeros(2, dtype=dtype)
+        facets['vertices'] = self.X[triangles].reshape((2, 9))
+        with open('data/points.stl', 'wb') as f:
+            f.write(b'solid binary'.ljust(80, b' '))
+            f.write(numpy.array([2], dtype='<u4').tobytes())
+            f.write(facets.tobytes())
+        npt.assert_equal(morphic.Data('data/points.stl').values, self.X)
+
+        # binary files with trailing bytes or non-ASCII bytes
+        facets['normal'] = 1e38
+        with open('data/points.stl', 'wb') as f:
+            f.write(b'\xff binary'.ljust(80, b' '))
+            f.write(numpy.array([2], dtype='<u4').tobytes())
+            f.write(facets.tobytes() + b'\xff\xfe')
+        npt.assert_equal(morphic.Data('data/points.stl').values, self.X)
+        with open('data/points.stl', 'wb') as f:
+            f.write(b'solid binary'.ljust(80, b' '))
+            f.write(numpy.array([3], dtype='<u4').tobytes())
+            f.write(facets.tobytes())
+        self.assertRaises(ValueError, morphic.Data, 'data/points.stl')
+
+        with open('data/points.stl', 'w') as f:
+            f.write('solid ascii\n')
+            for triangle in triangles:
+                f.write('facet normal 0 0 1\nouter loop\n')
+                for x in self.X[triangle]:
+                    f.write('vertex %g %g %g\n' % tuple(x))
+                f.write('endloop\nendfacet\n')
+            f.write('endsolid ascii\n')
+        npt.assert_equal(morphic.Data('data/points.stl').values, self.X)
+
+    def test_xyz(self):
+        with open('data/points.xyz', 'w') as f:
+            f.write('# x y z intensity\n')
+            for x in self.X:
+                f.write('%g %g %g 0.5\n' % tuple(x))
+        npt.assert_equal(morphic.Data('data/points.xyz').values, self.X)
+
+
 if __name__ == "__main__":
     unittest.main()
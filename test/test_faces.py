@@ -144,6 +144,134 @@ class TestFace(unittest.TestCase):
         self.assertTrue('_2_3_7_22' in mesh.faces.keys())
         face = mesh.faces['_2_3_7_22']
         self.assertEqual(face.element_faces, [[1, 1], [2, 4]])
-    
+
+
+class TestMeshFaces(unittest.TestCase):
+    """Unit tests for evaluating element faces."""
+
+    def setUp(self):
+        self.mesh = morphic.Mesh()
+        nid = 0
+        for z in [0, 1]:
+            for y in [0, 1]:
+                for x in [0, 1, 2]:
+                    nid += 1
+                    self.mesh.add_stdnode(nid, [x + 0.1 * y, y + 0.2 * z * x, z])
+        self.mesh.add_element(1, ['L1', 'L1', 'L1'], [1, 2, 4, 5, 7, 8, 10, 11])
+        self.mesh.add_element(2, ['L1', 'L1', 'L1'], [2, 3, 5, 6, 8, 9, 11, 12])
+        self.mesh.generate()
+
+    def test_face_xi(self):
+        xi = numpy.array([[0.1, 0.2], [0.3, 0.4]])
+        npt.assert_equal(core.face_xi(0, xi), [[0.1, 0.2, 0], [0.3, 0.4, 0]])
+        npt.assert_equal(core.face_xi(1, xi), [[0.1, 0.2, 1], [0.3, 0.4, 1]])
+        npt.assert_equal(core.face_xi(2, xi), [[0.1, 0, 0.2], [0.3, 0, 0.4]])
+        npt.assert_equal(core.face_xi(3, xi), [[0.1, 1, 0.2], [0.3, 1, 0.4]])
+        npt.assert_equal(core.face_xi(4, xi), [[0, 0.1, 0.2], [0, 0.3, 0.4]])
+        npt.assert_equal(core.face_xi(5, xi), [[1, 0.1, 0.2], [1, 0.3, 0.4]])
+
+    def test_face_weights_cache(self):
+        c = self.mesh.core
+        Phi = c.face_weights(['L1', 'L1', 'L1'], 3, 4)
+        self.assertEqual(Phi.shape, (25, 8))
+        self.assertTrue(Phi is c.face_weights(['L1', 'L1', 'L1'], 3, 4))
+
+    def test_get_faces(self):
+        X, T, Xi = self.mesh.get_faces(res=3, include_xi=True)
+        self.assertEqual(X.shape, (160, 3))
+        self.assertEqual(T.shape, (180, 3))
+        ind = 0
+        for face in self.mesh.faces:
+            if len(face.element_faces) == 1:
+                eid, face_index = face.element_faces[0]
+                npt.assert_almost_equal(
+                    X[ind:ind + 16],
+                    self.mesh.evaluate(eid, core.face_xi(face_index, Xi[ind:ind + 16])))
+                ind += 16
+
+
+class TestTopology(unittest.TestCase):
+    """Unit tests for the canonical face topology."""
+
+    def build_mesh(self, flip=False):
+        mesh = morphic.Mesh()
+        nid = 0
+        for z in [0, 1]:
+            for y in [0, 1]:
+                for x in [0, 1, 2]:
+                    nid += 1
+                    mesh.add_stdnode(nid, [x, y, z])
+        mesh.add_element(1, ['L1', 'L1', 'L1'], [1, 2, 4, 5, 7, 8, 10, 11])
+        if flip:
+            # same element with xi2 reversed
+            mesh.add_element(2, ['L1', 'L1', 'L1'], [5, 6, 2, 3, 11, 12, 8, 9])
+        else:
+            mesh.add_element(2, ['L1', 'L1', 'L1'], [2, 3, 5, 6, 8, 9, 11, 12])
+        mesh.generate()
+        return mesh
+
+    def test_shared_face(self):
+        for flip in [False, True]:
+            topology = self.build_mesh(flip).topology()
+            faces = topology.faces
+            self.assertEqual(faces.size, 11)
+            npt.assert_equal(faces.entry_id[:6], range(6))
+            self.assertEqual(len(topology.exterior_faces()), 10)
+            self.assertEqual(len(topology.exterior_faces(elements=[2])), 5)
+            shared = faces.entry_id[faces.count[faces.entry_id] == 2]
+            self.assertEqual(topology.face_elements(shared[0]), [[1, 5], [2, 4]])
+            npt.assert_equal(topology.element_neighbours(), [[0, 1]])
+
+    def test_shared_edges(self):
+        for flip in [False, True]:
+            edges = self.build_mesh(flip).topology().edges
+            self.assertEqual(edges.size, 20)
+            npt.assert_equal(edges.entry_id[:12], range(12))
+            self.assertEqual((edges.count == 2).sum(), 4)
+
+    def test_edge_nodes(self):
+        nodes = core.element_edge_nodes(['L1', 'L1', 'L1'], list(range(8)))
+        self.assertEqual(nodes[:4], [[0, 1], [2, 3], [0, 2], [1, 3]])
+        self.assertEqual(nodes[4:8], [[4, 5], [6, 7], [4, 6], [5, 7]])
+        self.assertEqual(nodes[8:], [[0, 4], [1, 5], [2, 6], [3, 7]])
+        nodes = core.element_edge_nodes(['L2', 'L1'], list(range(6)))
+        self.assertEqual(nodes, [[0, 1, 2], [3, 4, 5], [0, 3], [2, 5]])
+
+    def test_get_edges(self):
+        mesh = self.build_mesh(True)
+        X, L, Xi = mesh.get_edges(res=3, include_xi=True)
+        self.assertEqual(X.shape, (20 * 3, 3))
+        self.assertEqual(L.shape, (20 * 2, 2))
+        npt.assert_equal(L[:2], [[0, 1], [1, 2]])
+        npt.assert_almost_equal(X[:3], [[0, 0, 0], [0.5, 0, 0], [1, 0, 0]])
+        npt.assert_almost_equal(Xi[:3, 0], [0, 0.5, 1])
+        self.assertEqual(mesh.get_edges(res=3, elements=[2])[0].shape[0], 12 * 3)
+        edges = mesh.topology().edges
+        entry_ids = edges.first_entries()
+        for i in range(edges.size):
+            eid = mesh.topology().element_ids[edges.entry_element[entry_ids[i]]]
+            xi = core.edge_xi(edges.entry_local[entry_ids[i]], Xi[3 * i:3 * i + 3], 3)
+            npt.assert_almost_equal(X[3 * i:3 * i + 3], mesh.evaluate(eid, xi))
+
+    def test_get_faces_flipped(self):
+        X, T = self.build_mesh(True).get_faces(res=2)
+        self.assertEqual(X.shape[0], 10 * 9)
+
+    def test_mixed_bases(self):
+        mesh = morphic.Mesh()
+        for nid in range(1, 7):
+            mesh.add_stdnode(nid, [nid, 0])
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        mesh.add_element(2, ['T11'], [4, 5, 6])
+        mesh.add_element(3, ['L1'], [5, 6])
+        topology = mesh.topology()
+        self.assertEqual(topology.faces.size, 2)
+        npt.assert_equal(topology.faces.count, [1, 1])
+        self.assertEqual(topology.edges.size, 5)
+        # the triangle edges are skipped
+        X, L = mesh.get_edges(res=2, elements=[2, 3])
+        self.assertEqual(L.shape, (1, 2))
+
+
 if __name__ == "__main__":
     unittest.main()
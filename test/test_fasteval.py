@@ -163,5 +163,43 @@ class TestFastEval(unittest.TestCase):
         npt.assert_almost_equal(dx_matrix, x2 - x1)
 
 
+class TestEmbeddedPoints(unittest.TestCase):
+    """Unit tests for points embedded in a host mesh."""
+
+    def setUp(self):
+        self.mesh = mesher.Mesh()
+        nid = 0
+        for z in [0., 1.]:
+            for y in [0., 1.]:
+                for x in [0., 2.]:
+                    nid += 1
+                    self.mesh.add_stdnode(nid, [x, y + 0.1 * x, z])
+        self.mesh.add_element(1, ['L1', 'L1', 'L1'], list(range(1, 9)))
+        self.mesh.generate()
+        self.xi = np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5], [0.9, 0.1, 0.7]])
+
+    def test_evaluate(self):
+        embedding = fasteval.EmbeddedPoints(self.mesh, 1, self.xi)
+        npt.assert_almost_equal(
+            embedding.evaluate(), self.mesh.evaluate(1, self.xi))
+
+    def test_deform(self):
+        embedding = fasteval.EmbeddedPoints(self.mesh, [1, 1, 1], self.xi)
+        X0 = embedding.evaluate()
+        npt.assert_almost_equal(
+            embedding.deformation_gradient(), [np.eye(3)] * 3)
+
+        F = np.array([[1.2, 0.1, 0.], [0., 0.9, 0.3], [0.1, 0., 1.1]])
+        params = self.mesh.params.copy()
+        params[:] = np.dot(params.reshape((8, 3)), F.T).flatten() + 0.5
+        npt.assert_almost_equal(embedding.evaluate(params),
+                                np.dot(X0, F.T) + 0.5)
+        npt.assert_almost_equal(embedding.deformation_gradient(params),
+                                [F] * 3)
+
+        self.mesh.core.P[:] = params
+        npt.assert_almost_equal(embedding.evaluate(), np.dot(X0, F.T) + 0.5)
+
+
 if __name__ == "__main__":
     unittest.main()
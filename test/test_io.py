@@ -11,6 +11,7 @@ import numpy.testing as npt
 
 sys.path.append('..')
 from morphic import mesher
+from morphic import core
         
 @ddt.ddt
 class TestPyTablesMesh(unittest.TestCase):
@@ -199,5 +200,304 @@ class TestPyTablesMesh(unittest.TestCase):
         compare_elem_groups(mesh0, mesh1, 'hypotenuse')
         compare_elem_groups(mesh0, mesh1, 'loop')
 
+
+class TestPyTablesLoader(unittest.TestCase):
+    """Unit tests for the columnar pytables loader."""
+
+    def test_array_backed(self):
+        filepath = 'data/pytables.mesh'
+        X = numpy.array([[0, 0], [1, 0], [2, 0], [0, 1], [1, 1], [2, 1.]])
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnodes(numpy.arange(1, 7), X)
+        mesh0.add_elements([1, 2], ['L1', 'L1'], [[1, 2, 4, 5], [2, 3, 5, 6]])
+        mesh0.nodes.add_to_group([1, 4], 'left')
+        mesh0.generate()
+        mesh0.save(filepath, format='pytables')
+
+        mesh1 = mesher.Mesh(filepath)
+        self.assertFalse(mesh1.nodes.materialised)
+        self.assertFalse(mesh1.elements.materialised)
+        self.assertEqual(sorted(mesh1.nodes._created.keys()), [0, 3])
+        self.assertEqual(mesh1.elements._created, {})
+        self.assertEqual(sorted(mesh1.nodes.get_group_ids('left')), [1, 4])
+        npt.assert_equal(mesh1.core.P, mesh0.core.P)
+        npt.assert_equal(mesh1.core.EMap, mesh0.core.EMap)
+        npt.assert_equal(mesh1.nodes[5].values, [1, 1])
+        self.assertEqual(mesh1.elements[2].node_ids, [2, 3, 5, 6])
+
+    def test_deferred_faces(self):
+        filepath = 'data/pytables.mesh'
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnode(1, [0, 0])
+        mesh0.add_stdnode('2', [1, 0])
+        mesh0.add_stdnode(3, [0, 1])
+        mesh0.add_stdnode(4, [1, 1])
+        mesh0.add_element(1, ['L1', 'L1'], [1, '2', 3, 4])
+        mesh0.generate()
+        mesh0.save(filepath, format='pytables')
+
+        mesh1 = mesher.Mesh(filepath)
+        self.assertTrue('_populate' in mesh1.faces.__dict__)
+        self.assertEqual(list(mesh1.faces.keys()), list(mesh0.faces.keys()))
+        self.assertEqual(mesh1.nodes['2'].cids.tolist(), [2, 3])
+        npt.assert_almost_equal(mesh1.evaluate([1], [[0.5, 0.5]]),
+                                [[0.5, 0.5]])
+
+
+class TestH5pyLoader(unittest.TestCase):
+    """Unit tests for the columnar h5py layout."""
+
+    def test_array_backed(self):
+        filepath = 'data/h5py.mesh'
+        X = numpy.array([[0, 0], [1, 0], [2, 0], [0, 1], [1, 1], [2, 1.]])
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnodes(numpy.arange(1, 7), X)
+        mesh0.add_elements([1, 2], ['L1', 'L1'], [[1, 2, 4, 5], [2, 3, 5, 6]])
+        mesh0.generate()
+        mesh0.save(filepath, format='h5py')
+        self.assertFalse(mesh0.nodes.materialised)
+        self.assertEqual(mesh0.elements._created, {})
+
+        mesh1 = mesher.Mesh(filepath)
+        self.assertFalse(mesh1.nodes.materialised)
+        self.assertFalse(mesh1.elements.materialised)
+        npt.assert_equal(mesh1.core.P, mesh0.core.P)
+        npt.assert_equal(mesh1.core.EMap, mesh0.core.EMap)
+        self.assertEqual(mesh1.elements[2].node_ids, [2, 3, 5, 6])
+
+    def test_unicode_ids(self):
+        filepath = 'data/h5py.mesh'
+        mesh0 = mesher.Mesh(label='maillage')
+        mesh0.add_stdnode('nœud', [0, 0])
+        mesh0.add_stdnode(2, [1, 0])
+        mesh0.add_element('élément', ['L1'], ['nœud', 2])
+        mesh0.generate()
+        mesh0.save(filepath, format='h5py')
+
+        mesh1 = mesher.Mesh(filepath)
+        self.assertEqual(list(mesh1.nodes.keys()), ['nœud', 2])
+        self.assertEqual(mesh1.elements['élément'].node_ids, ['nœud', 2])
+
+    def test_legacy_layout(self):
+        import h5py
+        filepath = 'data/h5py.mesh'
+        h5 = h5py.File(filepath, 'w')
+        h5mesh = h5.create_group('mesh')
+        h5mesh.attrs['label'] = 'legacy'
+        h5mesh.create_dataset('params', data=[0., 0., 1., 0., 0., 1.])
+        h5nodes = h5mesh.create_group('nodes')
+        h5nodes.attrs['size'] = 3
+        for nn, nid in enumerate([1, 2, 3]):
+            h5node = h5nodes.create_group(str(nn))
+            h5node.attrs['id'] = nid
+            h5node.attrs['type'] = 'standard'
+            h5node.attrs['shape'] = [2, 1]
+            h5node.create_dataset('pids', data=[2 * nn, 2 * nn + 1])
+        h5elems = h5mesh.create_group('elements')
+        h5elems.attrs['size'] = 1
+        h5elem = h5elems.create_group('0')
+        h5elem.attrs['id'] = 1
+        h5elem.attrs['basis'] = ['L1']
+        h5elem.create_dataset('node_ids', data=[0, 1])
+        h5groups = h5mesh.create_group('node_groups')
+        h5groups.attrs['size'] = 1
+        h5group = h5groups.create_group('0')
+        h5group.attrs['id'] = 'ends'
+        h5group.create_dataset('node_ids', data=[0, 2])
+        h5mesh.create_group('element_groups').attrs['size'] = 0
+        h5.close()
+
+        mesh = mesher.Mesh(filepath)
+        self.assertEqual(mesh.label, 'legacy')
+        self.assertEqual(mesh.elements[1].basis, ['L1'])
+        self.assertEqual(sorted(mesh.nodes.get_group_ids('ends')), [1, 3])
+        npt.assert_almost_equal(mesh.evaluate([1], [[0.5]]), [[0.5, 0.]])
+
+
+class TestMemoryMappedParams(unittest.TestCase):
+    """Unit tests for memory-mapping the parameters of a mesh."""
+
+    def create_mesh(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnodes([1, 2, 3], [[0, 0], [1, 0.5], [2, 0.3]])
+        mesh.add_elements([1, 2], ['L1'], [[1, 2], [2, 3]])
+        mesh.generate()
+        return mesh
+
+    def test_mmap(self):
+        mesh0 = self.create_mesh()
+        for value in ['pytables', 'h5py']:
+            filepath = 'data/%s.mesh' % (value)
+            mesh0.save(filepath, format=value, compress_params=False)
+
+            mesh1 = mesher.Mesh(filepath, mmap=True)
+            self.assertTrue(isinstance(mesh1.core.P, numpy.memmap))
+            npt.assert_equal(mesh1.core.P, mesh0.core.P)
+            npt.assert_almost_equal(mesh1.evaluate([2], [[0.5]]),
+                                    [[1.5, 0.4]])
+
+            mesh1.nodes[1].values = numpy.array([5., 5.])
+            npt.assert_equal(mesh1.nodes[1].values, [5, 5])
+            mesh2 = mesher.Mesh(filepath, mmap=True)
+            npt.assert_equal(mesh2.core.P, mesh0.core.P)
+
+    def test_compressed_params(self):
+        mesh0 = self.create_mesh()
+        for value in ['pytables', 'h5py']:
+            filepath = 'data/%s.mesh' % (value)
+            mesh0.save(filepath, format=value)
+
+            mesh1 = mesher.Mesh(filepath, mmap=True)
+            self.assertFalse(isinstance(mesh1.core.P, numpy.memmap))
+            npt.assert_equal(mesh1.core.P, mesh0.core.P)
+
+
+class TestPartialLoad(unittest.TestCase):
+    """Unit tests for loading the elements in element groups."""
+
+    def test_element_groups(self):
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnode(1, [0., 0.])
+        mesh0.add_stdnode('2', [1., 0.])
+        mesh0.add_stdnode(3, [0., 1.])
+        mesh0.add_stdnode(4, [1., 1.])
+        mesh0.add_stdnode(5, [2., 0.1])
+        mesh0.add_element(1, ['L1', 'L1'], [1, '2', 3, 4])
+        mesh0.add_element('tail', ['L1'], ['2', 5])
+        mesh0.elements.add_to_group(1, 'square')
+        mesh0.elements.add_to_group('tail', 'tail')
+        mesh0.nodes.add_to_group([5, 1], 'ends')
+        mesh0.generate()
+        for value in ['pytables', 'h5py']:
+            filepath = 'data/%s.mesh' % (value)
+            mesh0.save(filepath, format=value)
+
+            mesh1 = mesher.Mesh(filepath, element_groups=['tail'])
+            self.assertEqual(list(mesh1.nodes.ids), ['2', 5])
+            self.assertEqual(list(mesh1.elements.ids), ['tail'])
+            npt.assert_equal(mesh1.core.P, [1, 0, 2, 0.1])
+            self.assertEqual(mesh1.nodes.get_group_ids('ends'), [5])
+            self.assertEqual(list(mesh1.elements.groups.keys()), ['tail'])
+            npt.assert_almost_equal(mesh1.evaluate(['tail'], [[0.5]]),
+                                    [[1.5, 0.05]])
+
+            mesh2 = mesher.Mesh(filepath, element_groups='unknown')
+            self.assertEqual(mesh2.elements.size(), 0)
+            self.assertEqual(mesh2.core.P.size, 0)
+
+    def test_dependent_nodes(self):
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnode(1, [0., 0.])
+        mesh0.add_stdnode('2', [1., 0.])
+        mesh0.add_stdnode(3, [0., 1.])
+        mesh0.add_stdnode(4, [1., 1.])
+        mesh0.add_stdnode(5, [2., 0.1])
+        mesh0.add_element(1, ['L1', 'L1'], [1, '2', 3, 4], group='square')
+        mesh0.add_element('tail', ['L1'], ['2', 5], group='tail')
+        mesh0.add_stdnode('xi6', [0.5])
+        mesh0.add_depnode(6, 'tail', 'xi6')
+        mesh0.add_stdnode('xi7', [0.5, 1.])
+        mesh0.add_depnode(7, 1, 'xi7')
+        mesh0.add_element('tip', ['L1'], [7, 6], group='tail')
+        mesh0.generate()
+        for value in ['pytables', 'h5py']:
+            filepath = 'data/%s.mesh' % (value)
+            mesh0.save(filepath, format=value)
+
+            mesh1 = mesher.Mesh(filepath, element_groups='tail')
+            self.assertEqual(sorted(map(str, mesh1.nodes.ids)),
+                             ['2', '5', '6', '7', 'xi6'])
+            self.assertEqual(mesh1.nodes[6]._type, 'dependent')
+            self.assertEqual(mesh1.nodes[6].element, 'tail')
+            self.assertEqual(mesh1.nodes[6].node, 'xi6')
+            self.assertEqual(mesh1.nodes[7]._type, 'standard')
+            npt.assert_almost_equal(mesh1.nodes[7].values, [0.5, 1.])
+            npt.assert_almost_equal(mesh1.get_nodes([6]), [[1.5, 0.05]])
+            npt.assert_almost_equal(mesh1.evaluate(['tip'], [[0.5]]),
+                                    [[1., 0.525]])
+
+    def test_array_backed(self):
+        mesh0 = mesher.Mesh()
+        X = numpy.array([[i, j] for j in range(3) for i in range(4)], float)
+        mesh0.add_stdnodes(numpy.arange(1, 13), X)
+        node_ids = [[n, n + 1, n + 4, n + 5] for n in [1, 2, 3, 5, 6, 7]]
+        mesh0.add_elements(numpy.arange(1, 7), ['L1', 'L1'], node_ids)
+        mesh0.elements.add_to_group([5, 6], 'corner')
+        mesh0.generate()
+        for value in ['pytables', 'h5py']:
+            filepath = 'data/%s.mesh' % (value)
+            mesh0.save(filepath, format=value)
+
+            mesh1 = mesher.Mesh(filepath, element_groups='corner')
+            self.assertTrue(core.is_array_backed(mesh1.nodes))
+            self.assertEqual(list(mesh1.nodes.ids), [6, 7, 8, 10, 11, 12])
+            self.assertEqual(mesh1.elements[6].node_ids, [7, 8, 11, 12])
+            npt.assert_equal(mesh1.core.P, X[[5, 6, 7, 9, 10, 11]].ravel())
+
+
+class TestNumpyFormat(unittest.TestCase):
+    """Unit tests for the numpy mesh format."""
+
+    def test_magic_number(self):
+        filepath = 'data/numpy.mesh'
+        mesh0 = mesher.Mesh(label='square')
+        mesh0.add_stdnodes([1, 2, 3, 4], [[0, 0], [1, 0], [0, 1], [1, 1]])
+        mesh0.add_elements([1], ['L1', 'L1'], [[1, 2, 3, 4]])
+        mesh0.generate()
+        mesh0.save(filepath, format='numpy')
+        with open(filepath, 'rb') as f:
+            self.assertEqual(f.read(8), b'\x93MORPHIC')
+
+        mesh1 = mesher.Mesh(filepath)
+        self.assertEqual(mesh1.label, 'square')
+        self.assertFalse(isinstance(mesh1.core.P, numpy.memmap))
+        npt.assert_equal(mesh1.core.P, mesh0.core.P)
+        npt.assert_equal(mesh1.core.EMap, mesh0.core.EMap)
+
+    def test_mmap(self):
+        filepath = 'data/numpy.mesh'
+        mesh0 = mesher.Mesh()
+        mesh0.add_stdnode(1, [0., 0.])
+        mesh0.add_stdnode('2', [1., 0.])
+        mesh0.add_stdnode(3, [2., 0.5])
+        mesh0.add_element(1, ['L1'], [1, '2'])
+        mesh0.add_element(2, ['L1'], ['2', 3])
+        mesh0.elements.add_to_group(2, 'right')
+        mesh0.generate()
+        mesh0.save(filepath, format='numpy')
+
+        mesh1 = mesher.Mesh(filepath, mmap=True)
+        self.assertTrue(isinstance(mesh1.core.P, numpy.memmap))
+        npt.assert_equal(mesh1.core.P, mesh0.core.P)
+        mesh1.nodes[1].values = numpy.array([5., 5.])
+        npt.assert_equal(mesher.Mesh(filepath).core.P, mesh0.core.P)
+
+        mesh2 = mesher.Mesh(filepath, mmap=True, element_groups='right')
+        self.assertEqual(list(mesh2.nodes.ids), ['2', 3])
+        npt.assert_almost_equal(mesh2.evaluate([2], [[0.5]]), [[1.5, 0.25]])
+
+    def test_json_metadata(self):
+        filepath = 'data/numpy.mesh'
+        mesh0 = mesher.Mesh()
+        mesh0.metadata.name = 'Joe Bloggs'
+        mesh0.metadata.dict4 = {'a': 1, 'b': [2.5, 'c']}
+        mesh0.add_stdnode(1, [0.5])
+        mesh0.generate()
+        mesh0.save(filepath, format='numpy')
+        attrs, arrays = mesher._read_numpy_file(filepath)
+        self.assertEqual(attrs['metadata']['dict4'], {'a': 1, 'b': [2.5, 'c']})
+        self.assertFalse('metadata' in arrays)
+
+        mesh0.metadata.shape = (2, 3)
+        mesh0.metadata.X = numpy.array([1., 2.])
+        mesh0.save(filepath, format='numpy')
+        attrs, arrays = mesher._read_numpy_file(filepath)
+        self.assertEqual(sorted(attrs['metadata'].keys()), ['dict4', 'name'])
+        mesh1 = mesher.Mesh(filepath)
+        self.assertEqual(mesh1.metadata.name, 'Joe Bloggs')
+        self.assertEqual(mesh1.metadata.shape, (2, 3))
+        npt.assert_equal(mesh1.metadata.X, [1., 2.])
+
+
 if __name__ == "__main__":
     unittest.main()
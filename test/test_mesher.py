@@ -10,6 +10,7 @@ import numpy.testing as npt
 sys.path.append('..')
 from morphic import core
 from morphic import mesher
+from morphic import discretizer
 
 
 class TestElementIntegration(unittest.TestCase):
@@ -1491,5 +1492,694 @@ class TestMeshEvaluate(unittest.TestCase):
         npt.assert_almost_equal(x, [[1.5, 1.5, 1], [1.2, 1.8, 0.4]])
 
 
+class TestTessellation(unittest.TestCase):
+    """Unit tests for cached surface tessellations."""
+
+    def setUp(self):
+        self.mesh = mesher.Mesh()
+        self.mesh.add_stdnode(1, [0, 0, 0])
+        self.mesh.add_stdnode(2, [1, 0, 0.2])
+        self.mesh.add_stdnode(3, [0, 1, 0])
+        self.mesh.add_stdnode(4, [1, 1, 0.5])
+        self.mesh.add_stdnode(5, [2, 0.5, 0.1])
+        self.mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        self.mesh.add_element(2, ['T11'], [2, 5, 4])
+        self.mesh.generate()
+
+    def test_get_surfaces(self):
+        XiT, TT = discretizer.xi_grid(shape='tri', res=4)
+        XiQ, TQ = discretizer.xi_grid(shape='quad', res=4)
+        X, T, Xi = self.mesh.get_surfaces(res=4, include_xi=True)
+        npt.assert_almost_equal(X[:XiQ.shape[0]], self.mesh.evaluate(1, XiQ))
+        npt.assert_almost_equal(X[XiQ.shape[0]:], self.mesh.evaluate(2, XiT))
+        npt.assert_equal(T, numpy.concatenate([TQ, TT + XiQ.shape[0]]))
+        npt.assert_equal(Xi, numpy.concatenate([XiQ, XiT]))
+
+    def test_cache(self):
+        tessellation = self.mesh.tessellate(res=4)
+        self.assertTrue(tessellation is self.mesh.tessellate(res=4))
+        self.assertFalse(tessellation is self.mesh.tessellate(res=5))
+        self.assertFalse(tessellation is self.mesh.tessellate(res=4, elements=[2]))
+        self.mesh.add_stdnode(6, [3, 1, 0])
+        self.mesh.add_element(3, ['T11'], [5, 6, 4])
+        self.mesh.generate()
+        self.assertFalse(tessellation is self.mesh.tessellate(res=4))
+
+    def test_evaluate_inplace(self):
+        tessellation = self.mesh.tessellate(res=4)
+        X = tessellation.evaluate()
+        self.mesh.nodes[4].values = numpy.array([1, 1, 1.5])
+        X1 = tessellation.evaluate(X)
+        self.assertTrue(X1 is X)
+        npt.assert_almost_equal(X[-1], [1, 1, 1.5])
+
+
+class TestStrains(unittest.TestCase):
+    """Unit tests for batched deformation gradients and strains."""
+
+    def build_mesh(self, M=numpy.eye(3)):
+        mesh = mesher.Mesh()
+        nid = 0
+        for z in [0, 1]:
+            for y in [0, 1]:
+                for x in [0, 1, 2]:
+                    nid += 1
+                    mesh.add_stdnode(nid, numpy.dot(M, [x, y, z]))
+        mesh.add_element(1, ['L1', 'L1', 'L1'], [1, 2, 4, 5, 7, 8, 10, 11])
+        mesh.add_element(2, ['L1', 'L1', 'L1'], [2, 3, 5, 6, 8, 9, 11, 12])
+        mesh.generate()
+        return mesh
+
+    def test_jacobians(self):
+        J = self.build_mesh().jacobians(ng=2)
+        self.assertEqual(J.shape, (2, 8, 3, 3))
+        npt.assert_almost_equal(J, numpy.broadcast_to(numpy.eye(3), J.shape))
+
+    def test_triangle_jacobians(self):
+        M = numpy.array([[2, 0.5], [0, 1.5]])
+        mesh = mesher.Mesh()
+        nid = 0
+        for j in range(4):
+            for i in range(4 - j):
+                nid += 1
+                mesh.add_stdnode(nid, numpy.dot(M, [i / 3., j / 3.]))
+        mesh.add_element(1, ['T33'], list(range(1, 11)))
+        strains = mesh.strains(mesh, ng=2)
+        self.assertEqual(strains['xi'].shape, (4, 2))
+        self.assertTrue((strains['xi'].sum(1) < 1).all())
+        J = mesh.jacobians(ng=2)
+        self.assertEqual(J.shape, (1, 4, 2, 2))
+        npt.assert_almost_equal(J, numpy.broadcast_to(M, J.shape))
+
+    def test_strains(self):
+        M = numpy.array([[1.2, 0.1, 0], [0, 0.9, 0], [0.2, 0, 1.1]])
+        reference = self.build_mesh()
+        deformed = self.build_mesh(M)
+        xi = [[0.1, 0.2, 0.3], [0.5, 0.5, 0.5]]
+        strains = reference.strains(deformed, xi=xi)
+        self.assertEqual(strains['element_ids'], [1, 2])
+        npt.assert_almost_equal(strains['F'], numpy.broadcast_to(M, (2, 2, 3, 3)))
+        C = numpy.dot(M.T, M)
+        npt.assert_almost_equal(strains['C'][1, 0], C)
+        npt.assert_almost_equal(strains['E'][1, 0], 0.5 * (C - numpy.eye(3)))
+        npt.assert_almost_equal(strains['stretches'][0, 1],
+                                numpy.sqrt(numpy.linalg.eigvalsh(C)))
+        F = reference.deformation_gradients(deformed, elements=[2], ng=2)
+        self.assertEqual(F.shape, (1, 8, 3, 3))
+        npt.assert_almost_equal(F[0, 3], M)
+
+    def test_surface_strains(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0, 0])
+        mesh.add_stdnode(2, [1, 0, 0])
+        mesh.add_stdnode(3, [0, 1, 0])
+        mesh.add_stdnode(4, [1, 1, 0])
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        self.assertRaises(ValueError, mesh.deformation_gradients, mesh)
+
+
+class TestQuality(unittest.TestCase):
+    """Unit tests for the element quality scan."""
+
+    def build_mesh(self):
+        mesh = mesher.Mesh()
+        nid = 0
+        for z in [0, 1]:
+            for y in [0, 1]:
+                for x in [0, 1, 2, 3]:
+                    nid += 1
+                    mesh.add_stdnode(nid, [x, y, z])
+        mesh.nodes[11].values[0] = 2.95
+        mesh.add_element(1, ['L1', 'L1', 'L1'], [1, 2, 5, 6, 9, 10, 13, 14],
+                         group='good')
+        # xi1 reversed, i.e., inverted
+        mesh.add_element(2, ['L1', 'L1', 'L1'], [3, 2, 7, 6, 11, 10, 15, 14],
+                         group='bad')
+        mesh.add_element(3, ['L1', 'L1', 'L1'], [3, 4, 7, 8, 11, 12, 15, 16],
+                         group='bad')
+        mesh.generate()
+        return mesh
+
+    def test_quality(self):
+        report = self.build_mesh().quality(min_ratio=0.5)
+        self.assertEqual(report['element_ids'], [1, 2, 3])
+        npt.assert_almost_equal(report['min_jacobian'][0], 1)
+        npt.assert_almost_equal(report['jacobian_ratio'][0], 1)
+        npt.assert_almost_equal(report['skewness'][0], 0)
+        self.assertTrue(report['min_jacobian'][1] < 0)
+        self.assertEqual(report['inverted'], [2])
+        self.assertEqual(report['degenerate'], [3])
+        self.assertEqual(report['groups']['bad']['num_elements'], 2)
+        self.assertEqual(report['groups']['bad']['inverted'], [2])
+        self.assertEqual(report['groups']['good']['inverted'], [])
+
+    def test_corners(self):
+        report = self.build_mesh().quality(points='corners', elements=[1, 3])
+        self.assertEqual(report['element_ids'], [1, 3])
+        npt.assert_almost_equal(report['min_jacobian'], [1, 0.05])
+        self.assertEqual(report['degenerate'], [3])
+
+    def test_surface(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0, 0])
+        mesh.add_stdnode(2, [2, 0, 0])
+        mesh.add_stdnode(3, [0, 1, 0])
+        mesh.add_stdnode(4, [2, 1, 1])
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        mesh.add_element(2, ['T11'], [2, 4, 3])
+        report = mesh.quality()
+        self.assertEqual(report['element_ids'], [1])
+        self.assertEqual(report['skipped'], [2])
+        npt.assert_almost_equal(report['min_jacobian'][0], 2, decimal=1)
+        self.assertTrue(report['min_jacobian'][0] > 2)
+        self.assertEqual(report['inverted'], [])
+
+
+class TestClone(unittest.TestCase):
+    """Unit tests for cloning meshes."""
+
+    def build_mesh(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0])
+        mesh.add_stdnode(2, [1, 0])
+        mesh.add_stdnode(3, [0, 1])
+        mesh.add_stdnode(4, [1, 1], group='top')
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4], group='quads')
+        mesh.generate()
+        return mesh
+
+    def test_clone(self):
+        mesh = self.build_mesh()
+        clone = mesh.clone()
+        npt.assert_equal(clone.get_nodes(), mesh.get_nodes())
+        self.assertTrue(clone.elements[1].mesh is clone)
+        self.assertTrue(clone.elements[1].core is clone.core)
+        self.assertTrue(clone.nodes[1].mesh is clone)
+        self.assertTrue(clone.faces[clone.faces.keys().__iter__().__next__()].mesh is clone)
+        self.assertTrue(clone.nodes.groups['top'][0] is clone.nodes[4])
+        self.assertTrue(clone.elements.groups['quads'][0] is clone.elements[1])
+        self.assertTrue(clone.core.EMap is mesh.core.EMap)
+
+    def test_independent_params(self):
+        mesh = self.build_mesh()
+        clone = mesh.clone()
+        clone.nodes[4].values = numpy.array([2, 2])
+        npt.assert_almost_equal(mesh.nodes[4].values, [1, 1])
+        npt.assert_almost_equal(clone.evaluate(1, [[1, 1]]), [[2, 2]])
+        npt.assert_almost_equal(mesh.evaluate(1, [[1, 1]]), [[1, 1]])
+
+    def test_add_to_clone(self):
+        mesh = self.build_mesh()
+        clone = mesh.clone()
+        clone.add_stdnode(6, [2, 0])
+        clone.add_stdnode(7, [2, 1])
+        clone.add_element(2, ['L1', 'L1'], [2, 6, 4, 7])
+        clone.generate()
+        self.assertEqual(len(clone.elements.keys()), 2)
+        self.assertEqual(len(mesh.elements.keys()), 1)
+        self.assertFalse(6 in mesh.nodes)
+        self.assertEqual(mesh.core.P.size, 8)
+        self.assertEqual(len(mesh.core.EMap), 1)
+
+    def test_add_to_original(self):
+        mesh = self.build_mesh()
+        X, T = mesh.get_surfaces(res=2)
+        clone = mesh.clone()
+        mesh.add_stdnode(6, [2, 0])
+        self.assertFalse(6 in clone.nodes)
+        clone.nodes[1].values = numpy.array([-1, 0])
+        X1, T1 = clone.get_surfaces(res=2)
+        npt.assert_almost_equal(X1[0], [-1, 0])
+        npt.assert_almost_equal(mesh.get_surfaces(res=2)[0], X)
+
+    def test_clone_array_backed(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnodes([1, 2, 3, 4], [[0, 0], [1, 0], [0, 1], [1, 1]])
+        mesh.add_elements([1], ['L1', 'L1'], [[1, 2, 3, 4]])
+        mesh.nodes.add_to_group(4, 'top')
+        mesh.generate()
+        created = dict(mesh.nodes._created)
+        clone = mesh.clone()
+        self.assertTrue(core.is_array_backed(mesh.nodes))
+        self.assertTrue(core.is_array_backed(mesh.elements))
+        self.assertTrue(core.is_array_backed(clone.nodes))
+        self.assertTrue(core.is_array_backed(clone.elements))
+        self.assertEqual(mesh.nodes._created, created)
+        self.assertTrue(clone.nodes.groups['top'][0] is clone.nodes[4])
+        self.assertTrue(clone.nodes[4].mesh is clone)
+        self.assertTrue(clone.elements[1].core is clone.core)
+        clone.nodes[1].values = numpy.array([-1, 0])
+        npt.assert_almost_equal(clone.evaluate(1, [[0, 0]]), [[-1, 0]])
+        self.assertEqual(mesh.nodes._created, created)
+        npt.assert_almost_equal(mesh.evaluate(1, [[0, 0]]), [[0, 0]])
+
+    def test_add_pcanode_to_clone(self):
+        mesh = self.build_mesh()
+        mesh.add_stdnode('weights', [1, 0.5])
+        mesh.add_stdnode('vars', [1, 1])
+        mesh.generate()
+        clone = mesh.clone()
+        clone.add_pcanode(5, [[[0.5, 0.2]], [[1.0, -0.2]]], 'weights', 'vars',
+                          group='pca')
+        clone.generate()
+        self.assertEqual(len(mesh.core.PCAMap), 0)
+        mesh.update()
+        npt.assert_almost_equal(clone.nodes[5].values, [[0.6], [0.9]])
+
+
+class TestTransform(unittest.TestCase):
+    """Unit tests for affine transforms of meshes."""
+
+    def test_transform(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0, 0])
+        mesh.add_stdnode(2, [1, 0, 0])
+        mesh.add_stdnode(3, [0, 1, 0])
+        mesh.add_stdnode(4, [1, 1, 1])
+        mesh.add_stdnode('xi', [0.5, 0.5], group='xi')
+        mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        mesh.generate()
+        X = mesh.get_nodes([1, 2, 3, 4])
+        M = numpy.array([[0, -2, 0], [1, 0, 0], [0, 0, 3]])
+        mesh.transform(M, offset=[1, 2, 3])
+        npt.assert_almost_equal(mesh.get_nodes([1, 2, 3, 4]),
+                                numpy.dot(X, M.T) + [1, 2, 3])
+        npt.assert_almost_equal(mesh.nodes['xi'].values, [0.5, 0.5])
+        mesh.transform(numpy.eye(2), offset=[1, 1], groups='xi')
+        npt.assert_almost_equal(mesh.nodes['xi'].values, [1.5, 1.5])
+
+        mesh.add_stdnode('mixed', [0, 0, 0], group='mixed')
+        mesh.nodes.add_to_group('xi', 'mixed')
+        for M in [2 * numpy.eye(2), 2 * numpy.eye(3)]:
+            self.assertRaises(ValueError, mesh.transform, M, groups='mixed')
+            npt.assert_equal(mesh.nodes['mixed'].values, [0, 0, 0])
+            npt.assert_equal(mesh.nodes['xi'].values, [1.5, 1.5])
+
+    def test_transform_group_changes(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0], group='a')
+        mesh.add_stdnode(2, [1, 0])
+        mesh.generate()
+        mesh.transform(numpy.eye(2), offset=[1, 0], groups=['a'])
+        mesh.nodes.add_to_group(2, 'a')
+        mesh.transform(numpy.eye(2), offset=[5, 0], groups=['a'])
+        npt.assert_equal(mesh.nodes[1].values, [6, 0])
+        npt.assert_equal(mesh.nodes[2].values, [6, 0])
+
+    def test_transform_hermite(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [[0, 1, 0, 0], [0, 0, 1, 0]])
+        mesh.add_stdnode(2, [[1, 1, 0, 0], [0, 0, 1, 0]])
+        mesh.add_stdnode(3, [[0, 1, 0, 0], [1, 0, 1, 0]])
+        mesh.add_stdnode(4, [[1, 1, 0, 0.1], [1, 0, 1, 0.2]])
+        mesh.add_element(1, ['H3', 'H3'], [1, 2, 3, 4])
+        mesh.generate()
+        xi = [[0.3, 0.4], [0.9, 0.1]]
+        X = mesh.evaluate(1, xi)
+        dX = mesh.evaluate(1, xi, deriv=[1, 0])
+        theta = 0.3
+        R = numpy.array([[numpy.cos(theta), -numpy.sin(theta)],
+                         [numpy.sin(theta), numpy.cos(theta)]])
+        mesh.transform(R, offset=[2, -1])
+        npt.assert_almost_equal(mesh.evaluate(1, xi), numpy.dot(X, R.T) + [2, -1])
+        npt.assert_almost_equal(mesh.evaluate(1, xi, deriv=[1, 0]), numpy.dot(dX, R.T))
+        npt.assert_almost_equal(mesh.nodes[4].values[:, 3], numpy.dot(R, [0.1, 0.2]))
+        self.assertRaises(ValueError, mesh.transform, numpy.eye(3))
+
+
+class TestAdjacency(unittest.TestCase):
+    """Unit tests for the node to element adjacency index."""
+
+    def build_mesh(self):
+        mesh = mesher.Mesh()
+        nid = 0
+        for y in [0, 1, 2]:
+            for x in [0, 1, 2]:
+                nid += 1
+                mesh.add_stdnode(nid, [[x, 0, 0, 0], [y ** 2, 0, 0, 0]])
+        mesh.add_element(1, ['H3', 'H3'], [1, 2, 4, 5])
+        mesh.add_element(2, ['H3', 'H3'], [2, 3, 5, 6])
+        mesh.add_element(3, ['H3', 'H3'], [4, 5, 7, 8])
+        mesh.add_element(4, ['H3', 'H3'], [5, 6, 8, 9])
+        mesh.generate()
+        return mesh
+
+    def test_adjacency(self):
+        mesh = self.build_mesh()
+        adjacency = mesh.adjacency()
+        self.assertEqual(adjacency.node_ids, [1, 2, 4, 5, 3, 6, 7, 8, 9])
+        npt.assert_equal(adjacency.indptr, [0, 1, 3, 5, 9, 10, 12, 13, 15, 16])
+        self.assertEqual(adjacency.node_elements(5), [(1, 3), (2, 2), (3, 1), (4, 0)])
+        self.assertEqual(adjacency.node_elements(1), [(1, 0)])
+        mesh.add_stdnode(10, [[3, 0, 0, 0], [0, 0, 0, 0]])
+        mesh.add_stdnode(11, [[3, 0, 0, 0], [1, 0, 0, 0]])
+        mesh.add_element(5, ['H3', 'H3'], [3, 10, 6, 11])
+        self.assertTrue(mesh.adjacency() is adjacency)
+        self.assertEqual(adjacency.node_elements(3), [(2, 1), (5, 0)])
+        self.assertEqual(adjacency.node_elements(11), [(5, 3)])
+
+    def test_smooth_derivatives(self):
+        mesh = self.build_mesh()
+        mesh.nodes[5].smooth_derivatives()
+        npt.assert_almost_equal(mesh.nodes[5].values[:, 1:3], [[1, 0], [0, 2]])
+        mesh.smooth_derivatives()
+        npt.assert_almost_equal(mesh.nodes[1].values[:, 1:3], [[1, 0], [0, 1]])
+        npt.assert_almost_equal(mesh.nodes[9].values[:, 1:3], [[1, 0], [0, 3]])
+
+
+class TestEstimateDerivatives(unittest.TestCase):
+    """Unit tests for estimating cubic-Hermite node derivatives."""
+
+    def build_mesh(self, n=3):
+        mesh = mesher.Mesh()
+        ids = numpy.arange((n + 1) ** 2).reshape((n + 1, n + 1)) + 1
+        for j in range(n + 1):
+            for i in range(n + 1):
+                values = numpy.zeros((3, 4))
+                values[:, 0] = [i, j, 0.3 * i * j + 0.1 * i * i]
+                mesh.add_stdnode(int(ids[j, i]), values)
+        eid = 0
+        for j in range(n):
+            for i in range(n):
+                eid += 1
+                mesh.add_element(eid, ['H3', 'H3'],
+                                 ids[j:j + 2, i:i + 2].ravel().tolist())
+        mesh.generate()
+        return mesh
+
+    def test_estimate_derivatives(self):
+        mesh = self.build_mesh()
+        mesh.estimate_derivatives()
+        npt.assert_almost_equal(mesh.nodes[6].values,
+                                [[1, 1, 0, 0], [1, 0, 1, 0], [0.4, 0.5, 0.3, 0.3]])
+        npt.assert_almost_equal(mesh.nodes[1].values[2], [0, 0.1, 0, 0.3])
+
+    def test_smooth_derivatives(self):
+        mesh = self.build_mesh()
+        mesh.estimate_derivatives(cross_derivatives=False)
+        expected = self.build_mesh()
+        expected.smooth_derivatives()
+        npt.assert_almost_equal(mesh.core.P, expected.core.P)
+
+    def test_3d(self):
+        mesh = mesher.Mesh()
+        nid = 0
+        for z in [0, 1]:
+            for y in [0, 1]:
+                for x in [0, 1]:
+                    nid += 1
+                    values = numpy.zeros((3, 8))
+                    values[:, 0] = [x, y, z + x * y * z]
+                    mesh.add_stdnode(nid, values)
+        mesh.add_element(1, ['H3', 'H3', 'H3'], list(range(1, 9)))
+        mesh.estimate_derivatives()
+        npt.assert_almost_equal(mesh.nodes[1].values[0], [0, 1, 0, 0, 0, 0, 0, 0])
+        npt.assert_almost_equal(mesh.nodes[8].values[2], [2, 1, 1, 1, 2, 1, 1, 1])
+
+
+class TestFieldView(unittest.TestCase):
+    """Unit tests for bulk field accessors."""
+
+    def build_mesh(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0], group='nodes')
+        mesh.add_stdnode(2, [[1, 1, 0], [0, 0, 1]], group='nodes')
+        mesh.add_stdnode(3, [0, 1], group='nodes')
+        mesh.add_stdnode('xi', [0.5])
+        mesh.generate()
+        return mesh
+
+    def test_field_view(self):
+        mesh = self.build_mesh()
+        X = mesh.field_view(group='nodes')
+        self.assertEqual(X.shape, (3, 2))
+        self.assertEqual(X.node_ids, [1, 2, 3])
+        npt.assert_equal(X[:], [[0, 0], [1, 0], [0, 1]])
+        npt.assert_equal(numpy.asarray(X), X[:])
+        X[:] = X[:] + [1, 2]
+        npt.assert_equal(mesh.nodes[2].values, [[2, 1, 0], [2, 0, 1]])
+        X[2] = [5, 5]
+        npt.assert_equal(mesh.nodes[3].values, [5, 5])
+        dX = mesh.field_view(nodes=[2], component=2)
+        npt.assert_equal(dX[:], [[0, 1]])
+
+    def test_get_set_nodes(self):
+        mesh = self.build_mesh()
+        npt.assert_equal(mesh.get_nodes([3, 1]), [[0, 1], [0, 0]])
+        npt.assert_equal(mesh.get_nodes(group='nodes'), [[0, 0], [1, 0], [0, 1]])
+        mesh.set_nodes(numpy.array([[3, 4]]), nodes=2)
+        npt.assert_equal(mesh.nodes[2].values, [[3, 1, 0], [4, 0, 1]])
+        self.assertRaises(ValueError, mesh.field_view, nodes=[1, 'xi'])
+        self.assertRaises(ValueError, mesh.set_nodes, numpy.ones((3, 2)),
+                          nodes=[1, 3])
+        npt.assert_equal(mesh.get_nodes([1, 3]), [[0, 0], [0, 1]])
+
+    def test_group_changes(self):
+        mesh = self.build_mesh()
+        mesh.nodes.add_to_group(1, 'a')
+        npt.assert_equal(mesh.get_nodes(group='a'), [[0, 0]])
+        mesh.nodes.add_to_group(3, 'a')
+        npt.assert_equal(mesh.get_nodes(group='a'), [[0, 0], [0, 1]])
+        mesh.set_nodes(numpy.array([[5, 5], [6, 6]]), group='a')
+        npt.assert_equal(mesh.nodes[3].values, [6, 6])
+        mesh.remove_nodes([1])
+        npt.assert_equal(mesh.get_nodes(group='a'), [[6, 6]])
+
+
+class TestCompactObjects(unittest.TestCase):
+    """Unit tests for the compact node and element representation."""
+
+    def test_slots(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode(1, [0, 0])
+        mesh.add_stdnode(2, [1, 0])
+        mesh.add_stdnode(3, [0, 1])
+        mesh.add_stdnode(4, [1, 1])
+        elem = mesh.add_element(1, ['L1', 'L1'], [1, 2, 3, 4])
+        mesh.generate()
+        for obj in [mesh.nodes[1], elem, list(mesh.faces)[0]]:
+            self.assertFalse(hasattr(obj, '__dict__'))
+        npt.assert_equal(mesh.core.EMap[0], [[0, 2, 4, 6], [1, 3, 5, 7]])
+        self.assertEqual(elem._get_param_indicies(), [[0, 2, 4, 6], [1, 3, 5, 7]])
+
+
+class TestArrayStorage(unittest.TestCase):
+    """Unit tests for the array-backed nodes and elements."""
+
+    def _meshes(self):
+        X = numpy.array([[0, 0], [1, 0], [2, 0], [0, 1], [1, 1], [2, 1.]])
+        conn = numpy.array([[1, 2, 4, 5], [2, 3, 5, 6]])
+        amesh = mesher.Mesh()
+        amesh.add_stdnodes(numpy.arange(1, 7), X)
+        amesh.add_elements([1, 2], ['L1', 'L1'], conn)
+        omesh = mesher.Mesh()
+        for uid, x in enumerate(X):
+            omesh.add_stdnode(uid + 1, x)
+        for uid, nids in enumerate(conn):
+            omesh.add_element(uid + 1, ['L1', 'L1'], nids)
+        amesh.generate()
+        omesh.generate()
+        return amesh, omesh
+
+    def test_generate_without_objects(self):
+        amesh, omesh = self._meshes()
+        self.assertFalse(amesh.nodes.materialised)
+        self.assertEqual(amesh.nodes._created, {})
+        self.assertEqual(amesh.elements._created, {})
+        npt.assert_equal(amesh.core.EMap, numpy.array(omesh.core.EMap))
+        xi = [[0.2, 0.3], [0.5, 0.5]]
+        npt.assert_almost_equal(amesh.evaluate([1, 2], xi),
+                                omesh.evaluate([1, 2], xi))
+
+    def test_proxies(self):
+        amesh, omesh = self._meshes()
+        self.assertEqual(amesh.nodes.size(), 6)
+        self.assertEqual(amesh.elements.ids, [1, 2])
+        self.assertTrue(3 in amesh.nodes)
+        self.assertFalse(7 in amesh.nodes)
+        self.assertFalse('a' in amesh.nodes)
+        self.assertRaises(KeyError, amesh.nodes.__getitem__, 7)
+        npt.assert_equal(amesh.nodes[5].values, [1, 1])
+        self.assertEqual(amesh.elements[2].node_ids, [2, 3, 5, 6])
+        self.assertEqual(amesh.elements[2].cid, 1)
+        self.assertTrue(amesh.nodes[5] is amesh.nodes[5])
+        self.assertEqual([n.id for n in amesh.nodes], [1, 2, 3, 4, 5, 6])
+        amesh.nodes[3].values = numpy.array([3., 0])
+        npt.assert_equal(amesh.nodes[3].values, [3, 0])
+        self.assertFalse(amesh.nodes.materialised)
+        self.assertEqual(amesh.adjacency().node_elements(5),
+                         [(1, 3), (2, 2)])
+
+    def test_materialise(self):
+        amesh, omesh = self._meshes()
+        node = amesh.nodes[2]
+        amesh.add_stdnode(7, [3, 0])
+        amesh.add_stdnode(8, [3, 1])
+        amesh.add_element(3, ['L1', 'L1'], [3, 7, 6, 8])
+        amesh.nodes.add_to_group([1, 2], 'left')
+        self.assertTrue(amesh.nodes.materialised)
+        self.assertTrue(amesh.nodes[2] is node)
+        self.assertEqual(amesh.nodes.size(), 8)
+        self.assertEqual(sorted(amesh.nodes.get_group_ids('left')), [1, 2])
+        npt.assert_almost_equal(amesh.evaluate([3], [[0.5, 0.5]]),
+                                [[2.5, 0.5]])
+        npt.assert_almost_equal(amesh.evaluate([1], [[0.5, 0.5]]),
+                                [[0.5, 0.5]])
+
+
+class TestCompact(unittest.TestCase):
+    """Unit tests for removing nodes and elements and compacting core."""
+
+    def _mesh(self):
+        mesh = mesher.Mesh()
+        for i in range(4):
+            mesh.add_stdnode(2 * i + 1, [i, 0])
+            mesh.add_stdnode(2 * i + 2, [i, 1])
+        for i in range(3):
+            mesh.add_element(i + 1, ['L1', 'L1'],
+                             [2 * i + 1, 2 * i + 3, 2 * i + 2, 2 * i + 4])
+        mesh.generate()
+        return mesh
+
+    def test_remove_elements(self):
+        mesh = self._mesh()
+        num_faces = mesh.faces.size()
+        mesh.elements.add_to_group([1, 3], 'ends')
+        mesh.remove_elements([3], remove_nodes=True)
+        self.assertEqual(sorted(mesh.elements.ids), [1, 2])
+        self.assertEqual(sorted(mesh.nodes.ids), [1, 2, 3, 4, 5, 6])
+        self.assertEqual([e.id for e in mesh.elements('ends')], [1])
+        self.assertEqual(mesh.faces.size(), num_faces - 1)
+        self.assertEqual(mesh.core.P.size, 16)
+        self.assertRaises(ValueError, mesh.remove_nodes, [3])
+
+    def test_compact(self):
+        mesh = self._mesh()
+        mesh.add_map((7, 1), (8, 1), scale=2.)
+        mesh.add_map((3, 1), (4, 1), scale=2.)
+        mesh.core.add_variables(
+            list(mesh.nodes[7].cids) + list(mesh.nodes[4].cids))
+        mesh.remove_elements([2, 3])
+        mesh.remove_nodes([5, 6, 7, 8])
+        cid_map = mesh.compact()
+        npt.assert_equal(cid_map, list(range(8)) + [-1] * 8)
+        self.assertEqual(mesh.core.P.size, 8)
+        self.assertEqual(mesh.core.ParamMap, [[5], [7], [2.]])
+        self.assertEqual(mesh.core.variable_ids, [6, 7])
+        self.assertEqual(mesh.nodes[4].cids, range(6, 8))
+        npt.assert_equal(mesh.core.EMap[0], [[0, 4, 2, 6], [1, 5, 3, 7]])
+        # node 4 y is mapped from node 3 y
+        npt.assert_almost_equal(mesh.evaluate([1], [[0.5, 0.5]]),
+                                [[0.5, 0.25]])
+
+    def test_compact_array_backed(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnodes([1, 2, 3], [[0.], [1.], [3.]])
+        mesh.add_stdnode(4, [6.])
+        mesh.add_elements([1, 2, 3], 'L1', [[1, 2], [2, 3], [3, 4]])
+        mesh.remove_elements([1], remove_nodes=True)
+        npt.assert_equal(mesh.compact(), [-1, 0, 1, 2])
+        npt.assert_almost_equal(mesh.evaluate([2, 3], [0.5]), [[2.], [4.5]])
+
+
+class TestExtract(unittest.TestCase):
+    """Unit tests for extracting submeshes."""
+
+    def _mesh(self):
+        mesh = mesher.Mesh()
+        for i in range(4):
+            mesh.add_stdnode(2 * i + 1, [i, 0])
+            mesh.add_stdnode(2 * i + 2, [i, 1])
+        for i in range(3):
+            mesh.add_element(i + 1, ['L1', 'L1'],
+                             [2 * i + 1, 2 * i + 3, 2 * i + 2, 2 * i + 4])
+        mesh.elements.add_to_group([2, 3], 'right')
+        mesh.nodes.add_to_group([1, 8], 'corners')
+        mesh.generate()
+        return mesh
+
+    def test_extract_group(self):
+        mesh = self._mesh()
+        submesh, node_map, element_map = mesh.extract(groups='right')
+        self.assertEqual(sorted(element_map.keys()), [2, 3])
+        self.assertEqual(sorted(node_map.keys()), [3, 4, 5, 6, 7, 8])
+        self.assertEqual(submesh.core.P.size, 12)
+        self.assertEqual(submesh.nodes.get_group_ids('corners'), [8])
+        self.assertEqual(sorted(submesh.elements.get_group_ids('right')),
+                         [2, 3])
+        xi = [[0.2, 0.7]]
+        npt.assert_almost_equal(submesh.evaluate([2, 3], xi),
+                                mesh.evaluate([2, 3], xi))
+        submesh.nodes[5].values = numpy.array([9., 9.])
+        npt.assert_equal(mesh.nodes[5].values, [2, 0])
+
+    def test_extract_renumber(self):
+        mesh = self._mesh()
+        submesh, node_map, element_map = mesh.extract([3], renumber=True)
+        self.assertEqual(element_map, {3: 1})
+        self.assertEqual(node_map, {5: 1, 6: 2, 7: 3, 8: 4})
+        self.assertEqual(submesh.elements[1].node_ids, [1, 3, 2, 4])
+        self.assertEqual(mesh.elements[3].node_ids, [5, 7, 6, 8])
+        npt.assert_almost_equal(submesh.evaluate([1], [[0.5, 0.5]]),
+                                [[2.5, 0.5]])
+
+    def test_extract_pca(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnode('weights', [1, 1, -0.1])
+        mesh.add_stdnode('vars', [1, 0.1, 0.04])
+        mesh.add_pcanode(1, [[[0.5, 0.1, 0.01]]], 'weights', 'vars',
+                         group='pca')
+        mesh.add_pcanode(2, [[[1.0, -0.1, 0.01]]], 'weights', 'vars',
+                         group='pca')
+        mesh.add_stdnode(3, [2.0])
+        mesh.add_element(1, ['L1'], [1, 2])
+        mesh.add_element(2, ['L1'], [2, 3])
+        mesh.generate()
+        X = mesh.evaluate([1], [0, 1])
+        submesh, node_map, element_map = mesh.extract([1])
+        self.assertEqual(len(node_map), 6)
+        self.assertFalse(3 in submesh.nodes)
+        self.assertTrue('weights' in submesh.nodes)
+        npt.assert_almost_equal(submesh.evaluate([1], [0, 1]), X)
+        submesh.nodes['weights'].values = numpy.array([1, 0., 0.])
+        submesh.update_pca_nodes()
+        npt.assert_almost_equal(submesh.evaluate([1], [0, 1]), [[0.5], [1]])
+        npt.assert_almost_equal(mesh.evaluate([1], [0, 1]), X)
+
+    def test_extract_array_backed(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnodes([10, 20, 30, 40], [[0.], [1.], [3.], [6.]])
+        mesh.add_elements([1, 2, 3], 'L1', [[10, 20], [20, 30], [30, 40]])
+        submesh, node_map, element_map = mesh.extract([3, 2], renumber=True)
+        self.assertEqual(node_map, {20: 1, 30: 2, 40: 3})
+        self.assertEqual(element_map, {2: 1, 3: 2})
+        self.assertFalse(submesh.nodes.materialised)
+        npt.assert_equal(submesh.core.P, [1, 3, 6])
+        npt.assert_almost_equal(submesh.evaluate([1, 2], [0.5]), [[2], [4.5]])
+
+    def test_extract_array_backed_params(self):
+        mesh = mesher.Mesh()
+        mesh.add_stdnodes([10, 20, 30, 40], [[0.], [1.], [3.], [6.]])
+        mesh.add_elements([1, 2, 3], 'L1', [[10, 20], [20, 30], [30, 40]])
+        mesh.core.fix_parameters([0, 1], True)
+        mesh.core.add_variables([0, 2, 3])
+        mesh.add_map((20, 0), (40, 0), scale=4.)
+        submesh, node_map, element_map = mesh.extract([2, 3])
+        self.assertFalse(submesh.nodes.materialised)
+        npt.assert_equal(submesh.core.fixed, [True, False, False])
+        self.assertEqual(submesh.core.variable_ids, [1, 2])
+        self.assertEqual(submesh.core.ParamMap, [[0], [2], [4.]])
+        submesh.nodes[20].values = numpy.array([2.])
+        submesh.update(force=True)
+        npt.assert_equal(submesh.core.P, [2, 3, 8])
+
+    def test_copy_mesh_elements(self):
+        mesh = self._mesh()
+        submesh = mesh.copy_mesh([1])
+        self.assertEqual(sorted(submesh.nodes.ids), [1, 2, 3, 4])
+        npt.assert_almost_equal(submesh.evaluate([1], [[0.5, 0.5]]),
+                                [[0.5, 0.5]])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,69 @@
+import sys
+import unittest
+
+import numpy
+import numpy.testing as npt
+
+sys.path.append('..')
+from morphic import mesher
+from morphic.sequence import MeshSequence
+
+
+def square_mesh():
+    mesh = mesher.Mesh()
+    mesh.add_stdnodes([1, 2, 3, 4], [[0, 0], [1, 0], [0, 1], [1, 1]])
+    mesh.add_elements([1], ['L1', 'L1'], [[1, 2, 3, 4]])
+    mesh.generate()
+    return mesh
+
+
+class TestMeshSequence(unittest.TestCase):
+    """Unit tests for mesh sequences."""
+
+    filepath = 'data/square.seq'
+
+    def write_sequence(self):
+        mesh = square_mesh()
+        sequence = MeshSequence(self.filepath, mesh, mode='w')
+        for time in [0, 0.5, 2]:
+            mesh.nodes[4].values = numpy.array([1 + time, 1.])
+            sequence.append(time=time)
+        sequence.close()
+        return mesh
+
+    def test_frames(self):
+        self.write_sequence()
+        with MeshSequence(self.filepath) as sequence:
+            self.assertEqual(len(sequence), 3)
+            npt.assert_equal(sequence.times, [0, 0.5, 2])
+            npt.assert_equal(sequence.frame(-1)[-2:], [3, 1])
+            mesh = sequence.load_frame(1)
+            npt.assert_equal(mesh.nodes[4].values, [1.5, 1])
+            npt.assert_almost_equal(mesh.evaluate([1], [[1, 1]]), [[1.5, 1]])
+            self.assertRaises(IndexError, sequence.frame, 3)
+
+    def test_interpolate(self):
+        self.write_sequence()
+        with MeshSequence(self.filepath) as sequence:
+            mesh = sequence.load_time(1.25)
+            npt.assert_almost_equal(mesh.nodes[4].values, [2.25, 1])
+            npt.assert_equal(sequence.interpolate(0.5), sequence.frame(1))
+            npt.assert_equal(sequence.interpolate(2), sequence.frame(2))
+            self.assertRaises(ValueError, sequence.interpolate, 2.5)
+
+    def test_append(self):
+        self.write_sequence()
+        mesh = mesher.Mesh(self.filepath)
+        npt.assert_equal(mesh.params, square_mesh().params)
+
+        with MeshSequence(self.filepath, mode='a') as sequence:
+            self.assertRaises(ValueError, sequence.append, time=1)
+            self.assertRaises(ValueError, sequence.append, numpy.zeros(3))
+            self.assertEqual(sequence.append(numpy.arange(8.)), 3)
+        with MeshSequence(self.filepath) as sequence:
+            npt.assert_equal(sequence.times, [0, 0.5, 2, 3])
+            npt.assert_equal(sequence.frame(3), numpy.arange(8.))
+
+
+if __name__ == "__main__":
+    unittest.main()
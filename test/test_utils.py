@@ -0,0 +1,118 @@
+import sys
+import unittest
+
+import numpy
+import numpy.testing as npt
+
+sys.path.append('..')
+from morphic import mesher
+from morphic import utils
+
+
+def hermite_mesh(n=3):
+    # A 2D cubic-Hermite mesh with the field (x, y + 0.1 x^3)
+    mesh = mesher.Mesh()
+    for j in range(n + 1):
+        for i in range(n + 1):
+            x, y = float(i), float(j)
+            mesh.add_stdnode(j * (n + 1) + i + 1, [
+                [x, 1, 0, 0], [y + 0.1 * x ** 3, 0.3 * x ** 2, 1, 0]])
+    for j in range(n):
+        for i in range(n):
+            nid = j * (n + 1) + i + 1
+            mesh.add_element(j * n + i + 1, ['H3', 'H3'],
+                             [nid, nid + 1, nid + n + 1, nid + n + 2])
+    mesh.generate()
+    return mesh
+
+
+class TestConvert(unittest.TestCase):
+    """Unit tests for converting between Hermite and Lagrange meshes."""
+
+    def test_hermite_lagrange(self):
+        hmesh = hermite_mesh()
+        lmesh = utils.convert_hermite_lagrange(hmesh)
+        self.assertEqual(lmesh.nodes.size(), 100)
+        self.assertEqual(lmesh.elements.size(), 9)
+        self.assertEqual(lmesh.elements[1].basis, ['L3', 'L3'])
+        self.assertEqual(lmesh.elements[1].node_ids[:4], [1, 17, 18, 2])
+        npt.assert_equal(lmesh.nodes[16].values, hmesh.nodes[16].values[:, 0])
+        xi = numpy.array([[0.1, 0.2], [0.5, 0.5], [0.9, 0.3]])
+        npt.assert_almost_equal(lmesh.evaluate([1, 5, 9], xi),
+                                hmesh.evaluate([1, 5, 9], xi))
+
+    def test_hermite_quadratic_lagrange(self):
+        hmesh = hermite_mesh(2)
+        lmesh = utils.convert_hermite_lagrange(
+            hmesh, interpolation='quadraticLagrange')
+        self.assertEqual(lmesh.nodes.size(), 25)
+        self.assertEqual(lmesh.elements[4].basis, ['L2', 'L2'])
+        npt.assert_almost_equal(lmesh.evaluate([4], [[0, 0], [1, 1]]),
+                                hmesh.evaluate([4], [[0, 0], [1, 1]]))
+
+    def test_hermite_lagrange_mixed_dimensions(self):
+        hmesh = hermite_mesh(1)
+        hmesh.add_stdnode(5, [[2, 1], [0, 0]])
+        hmesh.add_stdnode(6, [[3, 1], [0, 0]])
+        hmesh.add_element(2, ['H3'], [5, 6])
+        hmesh.generate()
+        lmesh = utils.convert_hermite_lagrange(hmesh)
+        self.assertEqual(lmesh.nodes.size(), 20)
+        self.assertEqual(lmesh.elements[1].node_ids[:4], [1, 7, 8, 2])
+        self.assertEqual(lmesh.elements[2].node_ids, [5, 19, 20, 6])
+        npt.assert_almost_equal(lmesh.evaluate([2], [0.5]), [[2.5, 0]])
+
+    def test_lagrange_hermite(self):
+        hmesh = hermite_mesh()
+        lmesh = utils.convert_hermite_lagrange(hmesh)
+        hmesh2 = utils.convert_lagrange_hermite(lmesh)
+        self.assertEqual(hmesh2.elements[5].node_ids,
+                         lmesh.elements[5].node_ids[::3][:2] +
+                         lmesh.elements[5].node_ids[12::3])
+        xi = numpy.array([[0.1, 0.2], [0.5, 0.5], [0.9, 0.3]])
+        npt.assert_almost_equal(hmesh2.evaluate([1, 5, 9], xi),
+                                hmesh.evaluate([1, 5, 9], xi))
+        npt.assert_almost_equal(hmesh2.nodes[16].values,
+                                hmesh.nodes[16].values)
+
+
+class TestLoad(unittest.TestCase):
+    """Unit tests for loading many mesh files."""
+
+    def save_cohort(self):
+        filepaths = []
+        mesh = hermite_mesh(2)
+        for i in range(3):
+            mesh.nodes[1].values = numpy.array([[i, 1, 0, 0], [0, 0, 1, 0.]])
+            filepaths.append('data/cohort%d.mesh' % i)
+            mesh.save(filepaths[-1], format='numpy')
+        hermite_mesh(1).save('data/cohort3.mesh', format='numpy')
+        return filepaths
+
+    def test_load_meshes(self):
+        filepaths = self.save_cohort() + ['data/missing.mesh']
+        meshes, errors = utils.load_meshes(filepaths, workers=2)
+        self.assertEqual(list(errors.keys()), ['data/missing.mesh'])
+        self.assertTrue(meshes[3] is None)
+        npt.assert_equal([mesh.nodes[1].values[0, 0] for mesh in meshes[:3]],
+                         [0, 1, 2])
+
+    def test_load_params(self):
+        filepaths = self.save_cohort()
+        filepaths = ['data/missing.mesh'] + filepaths + ['data/cohort3.mesh']
+        for processes in [False, True]:
+            mesh, P, errors = utils.load_params(
+                filepaths, workers=2, processes=processes)
+            self.assertEqual(sorted(errors.keys()),
+                             ['data/cohort3.mesh', 'data/missing.mesh'])
+            self.assertTrue(isinstance(errors['data/cohort3.mesh'],
+                                       ValueError))
+            self.assertEqual(mesh.filepath, 'data/cohort0.mesh')
+            self.assertEqual(P.shape, (5, mesh.params.size))
+            self.assertTrue(numpy.isnan(P[[0, 4]]).all())
+            npt.assert_equal(P[1:4, 0], [0, 1, 2])
+            npt.assert_equal(P[2, 1:], mesh.params[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()